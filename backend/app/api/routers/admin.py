@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+import hmac
+
+from app.core.config import settings
+from app.core.profiler import profile_store
+from app.db.database import get_db
+from app.models import TenantPurge
+from app.services.tenant_purge import TenantPurgeService
+
+router = APIRouter(prefix="/admin", tags=["admin"], include_in_schema=False)
+
+
+async def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Admin endpoints are disabled unless ADMIN_TOKEN is configured"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/profiles", dependencies=[Depends(require_admin_token)])
+def list_profiles() -> List[Dict]:
+    """Stored request profiles, newest first (without the samples)"""
+    return profile_store.list()
+
+
+@router.get("/profiles/{name}", dependencies=[Depends(require_admin_token)])
+def download_profile(name: str, format: str = Query("json", pattern="^(json|folded)$")):
+    """Download a profile as JSON, or as folded stacks for flamegraph.pl / speedscope"""
+    path = profile_store.path_for(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "folded":
+        return PlainTextResponse(
+            profile_store.to_folded(path),
+            headers={"Content-Disposition": f'attachment; filename="{path.stem}.folded"'},
+        )
+    return FileResponse(path, media_type="application/json", filename=path.name)
+
+
+
+@router.get("/purges", dependencies=[Depends(require_admin_token)])
+def list_purges(
+    user_id: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+) -> List[Dict]:
+    """Tenant purges with their progress, newest first"""
+    query = db.query(TenantPurge)
+    if user_id:
+        query = query.filter(TenantPurge.user_id == user_id)
+    return [TenantPurgeService.progress(job) for job in query.order_by(TenantPurge.id.desc()).limit(limit)]
+
+
+@router.get("/purges/{purge_id}", dependencies=[Depends(require_admin_token)])
+def get_purge(purge_id: int, db: Session = Depends(get_db)) -> Dict:
+    job = db.query(TenantPurge).filter(TenantPurge.id == purge_id).first()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Purge not found")
+    return TenantPurgeService.progress(job)
@@ -5,6 +5,7 @@ from typing import Dict
 from app.db.database import get_db
 from app.middleware.auth import get_current_user
 from app.core.billing import BillingService, PLAN_LIMITS
+from app.core.query_budget import query_budget
 
 router = APIRouter(prefix="/api/billing", tags=["billing"])
 
@@ -23,6 +24,7 @@ async def get_user_plan(
     }
 
 @router.get("/usage")
+@query_budget(2)
 async def get_usage_stats(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
@@ -1,34 +1,99 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response, Query
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import func
+from typing import List, Optional
 
 from app.db.database import get_db
 from app.models.cliente import Cliente
-from app.schemas.cliente import ClienteCreate, ClienteUpdate, ClienteResponse
+from app.models.factura import Factura
+from app.schemas.cliente import ClienteCreate, ClienteUpdate, ClienteResponse, ClienteAutocomplete
 from app.middleware.auth import get_current_user
 from app.core.billing import BillingService
+from app.core.etag import compute_etag, is_not_modified, not_modified_response, etag_headers
+from app.core.query_budget import query_budget
+from app.services.search import SearchService, FacturaSearchService, InvalidCursor
+from app.services.autocomplete import cliente_autocomplete
+from app.services.idempotency import IdempotencyService
+from app.core.serialization import json_response, dumps, wants_ndjson, cliente_ndjson
+from app.services.streaming import NDJSONStreamService
 
 router = APIRouter(
     prefix="/api/clientes",
     tags=["clientes"]
 )
 
+# Page size of the JSON list (NDJSON mode streams everything by default)
+DEFAULT_PAGE_SIZE = 100
+
 @router.get("/", response_model=List[ClienteResponse])
+@query_budget(2)
 def get_clientes(
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: Optional[int] = None,
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all clients for the authenticated user"""
-    clientes = db.query(Cliente).filter(
-        Cliente.user_id == current_user["user_id"]
-    ).offset(skip).limit(limit).all()
+    """Get all clients for the authenticated user (``q``: ranked search by name, NIF or email)
+    
+    With ``Accept: application/x-ndjson`` every client is streamed as one JSON
+    object per line (no default ``limit``); otherwise pages of ``limit`` (100).
+    """
+    ndjson = wants_ndjson(accept)
+    if ndjson and (q or cursor):
+        # Search results are ranked and paged with cursors
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Search is not available in NDJSON mode")
+    if not ndjson:
+        limit = DEFAULT_PAGE_SIZE if limit is None else limit
+    query = db.query(Cliente).filter(Cliente.user_id == current_user["user_id"])
+    
+    # Collection version: row count + latest modification
+    count, last_updated = query.with_entities(func.count(Cliente.id), func.max(Cliente.updated_at)).one()
+    etag = compute_etag("clientes", count, last_updated, skip, limit, q, cursor, ndjson)
+    if is_not_modified(if_none_match, etag):
+        return not_modified_response(etag)
+    
+    if ndjson:
+        columns = [Cliente.__table__.c[field] for field in ClienteResponse.model_fields]
+        query = query.with_entities(*columns).order_by(Cliente.id).offset(skip).limit(limit)
+        return NDJSONStreamService.response(query.statement, cliente_ndjson, etag)
+    
+    response.headers.update(etag_headers(etag))
+    if q:
+        # Ranked search; the next page is requested with ?cursor=<X-Next-Cursor>
+        try:
+            clientes, next_cursor = SearchService.search(query, Cliente, q, limit, cursor)
+        except InvalidCursor:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return clientes
+    
+    clientes = query.offset(skip).limit(limit).all()
     return clientes
 
+@router.get("/autocomplete", response_model=List[ClienteAutocomplete])
+@query_budget(1)
+async def autocomplete_clientes(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Prefix matches on client name or NIF (in-memory index, for pickers)"""
+    matches = cliente_autocomplete.search(db, current_user["user_id"], q, limit)
+    return json_response(dumps(matches))
+
 @router.get("/{cliente_id}", response_model=ClienteResponse)
+@query_budget(1)
 def get_cliente(
     cliente_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -44,37 +109,59 @@ def get_cliente(
             detail="Cliente not found"
         )
     
+    etag = compute_etag("cliente", cliente.id, cliente.updated_at)
+    if is_not_modified(if_none_match, etag):
+        return not_modified_response(etag)
+    
+    response.headers.update(etag_headers(etag))
     return cliente
 
 @router.post("/", response_model=ClienteResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(6)
 def create_cliente(
     cliente: ClienteCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Create a new client"""
-    # Check plan limits
-    user_plan = BillingService.get_user_plan(current_user)
-    can_create, error_message = BillingService.check_cliente_limit(
-        db, current_user["user_id"], user_plan
-    )
+    """Create a new client (retries with the same ``Idempotency-Key`` get the original response)"""
+    created = []
     
-    if not can_create:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=error_message
+    def create() -> Response:
+        # Check plan limits
+        user_plan = BillingService.get_user_plan(current_user)
+        can_create, error_message = BillingService.check_cliente_limit(
+            db, current_user["user_id"], user_plan
+        )
+        
+        if not can_create:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=error_message
+            )
+        
+        db_cliente = Cliente(
+            **cliente.model_dump(),
+            user_id=current_user["user_id"]
         )
+        db.add(db_cliente)
+        db.flush()
+        db.refresh(db_cliente)
+        # Detached so the commit does not expire it (read again for the autocomplete cache)
+        db.expunge(db_cliente)
+        created.append(db_cliente)
+        body = ClienteResponse.model_validate(db_cliente).model_dump_json().encode()
+        return json_response(body, status_code=status.HTTP_201_CREATED)
     
-    db_cliente = Cliente(
-        **cliente.model_dump(),
-        user_id=current_user["user_id"]
+    response = IdempotencyService.run(
+        db, current_user["user_id"], idempotency_key, "POST /api/clientes/", cliente, create
     )
-    db.add(db_cliente)
-    db.commit()
-    db.refresh(db_cliente)
-    return db_cliente
+    if created:
+        cliente_autocomplete.upsert(current_user["user_id"], created[0])
+    return response
 
 @router.put("/{cliente_id}", response_model=ClienteResponse)
+@query_budget(6)
 def update_cliente(
     cliente_id: int,
     cliente_update: ClienteUpdate,
@@ -97,11 +184,18 @@ def update_cliente(
     for field, value in update_data.items():
         setattr(db_cliente, field, value)
     
+    if "nombre" in update_data:
+        # The client name is part of the invoices' full-text documents
+        db.flush()
+        FacturaSearchService.refresh(db, Factura.cliente_id == cliente_id, Factura.user_id == current_user["user_id"])
+    
     db.commit()
     db.refresh(db_cliente)
+    cliente_autocomplete.upsert(current_user["user_id"], db_cliente)
     return db_cliente
 
 @router.delete("/{cliente_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(3)
 def delete_cliente(
     cliente_id: int,
     current_user: dict = Depends(get_current_user),
@@ -121,4 +215,5 @@ def delete_cliente(
     
     db.delete(db_cliente)
     db.commit()
+    cliente_autocomplete.remove(current_user["user_id"], cliente_id)
     return None
\ No newline at end of file
@@ -5,11 +5,13 @@ from app.models.cliente import Cliente
 from app.models.producto import Producto
 from app.models.factura import Factura
 from app.middleware.auth import get_current_user
+from app.core.query_budget import query_budget
 from typing import Dict, Union
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 @router.get("/stats")
+@query_budget(3)
 async def get_dashboard_stats(
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1,26 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, Header
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, extract
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import func, extract, insert, update
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from datetime import datetime, date
-from decimal import Decimal
 
 from app.db.database import get_db
 from app.middleware.auth import get_current_user
-from app.models import Factura, LineaFactura, Cliente, Producto, PerfilEmpresa
+from app.models import Factura, LineaFactura, Cliente, PerfilEmpresa
 from app.schemas.factura import (
-    FacturaCreate, FacturaUpdate, FacturaResponse, FacturaListResponse
+    FacturaCreate, FacturaUpdate, FacturaResponse, FacturaListResponse,
+    AgingReportResponse, FacturaEstadoBulk, FacturaEstadoBulkResponse
 )
 from app.utils.pdf import InvoiceGenerator
 from app.core.billing import BillingService
+from app.core.serialization import json_response, serialize_factura_rows, serialize_factura, wants_ndjson, factura_list_ndjson
+from app.core.etag import compute_etag, is_not_modified, not_modified_response, etag_headers
+from app.core.query_budget import query_budget
+from app.core.money import invoice_totals, line_amount
+from app.core.metrics import plan_limit_rejections_total
 from app.middleware.billing import require_feature
+from app.services.aging import AgingReportService
+from app.services.search import FacturaSearchService
+from app.services.catalog import product_catalog
+from app.services.facturae import FacturaeExportService, MissingTaxId, filename as facturae_filename
+from app.services.transitions import FacturaTransitionService, TooManyFacturas, MAX_FACTURAS
+from app.services.idempotency import IdempotencyService
+from app.services.streaming import NDJSONStreamService
 
 router = APIRouter(
     prefix="/api/facturas",
     tags=["facturas"]
 )
 
+# Tamaño de página del listado JSON (el modo NDJSON no tiene límite por defecto)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
 def generate_invoice_number(db: Session, user_id: str, year: int) -> str:
     """Genera el siguiente número de factura para un usuario y año específico."""
     # Obtener el último número de factura del usuario para ese año
@@ -43,37 +60,131 @@ def generate_invoice_number(db: Session, user_id: str, year: int) -> str:
     return f"{year}-{next_number:04d}"
 
 def calculate_invoice_totals(lineas: List[LineaFactura]) -> dict:
-    """Calcula los totales de una factura basándose en sus líneas."""
-    subtotal = Decimal('0.00')
-    total_iva = Decimal('0.00')
-    
-    for linea in lineas:
-        linea_subtotal = linea.cantidad * linea.precio_unitario
-        linea_iva = linea_subtotal * (linea.tipo_iva / 100)
-        
-        subtotal += linea_subtotal
-        total_iva += linea_iva
-    
-    total = subtotal + total_iva
+    """Calcula los totales de una factura basándose en sus líneas.
     
-    return {
-        'subtotal': subtotal,
-        'total_iva': total_iva,
-        'total': total
+    En céntimos enteros, con el IVA redondeado una vez por tipo (ver ``app.core.money``).
+    """
+    return invoice_totals(lineas).as_decimals()
+
+def load_factura_for_response(db: Session, factura_id: int) -> Factura:
+    """Recarga una factura con sus líneas en dos consultas fijas (sin lazy loads)."""
+    return db.query(Factura).options(
+        selectinload(Factura.lineas)
+    ).filter(Factura.id == factura_id).populate_existing().one()
+
+def productos_eliminados(db: Session, user_id: str, producto_ids: set) -> bool:
+    """Tras un ``IntegrityError`` al escribir líneas: ¿se borró algún producto?
+    
+    El catálogo en memoria puede no haber visto aún un borrado hecho en otro
+    proceso; la clave ajena lo detecta al insertar. Se deshace la
+    transacción y se vuelve a consultar el catálogo sin caché.
+    """
+    db.rollback()
+    product_catalog.invalidate(user_id)
+    return len(product_catalog.get(db, user_id, producto_ids)) != len(producto_ids)
+
+def insert_lineas(db: Session, factura_id: int, lineas: List[LineaFactura]) -> None:
+    """Inserta las líneas de una factura en una sola sentencia (executemany)."""
+    if not lineas:
+        return
+    db.execute(insert(LineaFactura), [
+        {
+            "factura_id": factura_id,
+            "producto_id": linea.producto_id,
+            "descripcion": linea.descripcion,
+            "cantidad": linea.cantidad,
+            "precio_unitario": linea.precio_unitario,
+            "tipo_iva": linea.tipo_iva,
+            "subtotal": linea.subtotal,
+        }
+        for linea in lineas
+    ])
+
+# Columnas que se comparan para decidir si una línea existente ha cambiado (subtotal se deriva)
+LINEA_CAMPOS = ("producto_id", "descripcion", "cantidad", "precio_unitario", "tipo_iva")
+
+def apply_lineas_diff(db: Session, factura_id: int, lineas_data: list, productos: dict) -> dict:
+    """Aplica solo los cambios de líneas necesarios (borrar, actualizar, insertar).
+    
+    Las líneas con ``id`` se emparejan con las existentes de la factura; las
+    existentes que no llegan se borran y las que llegan sin ``id`` se insertan.
+    Cada tipo de cambio es una sola sentencia. Devuelve los totales y si ha
+    cambiado algo que afecte a la búsqueda (líneas nuevas, borradas o con
+    otra descripción). Lanza 404 si un ``id`` no pertenece a la factura.
+    """
+    existentes = {
+        linea.id: linea
+        for linea in db.query(
+            LineaFactura.id, *(getattr(LineaFactura, campo) for campo in LINEA_CAMPOS)
+        ).filter(LineaFactura.factura_id == factura_id)
     }
+    
+    finales, nuevas, cambios, vistas = [], [], [], set()
+    for linea_data in lineas_data:
+        valores = {
+            "producto_id": linea_data.producto_id,
+            "descripcion": linea_data.descripcion or productos[linea_data.producto_id].nombre,
+            "cantidad": linea_data.cantidad,
+            "precio_unitario": linea_data.precio_unitario,
+            "tipo_iva": linea_data.tipo_iva,
+            "subtotal": line_amount(linea_data.cantidad, linea_data.precio_unitario),
+        }
+        finales.append(LineaFactura(**valores))
+        if linea_data.id is None:
+            nuevas.append(finales[-1])
+            continue
+        actual = existentes.get(linea_data.id)
+        if actual is None or linea_data.id in vistas:
+            raise HTTPException(status_code=404, detail="Línea de factura no encontrada")
+        vistas.add(linea_data.id)
+        if any(getattr(actual, campo) != valores[campo] for campo in LINEA_CAMPOS):
+            cambios.append({"id": linea_data.id, **valores})
+    
+    borradas = existentes.keys() - vistas
+    if borradas:
+        db.query(LineaFactura).filter(
+            LineaFactura.factura_id == factura_id,
+            LineaFactura.id.in_(borradas)
+        ).delete(synchronize_session=False)
+    if cambios:
+        # UPDATE por clave primaria en una sola sentencia (executemany)
+        db.execute(update(LineaFactura), cambios)
+    insert_lineas(db, factura_id, nuevas)
+    
+    reindexar = bool(nuevas or borradas) or any(
+        cambio["descripcion"] != existentes[cambio["id"]].descripcion for cambio in cambios
+    )
+    return {"totales": calculate_invoice_totals(finales), "reindexar": reindexar, "cambios": bool(nuevas or borradas or cambios)}
 
 @router.get("/", response_model=List[FacturaListResponse])
+@query_budget(2)
 async def get_facturas(
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
+    limit: Optional[int] = Query(None, ge=1),
     estado: Optional[str] = None,
     cliente_id: Optional[int] = None,
     fecha_desde: Optional[date] = None,
     fecha_hasta: Optional[date] = None,
+    q: Optional[str] = Query(None, max_length=200),
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Obtiene todas las facturas del usuario actual con filtros opcionales."""
+    """Obtiene todas las facturas del usuario actual con filtros opcionales.
+    
+    Con ``q`` busca en número, cliente, líneas y notas (prefijos de palabra,
+    sin distinguir acentos) y ordena por relevancia.
+    
+    Con ``Accept: application/x-ndjson`` devuelve una factura por línea a
+    medida que se leen, sin límite por defecto (listados completos); si no,
+    páginas JSON de ``limit`` facturas (100 por defecto, 1000 como máximo).
+    """
+    ndjson = wants_ndjson(accept)
+    if not ndjson:
+        if limit is not None and limit > MAX_PAGE_SIZE:
+            raise HTTPException(status_code=422, detail=f"limit no puede ser mayor que {MAX_PAGE_SIZE}")
+        limit = DEFAULT_PAGE_SIZE if limit is None else limit
     query = db.query(
         Factura.id,
         Factura.numero,
@@ -93,18 +204,100 @@ async def get_facturas(
         query = query.filter(Factura.fecha >= fecha_desde)
     if fecha_hasta:
         query = query.filter(Factura.fecha <= fecha_hasta)
+    order_by = [Factura.fecha.desc(), Factura.id.desc()]
+    if q:
+        query, rank = FacturaSearchService.search(query, q)
+        order_by.insert(0, rank.desc())
+    
+    # Versión de la colección: número de filas + última modificación (factura o cliente)
+    count, last_factura, last_cliente = query.with_entities(
+        func.count(Factura.id), func.max(Factura.updated_at), func.max(Cliente.updated_at)
+    ).one()
+    etag = compute_etag(
+        "facturas", count, last_factura, last_cliente,
+        skip, limit, estado, cliente_id, fecha_desde, fecha_hasta, q, ndjson
+    )
+    if is_not_modified(if_none_match, etag):
+        return not_modified_response(etag)
     
-    facturas = query.order_by(Factura.fecha.desc(), Factura.id.desc()).offset(skip).limit(limit).all()
+    query = query.order_by(*order_by).offset(skip).limit(limit)
+    if ndjson:
+        return NDJSONStreamService.response(query.statement, factura_list_ndjson, etag)
+    facturas = query.all()
+    
+    return json_response(serialize_factura_rows(facturas), headers=etag_headers(etag))
+
+@router.get("/aging", response_model=AgingReportResponse)
+@query_budget(1)
+async def get_aging_report(
+    fecha_corte: Optional[date] = None,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Antigüedad de saldos: facturas enviadas pendientes de cobro por cliente y tramo de días."""
+    return AgingReportService.get_aging_report(
+        db, current_user["user_id"], fecha_corte or date.today()
+    )
+
+@router.post("/estado", response_model=FacturaEstadoBulkResponse)
+@query_budget(2)
+async def bulk_update_estado(
+    cambio: FacturaEstadoBulk,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Cambia el estado de varias facturas (por ids o por filtro) en un único UPDATE.
+    
+    Solo se aplican las transiciones permitidas; el resultado indica, por
+    factura, si se actualizó, ya estaba en ese estado, no se permite el
+    cambio o no existe.
+    """
+    filtro = cambio.filtro.dict() if cambio.filtro else {}
+    try:
+        resultados = FacturaTransitionService.transition(
+            db,
+            current_user["user_id"],
+            cambio.estado,
+            ids=cambio.ids,
+            estado_actual=filtro.get("estado"),
+            cliente_id=filtro.get("cliente_id"),
+            fecha_desde=filtro.get("fecha_desde"),
+            fecha_hasta=filtro.get("fecha_hasta"),
+        )
+    except TooManyFacturas:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El filtro selecciona más de {MAX_FACTURAS} facturas"
+        )
     
-    return facturas
+    return {
+        "estado": cambio.estado,
+        "actualizadas": sum(r["resultado"] == "actualizada" for r in resultados),
+        "resultados": resultados,
+    }
 
 @router.get("/{factura_id}", response_model=FacturaResponse)
+@query_budget(2)
 async def get_factura(
     factura_id: int,
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Obtiene una factura específica del usuario actual."""
+    # Comprobación barata de versión antes de cargar líneas y cliente
+    version = db.query(Factura.updated_at).filter(
+        Factura.id == factura_id,
+        Factura.user_id == current_user["user_id"]
+    ).first()
+    
+    if not version:
+        raise HTTPException(status_code=404, detail="Factura no encontrada")
+    
+    etag = compute_etag("factura", factura_id, version.updated_at)
+    if is_not_modified(if_none_match, etag):
+        return not_modified_response(etag)
+    
     factura = db.query(Factura).options(
         joinedload(Factura.lineas),
         joinedload(Factura.cliente)
@@ -116,89 +309,105 @@ async def get_factura(
     if not factura:
         raise HTTPException(status_code=404, detail="Factura no encontrada")
     
-    return factura
+    return json_response(serialize_factura(factura), headers=etag_headers(etag))
 
 @router.post("/", response_model=FacturaResponse)
+@query_budget(12)
 async def create_factura(
     factura_data: FacturaCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Crea una nueva factura para el usuario actual."""
-    # Check plan limits
-    user_plan = BillingService.get_user_plan(current_user)
-    can_create, error_message = BillingService.check_factura_limit(
-        db, current_user["user_id"], user_plan
-    )
-    
-    if not can_create:
-        raise HTTPException(
-            status_code=403,
-            detail=error_message
+    """Crea una nueva factura para el usuario actual.
+    
+    Con ``Idempotency-Key`` los reintentos reciben la respuesta original sin
+    volver a crear la factura (ver ``IdempotencyService``).
+    """
+    def crear() -> Response:
+        # Check plan limits
+        user_plan = BillingService.get_user_plan(current_user)
+        can_create, error_message = BillingService.check_factura_limit(
+            db, current_user["user_id"], user_plan
         )
-    
-    # Verificar que el cliente pertenece al usuario
-    cliente = db.query(Cliente).filter(
-        Cliente.id == factura_data.cliente_id,
-        Cliente.user_id == current_user["user_id"]
-    ).first()
-    
-    if not cliente:
-        raise HTTPException(status_code=404, detail="Cliente no encontrado")
-    
-    # Verificar que todos los productos pertenecen al usuario
-    producto_ids = [linea.producto_id for linea in factura_data.lineas]
-    productos = db.query(Producto).filter(
-        Producto.id.in_(producto_ids),
-        Producto.user_id == current_user["user_id"]
-    ).all()
-    
-    if len(productos) != len(producto_ids):
-        raise HTTPException(status_code=404, detail="Uno o más productos no encontrados")
-    
-    # Generar número de factura
-    year = factura_data.fecha.year
-    numero = generate_invoice_number(db, current_user["user_id"], year)
-    
-    # Crear la factura
-    db_factura = Factura(
-        numero=numero,
-        fecha=factura_data.fecha,
-        cliente_id=factura_data.cliente_id,
-        estado=factura_data.estado,
-        notas=factura_data.notas,
-        user_id=current_user["user_id"]
-    )
-    
-    # Crear las líneas de factura
-    for linea_data in factura_data.lineas:
-        producto = next(p for p in productos if p.id == linea_data.producto_id)
         
-        db_linea = LineaFactura(
-            producto_id=linea_data.producto_id,
-            descripcion=linea_data.descripcion or producto.nombre,
-            cantidad=linea_data.cantidad,
-            precio_unitario=linea_data.precio_unitario,
-            tipo_iva=linea_data.tipo_iva,
-            subtotal=linea_data.cantidad * linea_data.precio_unitario
+        if not can_create:
+            raise HTTPException(
+                status_code=403,
+                detail=error_message
+            )
+        
+        # Verificar que el cliente pertenece al usuario
+        cliente = db.query(Cliente).filter(
+            Cliente.id == factura_data.cliente_id,
+            Cliente.user_id == current_user["user_id"]
+        ).first()
+        
+        if not cliente:
+            raise HTTPException(status_code=404, detail="Cliente no encontrado")
+        
+        # Verificar que todos los productos pertenecen al usuario (catálogo en memoria)
+        producto_ids = {linea.producto_id for linea in factura_data.lineas}
+        productos = product_catalog.get(db, current_user["user_id"], producto_ids)
+        
+        if len(productos) != len(producto_ids):
+            raise HTTPException(status_code=404, detail="Uno o más productos no encontrados")
+        
+        # Generar número de factura
+        year = factura_data.fecha.year
+        numero = generate_invoice_number(db, current_user["user_id"], year)
+        
+        # Crear la factura
+        db_factura = Factura(
+            numero=numero,
+            fecha=factura_data.fecha,
+            cliente_id=factura_data.cliente_id,
+            estado=factura_data.estado,
+            notas=factura_data.notas,
+            user_id=current_user["user_id"]
         )
-        db_factura.lineas.append(db_linea)
-    
-    # Calcular totales
-    totales = calculate_invoice_totals(db_factura.lineas)
-    db_factura.subtotal = totales['subtotal']
-    db_factura.total_iva = totales['total_iva']
-    db_factura.total = totales['total']
-    
-    db.add(db_factura)
-    db.commit()
-    db.refresh(db_factura)
-    
-    # Cargar relaciones para la respuesta
-    db.refresh(db_factura)
-    return db_factura
+        
+        # Crear las líneas de factura
+        lineas = []
+        for linea_data in factura_data.lineas:
+            producto = productos[linea_data.producto_id]
+        
+            lineas.append(LineaFactura(
+                producto_id=linea_data.producto_id,
+                descripcion=linea_data.descripcion or producto.nombre,
+                cantidad=linea_data.cantidad,
+                precio_unitario=linea_data.precio_unitario,
+                tipo_iva=linea_data.tipo_iva,
+                subtotal=line_amount(linea_data.cantidad, linea_data.precio_unitario)
+            ))
+        
+        # Calcular totales
+        totales = calculate_invoice_totals(lineas)
+        db_factura.subtotal = totales['subtotal']
+        db_factura.total_iva = totales['total_iva']
+        db_factura.total = totales['total']
+        db_factura.search_vector = FacturaSearchService.build(
+            db, numero, cliente.nombre, db_factura.notas, [linea.descripcion for linea in lineas]
+        )
+        
+        db.add(db_factura)
+        try:
+            db.flush()
+            insert_lineas(db, db_factura.id, lineas)
+        except IntegrityError:
+            if productos_eliminados(db, current_user["user_id"], producto_ids):
+                raise HTTPException(status_code=404, detail="Uno o más productos no encontrados")
+            raise
+        
+        # Cargar relaciones para la respuesta (se confirma junto con la clave)
+        return json_response(serialize_factura(load_factura_for_response(db, db_factura.id)))
+        
+    return await IdempotencyService.run_async(
+        db, current_user["user_id"], idempotency_key, "POST /api/facturas/", factura_data, crear
+    )
 
 @router.put("/{factura_id}", response_model=FacturaResponse)
+@query_budget(13)
 async def update_factura(
     factura_id: int,
     factura_update: FacturaUpdate,
@@ -216,6 +425,7 @@ async def update_factura(
     
     # Actualizar campos básicos
     update_data = factura_update.dict(exclude_unset=True)
+    reindexar = bool({'cliente_id', 'notas'} & update_data.keys())
     
     # Si se cambia el cliente, verificar que pertenece al usuario
     if 'cliente_id' in update_data:
@@ -226,43 +436,28 @@ async def update_factura(
         if not cliente:
             raise HTTPException(status_code=404, detail="Cliente no encontrado")
     
-    # Si se actualizan las líneas, reemplazarlas completamente
+    # Si se actualizan las líneas, aplicar solo las diferencias
     if 'lineas' in update_data:
-        # Verificar que todos los productos pertenecen al usuario
-        producto_ids = [linea.producto_id for linea in factura_update.lineas]
-        productos = db.query(Producto).filter(
-            Producto.id.in_(producto_ids),
-            Producto.user_id == current_user["user_id"]
-        ).all()
+        # Verificar que todos los productos pertenecen al usuario (catálogo en memoria)
+        producto_ids = {linea.producto_id for linea in factura_update.lineas}
+        productos = product_catalog.get(db, current_user["user_id"], producto_ids)
         
         if len(productos) != len(producto_ids):
             raise HTTPException(status_code=404, detail="Uno o más productos no encontrados")
         
-        # Eliminar líneas existentes
-        db.query(LineaFactura).filter(LineaFactura.factura_id == factura_id).delete()
-        
-        # Crear nuevas líneas
-        nuevas_lineas = []
-        for linea_data in factura_update.lineas:
-            producto = next(p for p in productos if p.id == linea_data.producto_id)
-            
-            db_linea = LineaFactura(
-                factura_id=factura_id,
-                producto_id=linea_data.producto_id,
-                descripcion=linea_data.descripcion or producto.nombre,
-                cantidad=linea_data.cantidad,
-                precio_unitario=linea_data.precio_unitario,
-                tipo_iva=linea_data.tipo_iva,
-                subtotal=linea_data.cantidad * linea_data.precio_unitario
-            )
-            nuevas_lineas.append(db_linea)
-            db.add(db_linea)
+        try:
+            diff = apply_lineas_diff(db, factura_id, factura_update.lineas, productos)
+        except IntegrityError:
+            if productos_eliminados(db, current_user["user_id"], producto_ids):
+                raise HTTPException(status_code=404, detail="Uno o más productos no encontrados")
+            raise
+        reindexar = reindexar or diff["reindexar"]
         
-        # Recalcular totales
-        totales = calculate_invoice_totals(nuevas_lineas)
-        factura.subtotal = totales['subtotal']
-        factura.total_iva = totales['total_iva']
-        factura.total = totales['total']
+        if diff["cambios"]:
+            totales = diff["totales"]
+            factura.subtotal = totales['subtotal']
+            factura.total_iva = totales['total_iva']
+            factura.total = totales['total']
         
         # Eliminar 'lineas' del update_data para no intentar actualizarlo directamente
         del update_data['lineas']
@@ -273,12 +468,17 @@ async def update_factura(
     
     factura.updated_at = datetime.utcnow()
     
+    # Reindexar para la búsqueda si cambia algo de lo indexado
+    if reindexar:
+        db.flush()
+        FacturaSearchService.refresh(db, Factura.id == factura_id)
+    
     db.commit()
-    db.refresh(factura)
     
-    return factura
+    return load_factura_for_response(db, factura_id)
 
 @router.delete("/{factura_id}")
+@query_budget(4)
 async def delete_factura(
     factura_id: int,
     current_user: dict = Depends(get_current_user),
@@ -320,10 +520,11 @@ async def get_facturas_test(
     
     facturas = query.order_by(Factura.fecha.desc(), Factura.id.desc()).offset(skip).limit(limit).all()
     
-    return facturas
+    return json_response(serialize_factura_rows(facturas))
 
 # PDF Generation endpoints
 @router.get("/{factura_id}/pdf")
+@query_budget(2)
 async def generate_invoice_pdf(
     factura_id: int,
     template: str = Query("modern", description="Template name"),
@@ -334,6 +535,7 @@ async def generate_invoice_pdf(
     # Check if user's plan has PDF export feature
     user_plan = BillingService.get_user_plan(current_user)
     if not BillingService.has_feature(user_plan, "pdf_export"):
+        plan_limit_rejections_total.inc(limit="feature:pdf_export", plan=user_plan)
         raise HTTPException(
             status_code=403,
             detail=f"La exportación a PDF no está disponible en tu plan {user_plan}. Actualiza a plan Starter o Pro para acceder a esta función."
@@ -373,7 +575,79 @@ async def generate_invoice_pdf(
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error al generar el PDF")
 
+def get_perfil_facturae(db: Session, current_user: dict) -> PerfilEmpresa:
+    """Comprueba el plan y devuelve el perfil de empresa (emisor de la factura electrónica)."""
+    user_plan = BillingService.get_user_plan(current_user)
+    if not BillingService.has_feature(user_plan, "facturae_export"):
+        plan_limit_rejections_total.inc(limit="feature:facturae_export", plan=user_plan)
+        raise HTTPException(
+            status_code=403,
+            detail=f"La exportación Facturae no está disponible en tu plan {user_plan}. Actualiza a plan Starter o Pro para acceder a esta función."
+        )
+    perfil_empresa = db.query(PerfilEmpresa).filter(
+        PerfilEmpresa.user_id == current_user["user_id"]
+    ).first()
+    if not perfil_empresa or not perfil_empresa.nif:
+        raise HTTPException(
+            status_code=400,
+            detail="Completa el perfil de empresa (nombre y NIF) para exportar facturas electrónicas"
+        )
+    return perfil_empresa
+
+@router.get("/export/facturae")
+@query_budget(3)
+async def export_facturae(
+    ids: Optional[List[int]] = Query(None, max_length=10000),
+    estado: Optional[str] = None,
+    cliente_id: Optional[int] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Descarga un ZIP con una factura electrónica Facturae (XML) por factura seleccionada.
+    
+    El ZIP se genera y se envía a medida que se leen las facturas, sin
+    cargarlas todas en memoria.
+    """
+    perfil_empresa = get_perfil_facturae(db, current_user)
+    stream = FacturaeExportService.stream_batch(
+        current_user["user_id"], perfil_empresa,
+        ids=ids, estado=estado, cliente_id=cliente_id, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta
+    )
+    return StreamingResponse(
+        stream,
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=facturae_{date.today().isoformat()}.zip"}
+    )
+
+@router.get("/{factura_id}/facturae")
+@query_budget(3)
+async def export_factura_facturae(
+    factura_id: int,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Descarga una factura como factura electrónica Facturae 3.2.2 (XML sin firmar)."""
+    perfil_empresa = get_perfil_facturae(db, current_user)
+    facturas = list(FacturaeExportService.iter_facturas(db, current_user["user_id"], ids=[factura_id]))
+    if not facturas:
+        raise HTTPException(status_code=404, detail="Factura no encontrada")
+    factura = facturas[0]
+    
+    try:
+        data = FacturaeExportService.invoice_data(factura, perfil_empresa)
+    except MissingTaxId as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        FacturaeExportService.stream_xml(data),
+        media_type="application/xml",
+        headers={"Content-Disposition": f"attachment; filename={facturae_filename(factura.numero)}"}
+    )
+
 @router.get("/{factura_id}/pdf/preview")
+@query_budget(2)
 async def preview_invoice_pdf(
     factura_id: int,
     template: str = Query("modern", description="Template name"),
@@ -384,6 +658,7 @@ async def preview_invoice_pdf(
     # Check if user's plan has PDF export feature
     user_plan = BillingService.get_user_plan(current_user)
     if not BillingService.has_feature(user_plan, "pdf_export"):
+        plan_limit_rejections_total.inc(limit="feature:pdf_export", plan=user_plan)
         raise HTTPException(
             status_code=403,
             detail=f"La exportación a PDF no está disponible en tu plan {user_plan}. Actualiza a plan Starter o Pro para acceder a esta función."
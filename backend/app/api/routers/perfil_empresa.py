@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
 from sqlalchemy.orm import Session
 from typing import Optional
 
 from app.db.database import get_db
 from app.middleware.auth import get_current_user
 from app.models import PerfilEmpresa
+from app.core.etag import compute_etag, is_not_modified, not_modified_response, etag_headers
+from app.core.query_budget import query_budget
 from app.schemas.perfil_empresa import (
     PerfilEmpresaCreate, PerfilEmpresaUpdate, PerfilEmpresaResponse
 )
@@ -16,7 +18,10 @@ router = APIRouter(
 
 
 @router.get("", response_model=Optional[PerfilEmpresaResponse])
+@query_budget(1)
 async def get_perfil_empresa(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -25,10 +30,16 @@ async def get_perfil_empresa(
         PerfilEmpresa.user_id == current_user["user_id"]
     ).first()
     
+    etag = compute_etag("perfil_empresa", perfil.id, perfil.updated_at) if perfil else compute_etag("perfil_empresa")
+    if is_not_modified(if_none_match, etag):
+        return not_modified_response(etag)
+    
+    response.headers.update(etag_headers(etag))
     return perfil
 
 
 @router.post("", response_model=PerfilEmpresaResponse)
+@query_budget(3)
 async def create_perfil_empresa(
     perfil_data: PerfilEmpresaCreate,
     current_user: dict = Depends(get_current_user),
@@ -60,6 +71,7 @@ async def create_perfil_empresa(
 
 
 @router.put("", response_model=PerfilEmpresaResponse)
+@query_budget(3)
 async def update_perfil_empresa(
     perfil_update: PerfilEmpresaUpdate,
     current_user: dict = Depends(get_current_user),
@@ -88,6 +100,7 @@ async def update_perfil_empresa(
 
 
 @router.delete("")
+@query_budget(2)
 async def delete_perfil_empresa(
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
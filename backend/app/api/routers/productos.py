@@ -1,37 +1,101 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response, Query
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import func
+from typing import List, Optional
 
 from app.db.database import get_db
 from app.models.producto import Producto
-from app.schemas.producto import ProductoCreate, ProductoUpdate, ProductoResponse
+from app.schemas.producto import ProductoCreate, ProductoUpdate, ProductoResponse, ProductoAutocomplete
 from app.middleware.auth import get_current_user
+from app.core.etag import compute_etag, is_not_modified, not_modified_response, etag_headers
+from app.core.query_budget import query_budget
+from app.services.search import SearchService, InvalidCursor
+from app.services.autocomplete import producto_autocomplete
+from app.services.catalog import product_catalog
+from app.core.serialization import json_response, dumps, wants_ndjson, producto_ndjson
+from app.services.streaming import NDJSONStreamService
 
 router = APIRouter(
     prefix="/api/productos",
     tags=["productos"]
 )
 
+# Page size of the JSON list (NDJSON mode streams everything by default)
+DEFAULT_PAGE_SIZE = 100
+
 @router.get("/", response_model=List[ProductoResponse])
+@query_budget(2)
 def get_productos(
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: Optional[int] = None,
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,
     solo_activos: bool = True,
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all products for the authenticated user"""
+    """Get all products for the authenticated user (``q``: ranked search by name, code or description)
+    
+    With ``Accept: application/x-ndjson`` every product is streamed as one JSON
+    object per line (no default ``limit``); otherwise pages of ``limit`` (100).
+    """
+    ndjson = wants_ndjson(accept)
+    if ndjson and (q or cursor):
+        # Search results are ranked and paged with cursors
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Search is not available in NDJSON mode")
+    if not ndjson:
+        limit = DEFAULT_PAGE_SIZE if limit is None else limit
     query = db.query(Producto).filter(Producto.user_id == current_user["user_id"])
     
     if solo_activos:
         query = query.filter(Producto.activo == True)
     
+    # Collection version: row count + latest modification
+    count, last_updated = query.with_entities(func.count(Producto.id), func.max(Producto.updated_at)).one()
+    etag = compute_etag("productos", count, last_updated, skip, limit, solo_activos, q, cursor, ndjson)
+    if is_not_modified(if_none_match, etag):
+        return not_modified_response(etag)
+    
+    if ndjson:
+        columns = [Producto.__table__.c[field] for field in ProductoResponse.model_fields]
+        query = query.with_entities(*columns).order_by(Producto.id).offset(skip).limit(limit)
+        return NDJSONStreamService.response(query.statement, producto_ndjson, etag)
+    
+    response.headers.update(etag_headers(etag))
+    if q:
+        # Ranked search; the next page is requested with ?cursor=<X-Next-Cursor>
+        try:
+            productos, next_cursor = SearchService.search(query, Producto, q, limit, cursor)
+        except InvalidCursor:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return productos
+    
     productos = query.offset(skip).limit(limit).all()
     return productos
 
+@router.get("/autocomplete", response_model=List[ProductoAutocomplete])
+@query_budget(1)
+async def autocomplete_productos(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Prefix matches on active product name or code (in-memory index, for the invoice line editor)"""
+    matches = producto_autocomplete.search(db, current_user["user_id"], q, limit)
+    return json_response(dumps(matches))
+
 @router.get("/{producto_id}", response_model=ProductoResponse)
+@query_budget(1)
 def get_producto(
     producto_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -47,9 +111,15 @@ def get_producto(
             detail="Producto not found"
         )
     
+    etag = compute_etag("producto", producto.id, producto.updated_at)
+    if is_not_modified(if_none_match, etag):
+        return not_modified_response(etag)
+    
+    response.headers.update(etag_headers(etag))
     return producto
 
 @router.post("/", response_model=ProductoResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(3)
 def create_producto(
     producto: ProductoCreate,
     current_user: dict = Depends(get_current_user),
@@ -61,11 +131,15 @@ def create_producto(
         user_id=current_user["user_id"]
     )
     db.add(db_producto)
+    product_catalog.bump(db, current_user["user_id"])
     db.commit()
     db.refresh(db_producto)
+    producto_autocomplete.upsert(current_user["user_id"], db_producto)
+    product_catalog.invalidate(current_user["user_id"])
     return db_producto
 
 @router.put("/{producto_id}", response_model=ProductoResponse)
+@query_budget(4)
 def update_producto(
     producto_id: int,
     producto_update: ProductoUpdate,
@@ -88,11 +162,15 @@ def update_producto(
     for field, value in update_data.items():
         setattr(db_producto, field, value)
     
+    product_catalog.bump(db, current_user["user_id"])
     db.commit()
     db.refresh(db_producto)
+    producto_autocomplete.upsert(current_user["user_id"], db_producto)
+    product_catalog.invalidate(current_user["user_id"])
     return db_producto
 
 @router.delete("/{producto_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(3)
 def delete_producto(
     producto_id: int,
     current_user: dict = Depends(get_current_user),
@@ -111,5 +189,8 @@ def delete_producto(
         )
     
     db.delete(db_producto)
+    product_catalog.bump(db, current_user["user_id"])
     db.commit()
+    producto_autocomplete.remove(current_user["user_id"], producto_id)
+    product_catalog.invalidate(current_user["user_id"])
     return None
\ No newline at end of file
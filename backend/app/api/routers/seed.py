@@ -1,7 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from fastapi.responses import JSONResponse
+from datetime import date
+from typing import Optional
+import asyncio
 from app.db.seed import seed_database, cleanup_seed_data, get_seed_stats
+from app.db.synthetic import generate_synthetic_data, cleanup_synthetic_data
 from app.middleware.auth import get_current_user
+from app.api.routers.admin import require_admin_token
 import logging
 
 logger = logging.getLogger(__name__)
@@ -66,4 +71,37 @@ async def reset_seed_data():
         }, status_code=200)
     except Exception as e:
         logger.error(f"Error resetting seed data: {e}")
-        raise HTTPException(status_code=500, detail="Error resetting seed data")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Error resetting seed data")
+
+@router.post("/synthetic", dependencies=[Depends(require_admin_token)])
+async def create_synthetic_data(
+    tenants: int = Query(10, ge=1, le=10000),
+    invoices: int = Query(10000, ge=1, le=1000000),
+    seed: int = 0,
+    days: int = Query(730, ge=1, le=3650),
+    end_date: Optional[date] = None
+):
+    """
+    Generate synthetic tenants for load testing (reproducible from ``seed``).
+    For larger datasets use scripts/generate_data.py.
+    Requires the ``X-Admin-Token`` header; disabled unless ADMIN_TOKEN is set.
+    """
+    try:
+        result = await asyncio.to_thread(generate_synthetic_data, tenants, invoices, seed, days, end_date)
+        return JSONResponse(content=result, status_code=201)
+    except Exception as e:
+        logger.error(f"Error generating synthetic data: {e}")
+        raise HTTPException(status_code=500, detail="Error generating synthetic data")
+
+@router.delete("/synthetic", dependencies=[Depends(require_admin_token)])
+async def delete_synthetic_data():
+    """
+    Delete every synthetic tenant.
+    Requires the ``X-Admin-Token`` header; disabled unless ADMIN_TOKEN is set.
+    """
+    try:
+        result = await asyncio.to_thread(cleanup_synthetic_data)
+        return JSONResponse(content=result, status_code=200)
+    except Exception as e:
+        logger.error(f"Error deleting synthetic data: {e}")
+        raise HTTPException(status_code=500, detail="Error deleting synthetic data")
\ No newline at end of file
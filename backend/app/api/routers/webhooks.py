@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import get_db
+from app.services.webhooks import WebhookInbox, webhook_worker
+
+router = APIRouter(prefix="/api/webhooks", tags=["webhooks"], include_in_schema=False)
+
+_clerk_webhook = None
+
+
+def _verifier():
+    """Svix verifier for Clerk webhooks (svix is imported on first use)"""
+    global _clerk_webhook
+    if _clerk_webhook is None:
+        from svix.webhooks import Webhook
+
+        _clerk_webhook = Webhook(settings.CLERK_WEBHOOK_SIGNING_SECRET)
+    return _clerk_webhook
+
+
+@router.post("/clerk")
+async def clerk_webhook(request: Request, db: Session = Depends(get_db)):
+    """Verify a Clerk webhook, store it in the inbox and acknowledge it.
+
+    Processing happens later in the webhook worker, so a slow handler (a
+    tenant purge) never delays the response; Svix retries of an already
+    stored delivery are acknowledged without storing it twice.
+    """
+    if not settings.CLERK_WEBHOOK_SIGNING_SECRET:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    from svix.webhooks import WebhookVerificationError
+
+    body = await request.body()
+    try:
+        event = _verifier().verify(body, dict(request.headers))
+    except WebhookVerificationError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid webhook signature")
+
+    stored = WebhookInbox.receive(db, "clerk", request.headers["svix-id"], event)
+    if stored:
+        webhook_worker.notify()
+    return {"received": True, "duplicate": not stored}
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.models.cliente import Cliente
 from app.models.factura import Factura
+from app.core.metrics import plan_limit_rejections_total
 
 # Plan configuration
 PLAN_LIMITS = {
@@ -12,6 +13,7 @@ PLAN_LIMITS = {
         "facturas_por_mes": 10,
         "features": {
             "pdf_export": False,
+            "facturae_export": False,
             "analytics": False,
             "custom_templates": False
         }
@@ -21,6 +23,7 @@ PLAN_LIMITS = {
         "facturas_por_mes": 100,
         "features": {
             "pdf_export": True,
+            "facturae_export": True,
             "analytics": False,
             "custom_templates": False
         }
@@ -30,6 +33,7 @@ PLAN_LIMITS = {
         "facturas_por_mes": -1,  # Unlimited
         "features": {
             "pdf_export": True,
+            "facturae_export": True,
             "analytics": True,
             "custom_templates": True
         }
@@ -68,6 +72,7 @@ class BillingService:
         current_count = db.query(Cliente).filter(Cliente.user_id == user_id).count()
         
         if current_count >= max_clientes:
+            plan_limit_rejections_total.inc(limit="clientes", plan=user_plan)
             return False, f"Has alcanzado el límite de {max_clientes} clientes en tu plan {user_plan}. Actualiza tu plan para añadir más clientes."
         
         return True, None
@@ -92,6 +97,7 @@ class BillingService:
         ).count()
         
         if current_count >= max_facturas:
+            plan_limit_rejections_total.inc(limit="facturas_por_mes", plan=user_plan)
             return False, f"Has alcanzado el límite de {max_facturas} facturas este mes en tu plan {user_plan}. Actualiza tu plan para crear más facturas."
         
         return True, None
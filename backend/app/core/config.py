@@ -6,6 +6,82 @@ class Settings(BaseSettings):
     CLERK_SECRET_KEY: Optional[str] = None
     CLERK_WEBHOOK_SIGNING_SECRET: Optional[str] = None
     
+    # Response compression
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes
+    COMPRESSION_LEVEL: int = 6
+    
+    # Event-loop lag monitor
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL: float = 0.1  # seconds between lag samples
+    LOOP_MONITOR_STALL_THRESHOLD: float = 0.25  # seconds before a stall is logged
+    
+    # Metrics endpoint (Prometheus text format)
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROC_DIR: Optional[str] = "/tmp/factursaas-metrics"  # shared by gunicorn workers so /metrics covers all of them; emptied at startup
+    METRICS_FLUSH_INTERVAL: float = 1.0  # seconds between writes of a worker's metrics to METRICS_MULTIPROC_DIR
+    
+    # SQL query instrumentation
+    QUERY_DEBUG_HEADERS: bool = True  # X-Query-Count / X-DB-Time-Ms
+    QUERY_BUDGET_MODE: str = "warn"  # off | warn | raise (use "raise" in tests)
+    QUERY_REPEAT_THRESHOLD: int = 5  # same statement shape this many times -> N+1 suspect
+    
+    # Sampling profiler for slow requests (opt-in)
+    PROFILER_ENABLED: bool = False
+    PROFILER_SAMPLE_RATE: float = 0.01  # fraction of requests profiled from the start
+    PROFILER_SLOW_THRESHOLD: float = 1.0  # seconds; slower requests are profiled from this point on
+    PROFILER_INTERVAL: float = 0.005  # seconds between stack samples
+    PROFILER_DIR: str = "/tmp/factursaas-profiles"
+    PROFILER_MAX_FILES: int = 200
+    
+    # In-memory autocomplete indexes (per process)
+    AUTOCOMPLETE_TTL: float = 30  # seconds before a tenant's index is reloaded (picks up other workers' writes)
+    AUTOCOMPLETE_MAX_TENANTS: int = 1000
+    
+    # In-memory product catalogs used to validate invoice lines (per process)
+    PRODUCT_CATALOG_TTL: float = 60  # seconds before a tenant's catalog is reloaded
+    PRODUCT_CATALOG_MAX_TENANTS: int = 1000
+    
+    # Startup: load heavy subsystems (PDF templates, Clerk SDK, DB pool) ahead of the first request
+    STARTUP_WARMUP: str = "background"  # off | background | blocking (wait before serving)
+    
+    # Database connection pool (per process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # seconds
+    
+    # Requests handled at once per process; 0 = DB pool capacity (pool size + overflow)
+    MAX_CONCURRENT_REQUESTS: int = 0
+    
+    # Production server (gunicorn.conf.py)
+    BIND: str = "0.0.0.0:8000"
+    WEB_CONCURRENCY: int = 0  # worker processes; 0 = 2 x CPUs + 1
+    WORKER_MAX_REQUESTS: int = 5000  # recycle a worker after this many requests (bounds memory growth)
+    WORKER_MAX_REQUESTS_JITTER: int = 500
+    WORKER_GRACEFUL_TIMEOUT: int = 30  # seconds to drain in-flight requests on shutdown or recycle
+    WORKER_TIMEOUT: int = 60  # seconds without a heartbeat before a worker is killed
+    
+    # Webhook inbox (POST /api/webhooks/clerk): events are stored, then processed in the background
+    WEBHOOK_WORKER_ENABLED: bool = False  # drain the inbox inside each API process (development); production runs scripts/webhook_worker.py
+    WEBHOOK_POLL_INTERVAL: float = 5  # seconds between inbox polls when idle
+    WEBHOOK_BATCH_SIZE: int = 20  # events processed per batch (claimed one at a time)
+    WEBHOOK_MAX_ATTEMPTS: int = 8  # failed events are retried with backoff up to this many times
+    WEBHOOK_LEASE_SECONDS: int = 600  # a claimed event is retried elsewhere if not finished by then
+    TENANT_PURGE_CHUNK_SIZE: int = 500  # rows deleted per transaction when purging a tenant
+    TENANT_PURGE_MODE: str = "delete"  # delete | archive (gzip NDJSON per chunk under TENANT_PURGE_ARCHIVE_DIR)
+    TENANT_PURGE_ARCHIVE_DIR: Optional[str] = None
+    TENANT_PURGE_PAUSE: float = 0.05  # minimum seconds between chunks
+    TENANT_PURGE_DUTY_CYCLE: float = 0.5  # fraction of the time a purge may spend deleting
+    TENANT_PURGE_MAX_REPLICATION_LAG: float = 5  # seconds; purges wait while a replica is further behind (PostgreSQL)
+    TENANT_PURGE_LOCK_TIMEOUT_MS: int = 2000  # a chunk waiting longer for a lock is retried later (PostgreSQL)
+    TENANT_PURGE_LEASE_SECONDS: int = 300  # a running purge renews its claim every chunk; another run may take it after this
+    IDEMPOTENCY_KEY_TTL: int = 86400  # seconds an Idempotency-Key and its stored response are kept
+    IDEMPOTENCY_WAIT_SECONDS: float = 10  # a retry waits this long for the original request before a 409
+    IDEMPOTENCY_LEASE_SECONDS: int = 60  # an unfinished claim is taken over by a retry after this
+    
+    # Admin endpoints (/admin/*); disabled when unset
+    ADMIN_TOKEN: Optional[str] = None
+    
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,45 @@
+from typing import Any, Optional
+from datetime import datetime
+import hashlib
+from fastapi import Response
+
+# Clients must revalidate, but may keep a private copy and send If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+
+def _part(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def compute_etag(*parts: Any) -> str:
+    """Weak ETag from a version key, e.g. ``("factura", id, updated_at)``"""
+    digest = hashlib.blake2b("|".join(_part(p) for p in parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def is_not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against the current ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == current:
+            return True
+    return False
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
@@ -0,0 +1,159 @@
+from typing import Dict, List, Optional
+from collections import deque
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """Measures event-loop lag and reports what blocked the loop.
+
+    A coroutine wakes up every ``interval`` seconds and records how late it
+    was (the lag). A watchdog thread checks the coroutine's heartbeat; when
+    the loop has not ticked for ``stall_threshold`` seconds it logs the
+    stack of the loop thread and the route that was running on it.
+    """
+
+    def __init__(self, interval: float = 0.1, stall_threshold: float = 0.25, window: int = 3000):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.samples: deque = deque(maxlen=window)
+        self.stalls = 0
+        self.max_lag = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._routes: Dict[asyncio.Task, str] = {}
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = self._loop.create_task(self._tick())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # -- request tracking ----------------------------------------------------
+
+    def enter_request(self, route: str) -> Optional[asyncio.Task]:
+        task = asyncio.current_task()
+        if task is not None:
+            self._routes[task] = route
+        return task
+
+    def exit_request(self, task: Optional[asyncio.Task]) -> None:
+        if task is not None:
+            self._routes.pop(task, None)
+
+    # -- internals -----------------------------------------------------------
+
+    async def _tick(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self.samples.append(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+            self._heartbeat = now
+
+    def _watch(self) -> None:
+        reported_heartbeat = None
+        while not self._stopped.wait(self.stall_threshold / 2):
+            heartbeat = self._heartbeat
+            stalled_for = time.monotonic() - heartbeat
+            if stalled_for < self.stall_threshold or heartbeat == reported_heartbeat:
+                continue
+            # Report each stall once, while it is still happening
+            reported_heartbeat = heartbeat
+            self.stalls += 1
+            self._report_stall(stalled_for)
+
+    def _current_route(self) -> str:
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        if task is not None and task in self._routes:
+            return self._routes[task]
+        in_flight = sorted(set(self._routes.values()))
+        return f"unknown (in flight: {', '.join(in_flight) or 'none'})"
+
+    def _report_stall(self, stalled_for: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "<no frame>"
+        logger.warning(
+            "Event loop blocked for at least %.0f ms (threshold %.0f ms) while running %s\n%s",
+            stalled_for * 1000, self.stall_threshold * 1000, self._current_route(), stack,
+        )
+
+    # -- metrics ---------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, float]:
+        """Lag percentiles (milliseconds) over the sliding window"""
+        samples: List[float] = sorted(self.samples)
+
+        def percentile(p: float) -> float:
+            if not samples:
+                return 0.0
+            index = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+            return samples[index] * 1000
+
+        return {
+            "samples": len(samples),
+            "p50_ms": percentile(50),
+            "p95_ms": percentile(95),
+            "p99_ms": percentile(99),
+            "max_ms": self.max_lag * 1000,
+            "stalls": self.stalls,
+        }
+
+
+class LoopMonitorMiddleware:
+    """Records which route each request task is running, for stall reports"""
+
+    def __init__(self, app: ASGIApp, monitor: LoopMonitor) -> None:
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        task = self.monitor.enter_request(f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.exit_request(task)
+
+
+loop_monitor = LoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL,
+    stall_threshold=settings.LOOP_MONITOR_STALL_THRESHOLD,
+)
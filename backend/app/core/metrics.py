@@ -0,0 +1,506 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from contextvars import ContextVar
+import bisect
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Prometheus text exposition format, version 0.0.4
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ""
+    # Survives the process in multiprocess mode (see MultiProcessMetrics.mark_process_dead)
+    cumulative = True
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        REGISTRY.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Any]:
+        """Copy of the current values of this process"""
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, values: Dict[Tuple[str, ...], Any], other: Dict[Tuple[str, ...], Any], pid: str) -> None:
+        """Add another process's snapshot into ``values``"""
+        for key, value in other.items():
+            values[key] = values.get(key, 0) + value
+
+    def samples(self, values: Optional[Dict[Tuple[str, ...], Any]] = None) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self, values: Optional[Dict[Tuple[str, ...], Any]] = None) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+            *self.samples(values),
+        ]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def total(self) -> float:
+        """Sum over all label values"""
+        with self._lock:
+            return sum(self._values.values())
+
+    def samples(self, values: Optional[Dict[Tuple[str, ...], Any]] = None) -> Iterable[str]:
+        items = sorted((self.snapshot() if values is None else values).items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """Gauge; ``multiprocess_mode`` says how workers' values are combined.
+
+    ``sum`` adds them up, ``max`` keeps the largest and ``all`` reports each
+    worker separately with a ``pid`` label. Only live workers are included.
+    """
+
+    type_name = "gauge"
+    cumulative = False
+
+    def __init__(
+        self,
+        *args,
+        callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None,
+        multiprocess_mode: str = "sum",
+        **kwargs,
+    ):
+        self._callback = callback
+        self.multiprocess_mode = multiprocess_mode
+        super().__init__(*args, **kwargs)
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def total(self) -> float:
+        """Sum over all label values"""
+        with self._lock:
+            return sum(self._values.values())
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Any]:
+        if self._callback is not None:
+            return self._callback()
+        return super().snapshot()
+
+    def merge(self, values: Dict[Tuple[str, ...], Any], other: Dict[Tuple[str, ...], Any], pid: str) -> None:
+        for key, value in other.items():
+            if self.multiprocess_mode == "all":
+                values[key + (pid,)] = value
+            elif self.multiprocess_mode == "max":
+                values[key] = max(values.get(key, value), value)
+            else:
+                values[key] = values.get(key, 0) + value
+
+    def samples(self, values: Optional[Dict[Tuple[str, ...], Any]] = None) -> Iterable[str]:
+        labelnames = self.labelnames
+        if values is None:
+            values = self.snapshot()
+        elif self.multiprocess_mode == "all":
+            labelnames += ("pid",)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(*args, **kwargs)
+        # key -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Any]:
+        with self._lock:
+            return {key: list(state) for key, state in self._values.items()}
+
+    def merge(self, values: Dict[Tuple[str, ...], Any], other: Dict[Tuple[str, ...], Any], pid: str) -> None:
+        for key, state in other.items():
+            current = values.get(key)
+            values[key] = list(state) if current is None else [a + b for a, b in zip(current, state)]
+
+    def samples(self, values: Optional[Dict[Tuple[str, ...], Any]] = None) -> Iterable[str]:
+        items = sorted((self.snapshot() if values is None else values).items())
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(state[-1])}"
+            yield f"{self.name}_count{labels} {_format_value(cumulative)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return next((m for m in self._metrics if m.name == name), None)
+
+    def snapshot(self) -> Dict[str, Dict[Tuple[str, ...], Any]]:
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+    def render(self, values: Optional[Dict[str, Dict[Tuple[str, ...], Any]]] = None) -> str:
+        """Exposition text; ``values`` (metric name -> values) replaces this process's own"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render(None if values is None else values.get(metric.name, {})))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# -- Per-request statistics ------------------------------------------------------
+
+# Collapses bound-parameter lists such as "IN (?, ?, ?)" so they share one shape
+_PARAM_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalised SQL text; statements differing only in parameters share a shape"""
+    return _PARAM_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class RequestStats:
+    """Mutable per-request accumulator shared with threadpool workers"""
+
+    __slots__ = ("route", "queries", "db_time", "shapes")
+
+    def __init__(self, route: str = ""):
+        self.route = route
+        self.queries = 0
+        self.db_time = 0.0
+        # shape -> [executions, total seconds]
+        self.shapes: Dict[str, List[float]] = {}
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.queries += 1
+        self.db_time += elapsed
+        entry = self.shapes.get(statement)
+        if entry is None:
+            entry = self.shapes[statement] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += elapsed
+
+    def repeated_shapes(self, threshold: int, prefix: str = "") -> List[Tuple[str, int, float]]:
+        """Statement shapes executed at least ``threshold`` times (N+1 suspects)"""
+        grouped: Dict[str, List[float]] = {}
+        for statement, (count, seconds) in self.shapes.items():
+            shape = statement_shape(statement)
+            if prefix and not shape.upper().startswith(prefix):
+                continue
+            entry = grouped.setdefault(shape, [0, 0.0])
+            entry[0] += count
+            entry[1] += seconds
+        return sorted(
+            ((shape, int(count), seconds) for shape, (count, seconds) in grouped.items() if count >= threshold),
+            key=lambda item: -item[1],
+        )
+
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+# -- Application metrics -------------------------------------------------------------
+
+http_requests_total = Counter(
+    "http_requests_total", "HTTP requests processed", ("method", "route", "status")
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being processed", ("method",)
+)
+http_response_size_bytes = Histogram(
+    "http_response_size_bytes", "HTTP response body size", ("method", "route"), buckets=SIZE_BUCKETS
+)
+db_request_duration_seconds = Histogram(
+    "db_request_duration_seconds", "Time spent in SQL statements per request", ("route",)
+)
+db_queries_per_request = Histogram(
+    "db_queries_per_request", "SQL statements executed per request", ("route",), buckets=COUNT_BUCKETS
+)
+db_queries_total = Counter(
+    "db_queries_total", "SQL statements executed", ("route",)
+)
+pdf_render_duration_seconds = Histogram(
+    "pdf_render_duration_seconds", "Invoice PDF render time", ("template",)
+)
+plan_limit_rejections_total = Counter(
+    "plan_limit_rejections_total", "Operations rejected by plan limits or features", ("limit", "plan")
+)
+startup_duration_seconds = Gauge(
+    "startup_duration_seconds", "Time spent in each startup phase of this process", ("phase",),
+    multiprocess_mode="all",
+)
+webhook_events_total = Counter(
+    "webhook_events_total", "Webhook inbox events processed", ("type", "result")
+)
+factura_transitions_total = Counter(
+    "factura_transitions_total", "Invoices moved to a new state by bulk transitions", ("estado",)
+)
+idempotency_requests_total = Counter(
+    "idempotency_requests_total", "Create requests with an Idempotency-Key by outcome", ("endpoint", "result")
+)
+
+
+def _loop_lag() -> Dict[Tuple[str, ...], float]:
+    from app.core.loop_monitor import loop_monitor
+
+    snapshot = loop_monitor.snapshot()
+    return {
+        ("0.5",): snapshot["p50_ms"] / 1000,
+        ("0.95",): snapshot["p95_ms"] / 1000,
+        ("0.99",): snapshot["p99_ms"] / 1000,
+        ("1",): snapshot["max_ms"] / 1000,
+    }
+
+
+event_loop_lag_seconds = Gauge(
+    "event_loop_lag_seconds", "Event-loop lag percentiles over the recent window", ("quantile",),
+    callback=_loop_lag, multiprocess_mode="max",
+)
+
+
+# -- SQLAlchemy instrumentation ----------------------------------------------------
+
+def instrument_engine(engine) -> None:
+    """Count and time every statement and attribute it to the current request"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - getattr(context, "_metrics_start", time.perf_counter())
+        stats = current_request_stats.get()
+        if stats is not None:
+            # Flushed to the per-route metrics when the request finishes
+            stats.record(statement, elapsed)
+        else:
+            db_queries_total.inc(route="background")
+            db_request_duration_seconds.observe(elapsed, route="background")
+
+
+# -- Multiprocess mode ---------------------------------------------------------------
+
+def _encode(snapshot: Dict[str, Dict[Tuple[str, ...], Any]]) -> Dict[str, List[list]]:
+    return {name: [[list(key), value] for key, value in values.items()] for name, values in snapshot.items()}
+
+
+def _decode(data: Dict[str, List[list]]) -> Dict[str, Dict[Tuple[str, ...], Any]]:
+    return {name: {tuple(key): value for key, value in values} for name, values in data.items()}
+
+
+def _write_json(path: str, data: Any) -> None:
+    # Readers never see a half-written file
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+class MultiProcessMetrics:
+    """Aggregates the metrics of all gunicorn workers through a shared directory.
+
+    Each worker writes its values to ``<dir>/<pid>-<start>.json`` every
+    ``interval`` seconds, when it serves /metrics and when it exits, so a
+    scrape of any worker renders the whole server. When a worker exits the
+    arbiter folds its counters and histograms into ``archive.json``, so the
+    totals survive ``max_requests`` recycling; its gauges are dropped. Wired
+    up by the hooks in gunicorn.conf.py.
+    """
+
+    ARCHIVE = "archive.json"
+
+    def __init__(self):
+        self.directory: Optional[str] = None
+        self._path: Optional[str] = None
+        self._stop = threading.Event()
+        # Exited workers not yet folded into the archive (see mark_process_dead)
+        self._dead: List[int] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self._path is not None
+
+    def configure(self, directory: str) -> None:
+        """Create the directory and drop files left by a previous run (arbiter, before forking)"""
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith((".json", ".tmp")):
+                os.remove(os.path.join(directory, name))
+        self.directory = directory
+
+    def start(self, interval: float) -> None:
+        """Start writing this worker's values (after fork)"""
+        if self.directory is None:
+            return
+        self._path = os.path.join(self.directory, f"{os.getpid()}-{time.time_ns()}.json")
+        self.flush()
+        threading.Thread(target=self._run, args=(interval,), name="metrics-flush", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.flush()
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except OSError as e:
+                logger.warning(f"Could not write metrics to {self._path}: {e}")
+
+    def flush(self) -> None:
+        if self._path is not None:
+            _write_json(self._path, _encode(REGISTRY.snapshot()))
+
+    def _read(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.directory, name)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def collect(self) -> Dict[str, Dict[Tuple[str, ...], Any]]:
+        """Values of every worker, live or recycled, merged per metric"""
+        # Worker files are read before the archive: a worker folded in between
+        # is then listed in the archive and skipped, never counted twice or lost
+        workers = {}
+        for name in os.listdir(self.directory):
+            if name.endswith(".json") and name != self.ARCHIVE:
+                data = self._read(name)
+                if data is not None:
+                    workers[name] = data
+        archive = self._read(self.ARCHIVE) or {"files": [], "metrics": {}}
+        merged = _decode(archive["metrics"])
+        folded = set(archive["files"])
+        for name, data in workers.items():
+            if name in folded:
+                continue
+            pid = name.split("-", 1)[0]
+            for metric_name, values in _decode(data).items():
+                metric = REGISTRY.get(metric_name)
+                if metric is not None:
+                    metric.merge(merged.setdefault(metric_name, {}), values, pid)
+        return merged
+
+    def mark_process_dead(self, pid: int) -> None:
+        """Fold an exited worker's counters and histograms into the archive (arbiter only)"""
+        if self.directory is None:
+            return
+        # gunicorn calls this from its SIGCHLD handler, which can interrupt a
+        # previous call; the outermost call folds every queued worker in turn
+        self._dead.append(pid)
+        if len(self._dead) > 1:
+            return
+        while self._dead:
+            try:
+                self._fold(self._dead[0])
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not archive the metrics of worker {self._dead[0]}: {e}")
+            self._dead.pop(0)
+
+    def _fold(self, pid: int) -> None:
+        names = [n for n in os.listdir(self.directory) if n.startswith(f"{pid}-") and n.endswith(".json")]
+        if not names:
+            return
+        archive = self._read(self.ARCHIVE) or {"files": [], "metrics": {}}
+        merged = _decode(archive["metrics"])
+        for name in names:
+            data = self._read(name)
+            for metric_name, values in _decode(data or {}).items():
+                metric = REGISTRY.get(metric_name)
+                if metric is not None and metric.cumulative:
+                    metric.merge(merged.setdefault(metric_name, {}), values, str(pid))
+        _write_json(
+            os.path.join(self.directory, self.ARCHIVE),
+            {"files": archive["files"] + names, "metrics": _encode(merged)},
+        )
+        for name in names:
+            os.remove(os.path.join(self.directory, name))
+
+
+multiprocess_metrics = MultiProcessMetrics()
+
+
+def render_metrics() -> str:
+    if multiprocess_metrics.enabled:
+        multiprocess_metrics.flush()
+        return REGISTRY.render(multiprocess_metrics.collect())
+    return REGISTRY.render()
@@ -0,0 +1,218 @@
+from typing import Dict, List, Optional, Set
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from app.core.config import settings
+
+_SAFE_NAME = re.compile(r"^[\w.-]+\.json$")
+_APP_ROOT = str(Path(__file__).resolve().parent.parent.parent)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_APP_ROOT):
+        filename = filename[len(_APP_ROOT) + 1:]
+    elif "site-packages" in filename:
+        filename = filename.split("site-packages", 1)[1].lstrip("/\\")
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def fold_stack(frame) -> str:
+    """Stack as a single 'root;...;leaf' line (flamegraph folded format)"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class ProfileSession:
+    """Stack samples for one request.
+
+    Created for every profiled-candidate request but only sampled once
+    started, so threads that run the request's SQL are known in advance.
+    """
+
+    def __init__(self, task: Optional[asyncio.Task]):
+        self.task = task
+        self.loop = task.get_loop() if task is not None else None
+        self.loop_thread_id = threading.get_ident()
+        self.reason: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.deadline: Optional[float] = None
+        self.samples: Dict[str, int] = {}
+        self.threads: Set[int] = set()
+        self.active = False
+
+    def add(self, stack: str) -> None:
+        self.samples[stack] = self.samples.get(stack, 0) + 1
+
+
+current_profile_session: ContextVar[Optional[ProfileSession]] = ContextVar("current_profile_session", default=None)
+
+
+def instrument_engine(engine) -> None:
+    """Register threadpool threads that run SQL for a profiled request"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _register_thread(conn, cursor, statement, parameters, context, executemany):
+        session = current_profile_session.get()
+        if session is not None:
+            session.threads.add(threading.get_ident())
+
+
+class SamplingProfiler:
+    """Statistical profiler that samples thread stacks of selected requests.
+
+    A single daemon thread wakes every ``interval`` seconds while at least
+    one session is active. For each session it records the loop thread's
+    stack when the request's task is the one running, plus the stacks of
+    worker threads the request has used for DB work (sync routes run in
+    the threadpool).
+
+    Sessions can also be *watched*: the same thread starts sampling them
+    once a deadline passes. The deadline is checked off the event loop, so
+    a coroutine that blocks the loop is still caught.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._sessions: List[ProfileSession] = []
+        self._pending: List[ProfileSession] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+            self._thread.start()
+
+    def start_session(self, session: ProfileSession, reason: str) -> None:
+        """Start sampling a session now"""
+        self._ensure_thread()
+        session.reason = reason
+        session.started_at = time.perf_counter()
+        session.active = True
+        with self._lock:
+            self._sessions.append(session)
+        self._wakeup.set()
+
+    def watch_session(self, session: ProfileSession, delay: float) -> None:
+        """Start sampling a session as "slow" if it is still running after ``delay`` seconds"""
+        self._ensure_thread()
+        session.deadline = time.monotonic() + delay
+        with self._lock:
+            self._pending.append(session)
+            first = len(self._pending) == 1
+        # Deadlines share the same delay, so only the first one changes the next wake-up
+        if first:
+            self._wakeup.set()
+
+    def stop_session(self, session: ProfileSession) -> None:
+        session.active = False
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+            elif session in self._pending:
+                self._pending.remove(session)
+
+    def _promote_due(self) -> Optional[float]:
+        """Activate watched sessions whose deadline passed; returns seconds to the next one"""
+        now = time.monotonic()
+        with self._lock:
+            while self._pending and self._pending[0].deadline <= now:
+                session = self._pending.pop(0)
+                session.reason = "slow"
+                session.started_at = time.perf_counter()
+                session.active = True
+                self._sessions.append(session)
+            return self._pending[0].deadline - now if self._pending else None
+
+    def _run(self) -> None:
+        while True:
+            next_deadline = self._promote_due()
+            with self._lock:
+                sessions = list(self._sessions)
+            if not sessions:
+                self._wakeup.wait(next_deadline)
+                self._wakeup.clear()
+                continue
+            frames = sys._current_frames()
+            for session in sessions:
+                if session.task is not None and asyncio.current_task(session.loop) is session.task:
+                    frame = frames.get(session.loop_thread_id)
+                    if frame is not None:
+                        session.add(fold_stack(frame))
+                for thread_id in list(session.threads):
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != session.loop_thread_id:
+                        session.add(fold_stack(frame))
+            del frames
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    """Bounded directory of profile files (oldest are evicted)"""
+
+    def __init__(self, directory: str, max_files: int):
+        self.directory = Path(directory)
+        self.max_files = max_files
+
+    def save(self, metadata: Dict, samples: Dict[str, int]) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        name = f"{stamp}-{uuid.uuid4().hex[:8]}.json"
+        payload = {**metadata, "samples": sum(samples.values()), "folded": samples}
+        tmp = self.directory / f".{name}.tmp"
+        tmp.write_text(json.dumps(payload))
+        os.replace(tmp, self.directory / name)
+        self._evict()
+        return name
+
+    def _evict(self) -> None:
+        files = sorted(self.directory.glob("*.json"))
+        for path in files[:max(0, len(files) - self.max_files)]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def list(self) -> List[Dict]:
+        if not self.directory.exists():
+            return []
+        result = []
+        for path in sorted(self.directory.glob("*.json"), reverse=True):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            data.pop("folded", None)
+            result.append({"name": path.name, **data})
+        return result
+
+    def path_for(self, name: str) -> Optional[Path]:
+        if not _SAFE_NAME.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+    @staticmethod
+    def to_folded(path: Path) -> str:
+        """Folded text, loadable by flamegraph.pl or speedscope"""
+        data = json.loads(path.read_text())
+        return "".join(f"{stack} {count}\n" for stack, count in data.get("folded", {}).items())
+
+
+request_profiler = SamplingProfiler(interval=settings.PROFILER_INTERVAL)
+profile_store = ProfileStore(settings.PROFILER_DIR, settings.PROFILER_MAX_FILES)
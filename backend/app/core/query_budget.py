@@ -0,0 +1,87 @@
+from typing import Callable, Iterator, Optional
+from contextlib import contextmanager
+import logging
+from app.core.config import settings
+from app.core.metrics import RequestStats, current_request_stats
+
+logger = logging.getLogger(__name__)
+
+BUDGET_ATTRIBUTE = "__query_budget__"
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in ``raise`` mode when a route runs more SQL statements than declared"""
+
+
+def query_budget(max_queries: int) -> Callable:
+    """Declare the maximum number of SQL statements a route may execute.
+
+    Place it *below* the router decorator so FastAPI registers the marked
+    function::
+
+        @router.get("/{factura_id}")
+        @query_budget(2)
+        async def get_factura(...): ...
+    """
+    def decorator(func: Callable) -> Callable:
+        setattr(func, BUDGET_ATTRIBUTE, max_queries)
+        return func
+    return decorator
+
+
+def budget_for(endpoint: Optional[Callable]) -> Optional[int]:
+    return getattr(endpoint, BUDGET_ATTRIBUTE, None)
+
+
+def _format_report(stats: RequestStats, threshold: int) -> str:
+    lines = [f"{stats.queries} statements, {stats.db_time * 1000:.1f} ms in DB"]
+    for shape, count, seconds in stats.repeated_shapes(threshold):
+        lines.append(f"  x{count} ({seconds * 1000:.1f} ms): {shape[:300]}")
+    return "\n".join(lines)
+
+
+def check_request(stats: RequestStats, endpoint: Optional[Callable]) -> None:
+    """Flag N+1 suspects and enforce the route's declared budget"""
+    mode = settings.QUERY_BUDGET_MODE
+    if mode == "off":
+        return
+
+    # Repeated reads are the N+1 signature (lazy loads per row)
+    threshold = settings.QUERY_REPEAT_THRESHOLD
+    suspects = stats.repeated_shapes(threshold, prefix="SELECT")
+    if suspects:
+        logger.warning(
+            "Possible N+1 in %s: %d statement shape(s) repeated >= %d times\n%s",
+            stats.route, len(suspects), threshold, _format_report(stats, threshold),
+        )
+
+    budget = budget_for(endpoint)
+    if budget is None or stats.queries <= budget:
+        return
+
+    message = f"Query budget exceeded in {stats.route}: {stats.queries} > {budget}\n{_format_report(stats, 2)}"
+    if mode == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+@contextmanager
+def count_queries(route: str = "test") -> Iterator[RequestStats]:
+    """Collect SQL statistics for a block of code (tests, scripts)"""
+    stats = RequestStats(route)
+    token = current_request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_request_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, route: str = "test") -> Iterator[RequestStats]:
+    """Fail if the block executes more than ``max_queries`` statements"""
+    with count_queries(route) as stats:
+        yield stats
+    if stats.queries > max_queries:
+        raise QueryBudgetExceeded(
+            f"{route}: {stats.queries} > {max_queries}\n{_format_report(stats, 2)}"
+        )
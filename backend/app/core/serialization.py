@@ -0,0 +1,89 @@
+from typing import Any, Iterable, List, Mapping, Optional, Type
+from decimal import Decimal
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+from app.schemas.factura import FacturaListResponse, FacturaResponse
+from app.schemas.cliente import ClienteResponse
+from app.schemas.producto import ProductoResponse
+
+# Decimal values are always emitted as plain fixed-point strings ("242.00"),
+# the same format pydantic uses, so both serialization paths agree.
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+# Streaming mode of the list endpoints: one JSON object per line
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _default(obj: Any) -> Any:
+    """Fallback encoder for types orjson does not handle natively"""
+    if isinstance(obj, Decimal):
+        return format(obj, "f")
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """Default response class backed by orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# Adapters are built once; validation and JSON encoding run in pydantic-core
+factura_list_adapter = TypeAdapter(List[FacturaListResponse])
+factura_adapter = TypeAdapter(FacturaResponse)
+
+
+def json_response(content: bytes, status_code: int = 200, headers: Mapping[str, str] = None) -> Response:
+    """Wrap already-encoded JSON bytes so FastAPI skips its own serialization"""
+    return Response(content=content, status_code=status_code, headers=headers, media_type="application/json")
+
+
+def serialize_factura_rows(rows: Iterable[Any]) -> bytes:
+    """Validate and encode list rows (SQLAlchemy ``Row`` tuples) as JSON.
+
+    Rows are turned into plain dicts via ``_asdict()`` so validation reads
+    dictionary keys rather than doing attribute lookups per field.
+    """
+    data = factura_list_adapter.validate_python([row._asdict() for row in rows])
+    return factura_list_adapter.dump_json(data)
+
+
+def serialize_factura(factura: Any) -> bytes:
+    """Validate and encode a single invoice (ORM object with loaded lines)"""
+    data = factura_adapter.validate_python(factura, from_attributes=True)
+    return factura_adapter.dump_json(data)
+
+
+def wants_ndjson(accept: Optional[str]) -> bool:
+    """Whether the client asked for the streamed (newline-delimited) list format"""
+    return bool(accept) and NDJSON_MEDIA_TYPE in accept.lower()
+
+
+class NDJSONEncoder:
+    """Validate and encode batches of list rows as newline-delimited JSON.
+
+    Each batch is validated in one call, as ``serialize_factura_rows`` does,
+    and every item is dumped on its own line, so a batch's bytes can be sent
+    as soon as it has been fetched.
+    """
+
+    def __init__(self, schema: Type[Any]):
+        self.list_adapter = TypeAdapter(List[schema])
+        self.item_adapter = TypeAdapter(schema)
+
+    def encode(self, rows: Iterable[Any]) -> bytes:
+        items = self.list_adapter.validate_python([row._asdict() for row in rows])
+        dump = self.item_adapter.dump_json
+        return b"".join([dump(item) + b"\n" for item in items])
+
+
+factura_list_ndjson = NDJSONEncoder(FacturaListResponse)
+cliente_ndjson = NDJSONEncoder(ClienteResponse)
+producto_ndjson = NDJSONEncoder(ProductoResponse)
@@ -0,0 +1,32 @@
+import os
+import warnings
+
+with warnings.catch_warnings():
+    # uvicorn.workers is deprecated in favour of the separate uvicorn-worker package,
+    # which ships the same class; the bundled one avoids another dependency
+    warnings.simplefilter("ignore", DeprecationWarning)
+    from uvicorn.workers import UvicornWorker
+
+
+def default_workers() -> int:
+    """Worker processes when WEB_CONCURRENCY is not set.
+
+    Most routes run synchronous SQLAlchemy calls on the event loop, so a
+    worker is blocked while it waits on the database; two per CPU (plus one)
+    keeps the CPUs busy during those waits.
+    """
+    return (os.cpu_count() or 1) * 2 + 1
+
+
+class AppWorker(UvicornWorker):
+    """Gunicorn worker running uvicorn with a bounded graceful shutdown.
+
+    On SIGTERM (shutdown, reload or ``max_requests`` recycling) uvicorn stops
+    accepting connections and lets in-flight requests finish. Its own
+    deadline is set just below gunicorn's ``graceful_timeout`` so the
+    lifespan shutdown still runs before the arbiter kills the process.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - 2)
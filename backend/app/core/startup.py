@@ -0,0 +1,102 @@
+from typing import Any, Callable, Dict, List, Tuple
+import gc
+import logging
+import os
+import time
+from app.core.metrics import startup_duration_seconds, http_requests_total, http_requests_in_flight
+
+logger = logging.getLogger(__name__)
+
+# Modules that must not be imported by ``import app.main`` (loaded on first use
+# or by warm_up()); checked by scripts/bench_startup.py
+LAZY_MODULES = ("reportlab", "clerk_backend_api", "svix")
+
+
+def _warm_pdf() -> None:
+    from app.utils.pdf import InvoiceGenerator
+    InvoiceGenerator.warm_up()
+
+
+def _warm_auth() -> None:
+    from app.middleware.auth import clerk_auth
+    clerk_auth.warm_up()
+
+
+def _warm_database() -> None:
+    from app.db.database import engine
+    with engine.connect():
+        pass
+
+
+WARMUP_STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("pdf", _warm_pdf),
+    ("auth", _warm_auth),
+    ("database", _warm_database),
+]
+
+
+# Set again after fork so each worker reports its own uptime
+PROCESS_STARTED = time.time()
+
+
+def preload() -> None:
+    """Load shared read-only state in the gunicorn arbiter, before forking.
+
+    Only fork-safe work: module imports and static tables. Connections
+    (database, Clerk HTTP client) are opened per worker by warm_up().
+    """
+    start = time.perf_counter()
+    _warm_pdf()
+    import clerk_backend_api  # noqa: F401
+    import svix.webhooks  # noqa: F401
+    from app.core.billing import PLAN_LIMITS  # noqa: F401
+    # Move everything allocated so far out of the GC's reach, so collections
+    # in the workers do not touch (and un-share) the preloaded pages
+    gc.freeze()
+    startup_duration_seconds.set(time.perf_counter() - start, phase="preload")
+
+
+def mark_worker_started() -> None:
+    global PROCESS_STARTED
+    PROCESS_STARTED = time.time()
+
+
+def worker_health() -> Dict[str, Any]:
+    """State of this worker process (each gunicorn worker answers for itself)"""
+    return {
+        "pid": os.getpid(),
+        "ppid": os.getppid(),
+        "uptime_seconds": round(time.time() - PROCESS_STARTED, 1),
+        "requests_served": int(http_requests_total.total()),
+        "requests_in_flight": int(http_requests_in_flight.total()),
+    }
+
+
+def mark_imported(started: float) -> None:
+    """Record how long importing the application took"""
+    startup_duration_seconds.set(time.perf_counter() - started, phase="import")
+
+
+def warm_up() -> Dict[str, float]:
+    """Load heavy subsystems ahead of the first request.
+
+    Runs in a worker thread (see ``lifespan`` in app.main). A failing step is
+    logged and skipped: the subsystem is then loaded on first use instead.
+    """
+    timings: Dict[str, float] = {}
+    total = time.perf_counter()
+    for name, step in WARMUP_STEPS:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning(f"Warm-up step '{name}' failed: {e}")
+            continue
+        timings[name] = time.perf_counter() - start
+    elapsed = time.perf_counter() - total
+    startup_duration_seconds.set(elapsed, phase="warmup")
+    logger.info(
+        "Warm-up finished in %.0f ms (%s)",
+        elapsed * 1000, ", ".join(f"{k} {v * 1000:.0f} ms" for k, v in timings.items()),
+    )
+    return timings
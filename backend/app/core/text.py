@@ -0,0 +1,94 @@
+from typing import Optional, Set
+import re
+import unicodedata
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(value: Optional[str]) -> str:
+    """Lowercase, strip accents and punctuation: 'Reparación  Caldera' -> 'reparacion caldera'"""
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", stripped).strip()
+
+
+def search_document(*values: Optional[str]) -> str:
+    """Normalized text of several fields, stored in ``search_text`` columns"""
+    return " ".join(filter(None, (normalize(v) for v in values)))
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrams of each word, padded like pg_trgm ('  w', ' wo', ..., 'rd ')"""
+    result: Set[str] = set()
+    for word in text.split():
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def word_similarity(query: str, text: str) -> float:
+    """Portable approximation of pg_trgm's ``word_similarity(query, text)``.
+
+    Share of the query's trigrams found in the best-matching run of
+    consecutive words of ``text`` (as many words as the query has).
+    """
+    if not query or not text:
+        return 0.0
+    query_trigrams = trigrams(query)
+    if not query_trigrams:
+        return 0.0
+    words = text.split()
+    span = max(1, len(query.split()))
+    best = 0
+    for start in range(max(1, len(words) - span + 1)):
+        shared = len(query_trigrams & trigrams(" ".join(words[start:start + span])))
+        if shared > best:
+            best = shared
+            if best == len(query_trigrams):
+                break
+    return best / len(query_trigrams)
+
+
+# Separator between the weighted parts of a portable full-text document
+DOCUMENT_SEPARATOR = "|"
+
+# ts_rank's default weights for parts A, B, C
+_PART_WEIGHTS = (1.0, 0.4, 0.2)
+
+
+def prefix_rank(document: str, query: str) -> float:
+    """Portable approximation of ``ts_rank`` for a prefix query ('term:* & ...').
+
+    ``document`` holds normalized parts separated by DOCUMENT_SEPARATOR, most
+    important first. Each query word scores the weight of the best part with
+    a word starting with it; the result is 0 unless every word matches.
+    """
+    if not document or not query:
+        return 0.0
+    parts = [part.split() for part in document.split(DOCUMENT_SEPARATOR)]
+    terms = query.split()
+    score = 0.0
+    for term in terms:
+        best = max(
+            (weight for words, weight in zip(parts, _PART_WEIGHTS) if any(w.startswith(term) for w in words)),
+            default=0.0,
+        )
+        if not best:
+            return 0.0
+        score += best
+    return score / len(terms)
+
+
+def register_sqlite_functions(engine) -> None:
+    """Expose word_similarity() and prefix_rank() to SQLite so search queries run unchanged in dev and tests"""
+    from sqlalchemy import event
+
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.create_function("word_similarity", 2, word_similarity, deterministic=True)
+        dbapi_connection.create_function("prefix_rank", 2, prefix_rank, deterministic=True)
@@ -3,8 +3,12 @@ from app.db.database import SessionLocal
 from app.models.cliente import Cliente
 from app.models.producto import Producto
 from app.models.factura import Factura, LineaFactura, EstadoFactura
+from app.services.search import FacturaSearchService
+from app.services.tenant_purge import TenantPurgeService
+from app.core.money import from_cents, invoice_totals, line_amount
 from decimal import Decimal
 from datetime import date, timedelta
+import json
 import logging
 import random
 
@@ -329,9 +333,6 @@ def seed_database():
             num_lines = random.randint(1, 4)
             selected_products = random.sample(products, num_lines)
             
-            subtotal = Decimal('0.00')
-            total_iva = Decimal('0.00')
-            
             for product in selected_products:
                 cantidad = Decimal(str(random.randint(1, 5)))
                 linea = LineaFactura(
@@ -340,16 +341,17 @@ def seed_database():
                     cantidad=cantidad,
                     precio_unitario=product.precio,
                     tipo_iva=product.tipo_iva,
-                    subtotal=cantidad * product.precio
+                    subtotal=line_amount(cantidad, product.precio)
                 )
                 invoice.lineas.append(linea)
-                
-                subtotal += linea.subtotal
-                total_iva += linea.subtotal * (linea.tipo_iva / 100)
             
-            invoice.subtotal = subtotal
-            invoice.total_iva = total_iva
-            invoice.total = subtotal + total_iva
+            totales = invoice_totals(invoice.lineas)
+            invoice.subtotal = from_cents(totales.subtotal)
+            invoice.total_iva = from_cents(totales.total_iva)
+            invoice.total = from_cents(totales.total)
+            invoice.search_vector = FacturaSearchService.build(
+                db, invoice.numero, client.nombre, invoice.notas, [l.descripcion for l in invoice.lineas]
+            )
             
             db.add(invoice)
             invoices_created += 1
@@ -378,16 +380,12 @@ def cleanup_seed_data():
     try:
         logger.info("Starting seed data cleanup...")
         
-        # Delete seed invoices (this will cascade delete invoice lines)
-        invoices_deleted = db.query(Factura).filter(Factura.user_id == SEED_USER_ID).delete()
-        
-        # Delete seed clients
-        clients_deleted = db.query(Cliente).filter(Cliente.user_id == SEED_USER_ID).delete()
-        
-        # Delete seed products
-        products_deleted = db.query(Producto).filter(Producto.user_id == SEED_USER_ID).delete()
-        
-        db.commit()
+        # Chunked purge: deletes invoice lines explicitly (bulk deletes skip the ORM cascade)
+        job = TenantPurgeService.run(db, TenantPurgeService.start(db, SEED_USER_ID))
+        deleted = json.loads(job.deleted)
+        clients_deleted = deleted["clientes"]
+        products_deleted = deleted["productos"]
+        invoices_deleted = deleted["facturas"]
         logger.info(f"Seed data cleaned up: {clients_deleted} clients, {products_deleted} products, {invoices_deleted} invoices deleted")
         
         return {
@@ -0,0 +1,361 @@
+"""Synthetic data for load and capacity testing.
+
+Generates many tenants with a realistic skew: a few large tenants and a long
+tail of small ones, a handful of frequent clients per tenant, mostly short
+invoices with the occasional very long one, Spanish VAT rates weighted by how
+common they are, estados that depend on the invoice age and a month-end peak
+in the dates. The same ``seed`` (and ``end_date``) always produces the same
+rows.
+
+Rows bypass the ORM: ids are assigned up front and each table is written in
+batches with COPY on PostgreSQL and executemany elsewhere. Search columns
+(``search_text``, ``search_vector``) are filled in the same pass.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+from datetime import date, datetime, timedelta
+import calendar
+import csv
+import io
+import logging
+import math
+import random
+import time
+
+from sqlalchemy import func
+from sqlalchemy.engine import Connection
+
+from app.db.database import SessionLocal, engine
+from app.core.money import MoneyBatch, format_cents, rate_bp
+from app.core.text import DOCUMENT_SEPARATOR, search_document
+from app.models import Cliente, Producto, Factura, LineaFactura, EstadoFactura
+
+logger = logging.getLogger(__name__)
+
+# Every generated tenant id starts with this prefix (see cleanup_synthetic_data)
+SYNTHETIC_USER_PREFIX = "user_synth_"
+
+_APELLIDOS = (
+    "García", "Martínez", "López", "Sánchez", "Pérez", "Gómez", "Martín", "Jiménez", "Ruiz",
+    "Hernández", "Díaz", "Moreno", "Álvarez", "Muñoz", "Romero", "Alonso", "Navarro", "Torres",
+    "Domínguez", "Vázquez", "Ramos", "Gil", "Serrano", "Blanco", "Molina", "Castro", "Ortega",
+)
+_SECTORES = (
+    "Construcciones", "Reformas", "Consultoría", "Distribuciones", "Transportes", "Asesoría",
+    "Instalaciones", "Climatización", "Informática", "Hostelería", "Comercial", "Talleres",
+    "Fontanería", "Electricidad", "Diseño", "Logística", "Servicios", "Inmobiliaria",
+)
+_FORMAS = ("S.L.", "S.A.", "S.L.U.", "S.Coop.", "C.B.")
+_CIUDADES = (
+    ("Madrid", "28"), ("Barcelona", "08"), ("Valencia", "46"), ("Sevilla", "41"), ("Zaragoza", "50"),
+    ("Málaga", "29"), ("Murcia", "30"), ("Bilbao", "48"), ("Alicante", "03"), ("Valladolid", "47"),
+    ("Vigo", "36"), ("Granada", "18"), ("Oviedo", "33"), ("Pamplona", "31"), ("Santander", "39"),
+)
+_CALLES = ("Calle Mayor", "Avenida de la Constitución", "Calle Real", "Paseo del Prado", "Calle Nueva", "Plaza de España")
+_SERVICIOS = (
+    "Reparación caldera", "Mantenimiento preventivo", "Consultoría técnica", "Hora de desarrollo",
+    "Soporte remoto", "Instalación eléctrica", "Revisión anual", "Diseño gráfico", "Auditoría",
+    "Formación presencial", "Transporte urgente", "Desplazamiento", "Mano de obra",
+)
+_ARTICULOS = (
+    "Radiador aluminio", "Termo eléctrico", "Cable 2.5mm", "Tubería cobre", "Portátil", "Monitor 27\"",
+    "Teclado inalámbrico", "Router WiFi", "Licencia anual", "Pintura plástica", "Azulejo cerámico",
+    "Grifo monomando", "Bombilla LED", "Cuadro eléctrico", "Papel A4", "Tóner impresora",
+)
+_NOTAS = (
+    "Pago a 30 días", "Pago por transferencia bancaria", "Urgente: entregar antes de fin de mes",
+    "Incluye desplazamiento", "Según presupuesto aceptado", "Factura rectificativa pendiente",
+)
+
+# Spanish VAT rates and how often they are billed
+_IVA_RATES = ("21.00", "10.00", "4.00", "0.00")
+_IVA_WEIGHTS = (78, 14, 6, 2)
+# Basis points of each rate, for the per-rate VAT of app.core.money
+_IVA_BP = {tipo_iva: rate_bp(tipo_iva) for tipo_iva in _IVA_RATES}
+
+
+def _tsvector(parts: Sequence[str]) -> str:
+    """tsvector literal equal to setweight(to_tsvector('simple', part), A/B/C) || ..."""
+    positions: Dict[str, List[str]] = {}
+    position = 0
+    for weight, part in zip("ABC", parts):
+        for word in part.split():
+            position += 1
+            positions.setdefault(word, []).append(f"{min(position, 16383)}{weight}")
+    return " ".join(f"'{word}':{','.join(p)}" for word, p in positions.items())
+
+
+def _pick_skewed(rng: random.Random, count: int, alpha: float = 1.2) -> int:
+    """Index in [0, count) where low indexes are much more likely (Pareto)"""
+    return min(int(rng.paretovariate(alpha)) - 1, count - 1)
+
+
+class _BulkWriter:
+    """Buffers rows of one table and writes them with COPY (Postgres) or executemany"""
+
+    def __init__(self, connection: Connection, table: str, columns: Sequence[str]):
+        self.connection = connection
+        self.table = table
+        self.columns = tuple(columns)
+        self.rows: List[Tuple] = []
+        self.written = 0
+        self.postgres = connection.dialect.name == "postgresql"
+        placeholders = ", ".join("?" if connection.dialect.paramstyle == "qmark" else "%s" for _ in self.columns)
+        self.insert_sql = f"INSERT INTO {table} ({', '.join(self.columns)}) VALUES ({placeholders})"
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        if self.postgres:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(self.rows)
+            buffer.seek(0)
+            cursor = self.connection.connection.cursor()
+            try:
+                cursor.copy_expert(
+                    f"COPY {self.table} ({', '.join(self.columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+                )
+            finally:
+                cursor.close()
+        else:
+            self.connection.exec_driver_sql(self.insert_sql, self.rows)
+        self.written += len(self.rows)
+        self.rows = []
+
+
+class SyntheticDataGenerator:
+    """Builds the rows of ``tenants`` tenants sharing about ``invoices`` invoices"""
+
+    def __init__(
+        self,
+        tenants: int,
+        invoices: int,
+        seed: int = 0,
+        days: int = 730,
+        end_date: Optional[date] = None,
+        batch_size: int = 20000,
+    ):
+        self.tenants = tenants
+        self.invoices = invoices
+        self.seed = seed
+        self.days = days
+        self.end_date = end_date or date.today()
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+
+    @staticmethod
+    def tenant_id(seed: int, index: int) -> str:
+        return f"{SYNTHETIC_USER_PREFIX}{seed}_{index:06d}"
+
+    def tenant_sizes(self) -> List[int]:
+        """Invoices per tenant: Pareto weights, so ~20% of tenants hold ~80% of invoices"""
+        weights = [self.rng.paretovariate(1.16) for _ in range(self.tenants)]
+        total = sum(weights)
+        return [max(1, round(self.invoices * weight / total)) for weight in weights]
+
+    def _fecha(self) -> date:
+        # Volume grows over time: recent dates are more likely
+        age = int(self.days * (1 - math.sqrt(self.rng.random())))
+        fecha = self.end_date - timedelta(days=age)
+        if self.rng.random() < 0.25:
+            # Month-end rush: move to one of the last three days of the month
+            last_day = calendar.monthrange(fecha.year, fecha.month)[1]
+            fecha = fecha.replace(day=last_day - self.rng.randrange(3))
+            if fecha > self.end_date:
+                fecha = self.end_date
+        return fecha
+
+    def _estado(self, fecha: date) -> str:
+        age = (self.end_date - fecha).days
+        roll = self.rng.random()
+        if age > 90:
+            estado = EstadoFactura.PAGADA if roll < 0.88 else EstadoFactura.ENVIADA if roll < 0.96 else EstadoFactura.CANCELADA
+        elif age > 30:
+            estado = EstadoFactura.PAGADA if roll < 0.6 else EstadoFactura.ENVIADA if roll < 0.95 else EstadoFactura.CANCELADA
+        else:
+            estado = EstadoFactura.BORRADOR if roll < 0.3 else EstadoFactura.ENVIADA if roll < 0.8 else EstadoFactura.PAGADA
+        return estado.name
+
+    def _num_lineas(self) -> int:
+        if self.rng.random() < 0.005:
+            return self.rng.randint(50, 300)
+        return min(1 + int(self.rng.expovariate(0.5)), 40)
+
+    def _cliente(self, cliente_id: int, user_id: str, created_at: str) -> Tuple:
+        rng = self.rng
+        nombre = f"{rng.choice(_SECTORES)} {rng.choice(_APELLIDOS)} {rng.choice(_FORMAS)}"
+        nif = f"{rng.choice('ABEFGJ')}{rng.randrange(10 ** 7, 10 ** 8)}"
+        ciudad, provincia = rng.choice(_CIUDADES)
+        email = f"facturacion{cliente_id}@example.com"
+        return (
+            cliente_id, user_id, nombre, nif, f"{rng.choice(_CALLES)}, {rng.randint(1, 200)}", ciudad,
+            f"{provincia}{rng.randrange(1000):03d}", "España", email, f"6{rng.randrange(10 ** 8):08d}",
+            search_document(nombre, nif, email), created_at, created_at,
+        )
+
+    def _producto(self, producto_id: int, user_id: str, created_at: str) -> Tuple:
+        rng = self.rng
+        es_servicio = rng.random() < 0.4
+        nombre = f"{rng.choice(_SERVICIOS if es_servicio else _ARTICULOS)} {rng.randrange(1, 100)}"
+        codigo = f"{'SRV' if es_servicio else 'ART'}-{producto_id:06d}"
+        descripcion = f"{nombre} ({'servicio' if es_servicio else 'artículo'})"
+        precio = max(1, int(rng.lognormvariate(8.2, 1.1)))  # cents, median ~36 EUR
+        tipo_iva = rng.choices(_IVA_RATES, _IVA_WEIGHTS)[0]
+        return (
+            producto_id, user_id, nombre, descripcion, format_cents(precio), tipo_iva, es_servicio, codigo,
+            rng.random() < 0.95, search_document(nombre, codigo, descripcion), created_at, created_at,
+        ), (producto_id, descripcion, precio, tipo_iva, es_servicio)
+
+    def run(self, connection: Connection) -> Dict[str, int]:
+        """Generate and write every row through ``connection`` (committed by the caller)"""
+        rng = self.rng
+        ids = {
+            model: connection.execute(func.coalesce(func.max(model.id), 0).select()).scalar()
+            for model in (Cliente, Producto, Factura, LineaFactura)
+        }
+        writers = [
+            _BulkWriter(connection, "clientes", (
+                "id", "user_id", "nombre", "nif", "direccion", "ciudad", "codigo_postal", "pais",
+                "email", "telefono", "search_text", "created_at", "updated_at",
+            )),
+            _BulkWriter(connection, "productos", (
+                "id", "user_id", "nombre", "descripcion", "precio", "tipo_iva", "es_servicio", "codigo",
+                "activo", "search_text", "created_at", "updated_at",
+            )),
+            _BulkWriter(connection, "facturas", (
+                "id", "user_id", "numero", "fecha", "cliente_id", "subtotal", "total_iva", "total",
+                "estado", "notas", "search_vector", "created_at", "updated_at",
+            )),
+            _BulkWriter(connection, "lineas_factura", (
+                "id", "factura_id", "producto_id", "descripcion", "cantidad", "precio_unitario",
+                "tipo_iva", "subtotal",
+            )),
+        ]
+        clientes_writer, productos_writer, facturas_writer, lineas_writer = writers
+        postgres = connection.dialect.name == "postgresql"
+        tenant_created = str(datetime.combine(self.end_date - timedelta(days=self.days), datetime.min.time()))
+
+        for index, size in enumerate(self.tenant_sizes()):
+            user_id = self.tenant_id(self.seed, index)
+            clientes = []
+            for _ in range(min(max(1, int(size ** 0.6)), 5000)):
+                ids[Cliente] += 1
+                row = self._cliente(ids[Cliente], user_id, tenant_created)
+                clientes_writer.rows.append(row)
+                clientes.append((row[0], row[2]))
+            productos = []
+            for _ in range(min(3 + int(size ** 0.5), 2000)):
+                ids[Producto] += 1
+                row, producto = self._producto(ids[Producto], user_id, tenant_created)
+                productos_writer.rows.append(row)
+                productos.append(producto)
+
+            # Numbered per year in date order, like generate_invoice_number
+            fechas = sorted(self._fecha() for _ in range(size))
+            numero_year, secuencia = None, 0
+            for fecha in fechas:
+                if fecha.year != numero_year:
+                    numero_year, secuencia = fecha.year, 0
+                secuencia += 1
+                numero = f"{fecha.year}-{secuencia:04d}"
+                cliente_id, cliente_nombre = clientes[_pick_skewed(rng, len(clientes))]
+                ids[Factura] += 1
+                factura_id = ids[Factura]
+
+                importes = MoneyBatch()
+                descripciones = []
+                for _ in range(self._num_lineas()):
+                    producto_id, descripcion, precio, tipo_iva, es_servicio = productos[_pick_skewed(rng, len(productos), 1.05)]
+                    cantidad = rng.randint(1, 40) if es_servicio else (1 if rng.random() < 0.6 else rng.randint(2, 20))
+                    linea_subtotal = precio * cantidad
+                    importes.append(linea_subtotal, _IVA_BP[tipo_iva])
+                    ids[LineaFactura] += 1
+                    lineas_writer.rows.append((
+                        ids[LineaFactura], factura_id, producto_id, descripcion, f"{cantidad}.00",
+                        format_cents(precio), tipo_iva, format_cents(linea_subtotal),
+                    ))
+                    descripciones.append(descripcion)
+
+                subtotal, total_iva, total = importes.totals()
+                notas = rng.choice(_NOTAS) if rng.random() < 0.15 else None
+                parts = [search_document(numero, cliente_nombre), search_document(*descripciones), search_document(notas)]
+                search_vector = _tsvector(parts) if postgres else DOCUMENT_SEPARATOR.join(parts)
+                created_at = str(datetime.combine(fecha, datetime.min.time()) + timedelta(seconds=rng.randrange(8 * 3600, 20 * 3600)))
+                facturas_writer.rows.append((
+                    factura_id, user_id, numero, fecha.isoformat(), cliente_id, format_cents(subtotal),
+                    format_cents(total_iva), format_cents(total), self._estado(fecha), notas,
+                    search_vector, created_at, created_at,
+                ))
+
+            if sum(len(writer.rows) for writer in writers) >= self.batch_size:
+                # Parents before children so foreign keys hold at every COPY
+                for writer in writers:
+                    writer.flush()
+
+        for writer in writers:
+            writer.flush()
+        if postgres:
+            for writer in writers:
+                connection.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{writer.table}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {writer.table}))"
+                )
+        return {
+            "tenants": self.tenants,
+            "clients": clientes_writer.written,
+            "products": productos_writer.written,
+            "invoices": facturas_writer.written,
+            "invoice_lines": lineas_writer.written,
+        }
+
+
+def generate_synthetic_data(
+    tenants: int,
+    invoices: int,
+    seed: int = 0,
+    days: int = 730,
+    end_date: Optional[date] = None,
+    batch_size: int = 20000,
+) -> Dict:
+    """Generate synthetic tenants in one transaction and report rows per second"""
+    generator = SyntheticDataGenerator(tenants, invoices, seed, days, end_date, batch_size)
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        stats = generator.run(connection)
+    elapsed = time.perf_counter() - started
+    rows = stats["clients"] + stats["products"] + stats["invoices"] + stats["invoice_lines"]
+    logger.info(f"Synthetic data generated: {stats} in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)")
+    return {
+        "message": "Synthetic data generated successfully",
+        **stats,
+        "seed": seed,
+        "first_user_id": SyntheticDataGenerator.tenant_id(seed, 0),
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed),
+    }
+
+
+def cleanup_synthetic_data() -> Dict:
+    """Remove every synthetic tenant (user ids starting with SYNTHETIC_USER_PREFIX)"""
+    db = SessionLocal()
+    try:
+        synthetic = f"{SYNTHETIC_USER_PREFIX}%"
+        facturas = db.query(Factura.id).filter(Factura.user_id.like(synthetic))
+        lines_deleted = db.query(LineaFactura).filter(
+            LineaFactura.factura_id.in_(facturas.scalar_subquery())
+        ).delete(synchronize_session=False)
+        invoices_deleted = db.query(Factura).filter(Factura.user_id.like(synthetic)).delete(synchronize_session=False)
+        clients_deleted = db.query(Cliente).filter(Cliente.user_id.like(synthetic)).delete(synchronize_session=False)
+        products_deleted = db.query(Producto).filter(Producto.user_id.like(synthetic)).delete(synchronize_session=False)
+        db.commit()
+        return {
+            "message": "Synthetic data cleaned up successfully",
+            "clients_deleted": clients_deleted,
+            "products_deleted": products_deleted,
+            "invoices_deleted": invoices_deleted,
+            "invoice_lines_deleted": lines_deleted,
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -1,12 +1,51 @@
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.api.routers import clientes, productos, seed, dashboard, facturas, perfil_empresa, billing
+from app.core.startup import mark_imported, warm_up, worker_health
+from app.core.serialization import FastJSONResponse
+from app.middleware.compression import CompressionMiddleware
+from app.core.loop_monitor import loop_monitor, LoopMonitorMiddleware
+from app.core.metrics import render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from app.middleware.metrics import MetricsMiddleware
+from app.core.profiler import request_profiler, profile_store
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.concurrency import ConcurrencyLimitMiddleware
+from app.services.webhooks import webhook_worker
+from app.api.routers import clientes, productos, seed, dashboard, facturas, perfil_empresa, billing, admin, webhooks
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    # Heavy subsystems are imported lazily; warm them up before or while serving
+    warmup = None
+    if settings.STARTUP_WARMUP == "blocking":
+        await asyncio.to_thread(warm_up)
+    elif settings.STARTUP_WARMUP == "background":
+        warmup = asyncio.create_task(asyncio.to_thread(warm_up))
+    if settings.WEBHOOK_WORKER_ENABLED:
+        webhook_worker.start()
+    yield
+    if warmup is not None and not warmup.done():
+        warmup.cancel()
+    if settings.WEBHOOK_WORKER_ENABLED:
+        await webhook_worker.stop()
+    if settings.LOOP_MONITOR_ENABLED:
+        await loop_monitor.stop()
 
 app = FastAPI(
     title="FacturSaaS API",
     description="API para sistema de facturación multi-tenant",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -16,8 +55,44 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Query-Count", "X-DB-Time-Ms"],
+)
+
+# Compress large responses (invoice lists, exports)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        level=settings.COMPRESSION_LEVEL,
+    )
+
+# Never have more requests in flight than pooled DB connections (see ConcurrencyLimitMiddleware);
+# the in-process webhook worker keeps one connection for itself
+app.add_middleware(
+    ConcurrencyLimitMiddleware,
+    limit=settings.MAX_CONCURRENT_REQUESTS or (
+        settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW - (1 if settings.WEBHOOK_WORKER_ENABLED else 0)
+    ),
 )
 
+# Track the running route for event-loop stall reports
+if settings.LOOP_MONITOR_ENABLED:
+    app.add_middleware(LoopMonitorMiddleware, monitor=loop_monitor)
+
+# Stack samples of a fraction of requests and of every slow one (opt-in)
+if settings.PROFILER_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        profiler=request_profiler,
+        store=profile_store,
+        sample_rate=settings.PROFILER_SAMPLE_RATE,
+        slow_threshold=settings.PROFILER_SLOW_THRESHOLD,
+    )
+
+# Per-route latency, size and DB time metrics (outermost, so it sees the whole request)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(clientes.router)
 app.include_router(productos.router)
@@ -26,6 +101,10 @@ app.include_router(perfil_empresa.router)
 app.include_router(seed.router)
 app.include_router(dashboard.router)
 app.include_router(billing.router)
+app.include_router(admin.router)
+app.include_router(webhooks.router)
+
+mark_imported(_import_started)
 
 @app.get("/")
 def read_root():
@@ -33,4 +112,19 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/health/worker")
+def worker_health_check():
+    """Health of the worker process that served this request"""
+    return worker_health()
+
+@app.get("/health/loop")
+def loop_health():
+    """Event-loop lag percentiles over the recent window"""
+    return loop_monitor.snapshot()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Metrics in Prometheus text exposition format"""
+    return PlainTextResponse(render_metrics(), media_type=METRICS_CONTENT_TYPE)
\ No newline at end of file
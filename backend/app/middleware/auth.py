@@ -2,25 +2,47 @@ from fastapi import HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 from typing import Optional
-import httpx
 from app.core.config import settings
 import asyncio
-from clerk_backend_api import Clerk
 
 security = HTTPBearer()
 
+# Map Clerk plan IDs to our internal plan names
+PLAN_MAPPING = {
+    "free_user": "free_user",
+    "starter": "starter",
+    "pro": "pro"
+}
+
+def extract_plan(payload: dict) -> str:
+    """Internal plan name from the JWT claim 'pla' (Clerk Billing)"""
+    plan_claim = payload.get("pla", "") or ""
+    # Extract plan ID from format "u:plan_name" or "o:plan_name"
+    plan = plan_claim.split(":")[1] if ":" in plan_claim else None
+    return PLAN_MAPPING.get(plan, "free_user")
+
 class ClerkAuth:
     def __init__(self):
         self.clerk_secret_key = settings.CLERK_SECRET_KEY
-        self.clerk_client = None
-        if self.clerk_secret_key:
-            self.clerk_client = Clerk(bearer_auth=self.clerk_secret_key)
+        self._clerk_client = None
+    
+    @property
+    def clerk_client(self):
+        """Clerk SDK client, created on first use (the SDK is slow to import)"""
+        if self._clerk_client is None and self.clerk_secret_key:
+            from clerk_backend_api import Clerk
+            self._clerk_client = Clerk(bearer_auth=self.clerk_secret_key)
+        return self._clerk_client
+    
+    def warm_up(self) -> None:
+        """Create the Clerk client ahead of the first request"""
+        self.clerk_client
         
     async def verify_token(self, credentials: HTTPAuthorizationCredentials = Security(security)) -> dict:
         token = credentials.credentials
         
         try:
-            if self.clerk_client:
+            if self.clerk_secret_key:
                 # Production: Verify token with Clerk
                 try:
                     # For FastAPI compatibility, we'll verify the token format first
@@ -33,19 +55,7 @@ class ClerkAuth:
                     # Extract user metadata including plan information
                     public_metadata = payload.get("public_metadata", {})
                     
-                    # Extract plan from JWT claim 'pla' (Clerk Billing)
-                    plan_claim = payload.get("pla", "")
-                    # Extract plan ID from format "u:plan_name" or "o:plan_name"
-                    plan = plan_claim.split(":")[1] if ":" in plan_claim else None
-                    
-                    # Map Clerk plan IDs to our internal plan names
-                    plan_mapping = {
-                        "free_user": "free_user",
-                        "starter": "starter",
-                        "pro": "pro"
-                    }
-                    
-                    user_plan = plan_mapping.get(plan, "free_user")
+                    user_plan = extract_plan(payload)
                     
                     return {
                         "user_id": user_id, 
@@ -67,19 +77,7 @@ class ClerkAuth:
                 # Extract user metadata including plan information
                 public_metadata = payload.get("public_metadata", {})
                 
-                # Extract plan from JWT claim 'pla' (Clerk Billing)
-                plan_claim = payload.get("pla", "")
-                # Extract plan ID from format "u:plan_name" or "o:plan_name"
-                plan = plan_claim.split(":")[1] if ":" in plan_claim else None
-                
-                # Map Clerk plan IDs to our internal plan names
-                plan_mapping = {
-                    "free_user": "free_user",
-                    "starter": "starter",
-                    "pro": "pro"
-                }
-                
-                user_plan = plan_mapping.get(plan, "free_user")
+                user_plan = extract_plan(payload)
                 
                 return {
                     "user_id": user_id, 
@@ -3,6 +3,7 @@ from typing import List, Optional
 from fastapi import HTTPException, Depends
 from app.middleware.auth import get_current_user
 from app.core.billing import BillingService
+from app.core.metrics import plan_limit_rejections_total
 
 def require_plan(allowed_plans: List[str]):
     """Decorator to check if user has one of the allowed plans"""
@@ -39,6 +40,7 @@ def require_feature(feature: str):
             user_plan = BillingService.get_user_plan(current_user)
             
             if not BillingService.has_feature(user_plan, feature):
+                plan_limit_rejections_total.inc(limit=f"feature:{feature}", plan=user_plan)
                 raise HTTPException(
                     status_code=403, 
                     detail=f"Esta función requiere la característica '{feature}' que no está disponible en tu plan {user_plan}. Actualiza tu plan para acceder a esta función."
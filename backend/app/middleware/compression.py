@@ -0,0 +1,181 @@
+from typing import Callable, List, Optional
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip/deflate are always available
+    brotli = None
+
+# Content types that are already compressed (or must not be transformed)
+DEFAULT_EXCLUDED_TYPES = (
+    "application/pdf",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/x-7z-compressed",
+    "application/octet-stream",
+    "image/",
+    "video/",
+    "audio/",
+    "font/woff",
+    "text/event-stream",
+)
+
+
+class _Compressor:
+    """Incremental compressor that can emit output chunk by chunk"""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=min(level, 11))
+        elif encoding == "gzip":
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        else:  # deflate (zlib wrapper, as browsers expect)
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk and flush it so the client can decode it right away"""
+        if self.encoding == "br":
+            return self._obj.process(data) + self._obj.flush()
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._obj.process(data) + self._obj.finish()
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_FINISH)
+
+
+def supported_encodings() -> List[str]:
+    """Encodings in server preference order"""
+    return (["br"] if brotli is not None else []) + ["gzip", "deflate"]
+
+
+def choose_encoding(accept_encoding: str, available: List[str]) -> Optional[str]:
+    """Pick the best encoding from an Accept-Encoding header (honours q-values)"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        parts = [p.strip() for p in item.split(";")]
+        name = parts[0].lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+    candidates = [
+        (weights.get(enc, weights.get("*", 0.0)), -index, enc)
+        for index, enc in enumerate(available)
+    ]
+    q, _, encoding = max(candidates)
+    return encoding if q > 0 else None
+
+
+class CompressionMiddleware:
+    """Compress responses according to Accept-Encoding.
+
+    - Bodies smaller than ``minimum_size`` are sent as-is.
+    - Already-compressed content types are skipped.
+    - Streaming responses are compressed chunk by chunk instead of buffered.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        level: int = 6,
+        excluded_types: tuple = DEFAULT_EXCLUDED_TYPES,
+        encodings: Optional[List[str]] = None,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+        self.excluded_types = tuple(excluded_types)
+        self.encodings = [e for e in (encodings or supported_encodings()) if e in supported_encodings()]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def is_excluded(self, content_type: str) -> bool:
+        content_type = content_type.split(";")[0].strip().lower()
+        return any(content_type.startswith(t) for t in self.excluded_types)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+        self.compressor: Optional[_Compressor] = None
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Hold the headers until the first body chunk tells us the size
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                "content-encoding" in headers
+                or self.middleware.is_excluded(headers.get("content-type", ""))
+            )
+            return
+
+        if message_type != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            if self.passthrough or (not more_body and len(body) < self.middleware.minimum_size):
+                self.passthrough = True
+                await self._send(self.initial_message)
+                await self._send(message)
+                return
+
+            self.compressor = _Compressor(self.encoding, self.middleware.level)
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                # Total size is unknown while streaming
+                del headers["Content-Length"]
+                message["body"] = self.compressor.compress(body)
+            else:
+                message["body"] = self.compressor.finish(body)
+                headers["Content-Length"] = str(len(message["body"]))
+            await self._send(self.initial_message)
+            await self._send(message)
+            return
+
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        finalize: Callable[[bytes], bytes] = self.compressor.compress if more_body else self.compressor.finish
+        message["body"] = finalize(body)
+        await self._send(message)
@@ -0,0 +1,29 @@
+from typing import Optional
+import asyncio
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class ConcurrencyLimitMiddleware:
+    """Caps the requests a worker handles at once; the rest wait without blocking the loop.
+
+    Most routes run synchronous SQLAlchemy calls on the event loop. When
+    every pooled connection is taken, the next request blocks the loop in
+    the pool checkout, so the requests holding connections can never run
+    their teardown and give them back: the worker deadlocks until the pool
+    timeout. Keeping the limit at the pool capacity avoids that.
+    """
+
+    def __init__(self, app: ASGIApp, limit: int) -> None:
+        self.app = app
+        self.limit = limit
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self._semaphore is None:
+            # Created lazily so it binds to the worker's event loop
+            self._semaphore = asyncio.Semaphore(self.limit)
+        async with self._semaphore:
+            await self.app(scope, receive, send)
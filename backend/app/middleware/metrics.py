@@ -0,0 +1,72 @@
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.query_budget import check_request
+from app.core.metrics import (
+    RequestStats, current_request_stats,
+    http_requests_total, http_request_duration_seconds, http_requests_in_flight,
+    http_response_size_bytes, db_request_duration_seconds, db_queries_per_request,
+    db_queries_total,
+)
+
+
+def route_label(scope: Scope) -> str:
+    """Route template (e.g. /api/facturas/{factura_id}) to keep label cardinality bounded"""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path or "unmatched"
+
+
+class MetricsMiddleware:
+    """Per-route latency, response size, in-flight requests and DB time.
+
+    Also adds the X-Query-Count debug header and enforces per-route query
+    budgets (see ``app.core.query_budget``).
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.QUERY_DEBUG_HEADERS:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("X-Query-Count", str(stats.queries))
+                    headers.append("X-DB-Time-Ms", f"{stats.db_time * 1000:.1f}")
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc(method=method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec(method=method)
+            current_request_stats.reset(token)
+
+            route = route_label(scope)
+            stats.route = route
+            http_requests_total.inc(method=method, route=route, status=str(status_code))
+            http_request_duration_seconds.observe(elapsed, method=method, route=route)
+            http_response_size_bytes.observe(size, method=method, route=route)
+            db_request_duration_seconds.observe(stats.db_time, route=route)
+            db_queries_per_request.observe(stats.queries, route=route)
+            db_queries_total.inc(stats.queries, route=route)
+
+        check_request(stats, scope.get("endpoint"))
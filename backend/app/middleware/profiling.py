@@ -0,0 +1,111 @@
+from typing import Optional
+from datetime import datetime, timezone
+import asyncio
+import logging
+import random
+import time
+from jose import jwt, JWTError
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.metrics import current_request_stats
+from app.core.profiler import (
+    ProfileSession, ProfileStore, SamplingProfiler, current_profile_session,
+)
+from app.middleware.auth import extract_plan
+from app.middleware.metrics import route_label
+
+logger = logging.getLogger(__name__)
+
+
+def _user_plan(scope: Scope) -> Optional[str]:
+    authorization = Headers(scope=scope).get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return extract_plan(jwt.get_unverified_claims(token))
+    except JWTError:
+        return None
+
+
+class ProfilingMiddleware:
+    """Samples stacks of a fraction of requests and of every slow request.
+
+    Sampled requests are profiled from the start. Any other request is
+    watched: if it is still running after ``slow_threshold`` seconds it is
+    profiled from that point until it finishes. A request that is neither
+    sampled nor slow only pays for registering and removing the watch.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        profiler: SamplingProfiler,
+        store: ProfileStore,
+        sample_rate: float = 0.01,
+        slow_threshold: float = 1.0,
+    ) -> None:
+        self.app = app
+        self.profiler = profiler
+        self.store = store
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(asyncio.current_task())
+        token = current_profile_session.set(session)
+        if random.random() < self.sample_rate:
+            self.profiler.start_session(session, "sampled")
+        else:
+            self.profiler.watch_session(session, self.slow_threshold)
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_profile_session.reset(token)
+            was_profiled = session.active
+            self.profiler.stop_session(session)
+            if was_profiled:
+                await self._save(scope, session, status_code, elapsed)
+
+    async def _save(self, scope: Scope, session: ProfileSession, status_code: int, elapsed: float) -> None:
+        stats = current_request_stats.get()
+        metadata = {
+            "route": route_label(scope),
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "plan": _user_plan(scope),
+            "reason": session.reason,
+            "duration_ms": round(elapsed * 1000, 1),
+            # Slow requests are only sampled after the threshold is crossed
+            "profiled_ms": round((time.perf_counter() - session.started_at) * 1000, 1),
+            "db_time_ms": round(stats.db_time * 1000, 1) if stats is not None else None,
+            "queries": stats.queries if stats is not None else None,
+            "interval_ms": self.profiler.interval * 1000,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        try:
+            name = await run_in_threadpool(self.store.save, metadata, session.samples)
+        except OSError as e:
+            logger.error(f"Error saving request profile: {e}")
+            return
+        logger.info(
+            "Saved %s profile %s for %s %s (%.0f ms)",
+            session.reason, name, metadata["method"], metadata["route"], metadata["duration_ms"],
+        )
@@ -2,5 +2,9 @@ from app.models.cliente import Cliente
 from app.models.producto import Producto
 from app.models.factura import Factura, LineaFactura, EstadoFactura
 from app.models.perfil_empresa import PerfilEmpresa
+from app.models.webhook_event import WebhookEvent, EstadoWebhook
+from app.models.tenant_purge import TenantPurge, EstadoPurga
+from app.models.idempotency_key import IdempotencyKey
+from app.models.product_catalog_version import ProductCatalogVersion
 
-__all__ = ["Cliente", "Producto", "Factura", "LineaFactura", "EstadoFactura", "PerfilEmpresa"]
\ No newline at end of file
+__all__ = ["Cliente", "Producto", "Factura", "LineaFactura", "EstadoFactura", "PerfilEmpresa", "WebhookEvent", "EstadoWebhook", "TenantPurge", "EstadoPurga", "IdempotencyKey", "ProductCatalogVersion"]
\ No newline at end of file
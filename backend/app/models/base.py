@@ -1,10 +1,45 @@
-from sqlalchemy import Column, String, DateTime
+from typing import Tuple
+from sqlalchemy import Column, String, DateTime, Text, DDL, Index, event
 from sqlalchemy.sql import func
 from app.db.database import Base
+from app.core.text import search_document
 
 class TimestampMixin:
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 class UserOwnedMixin:
-    user_id = Column(String, nullable=False, index=True)
\ No newline at end of file
+    user_id = Column(String, nullable=False, index=True)
+
+class SearchableMixin:
+    """Normalized copy (lowercase, no accents) of ``__search_fields__`` for trigram search"""
+    __search_fields__: Tuple[str, ...] = ()
+    
+    search_text = Column(Text)
+    
+    def build_search_text(self) -> str:
+        return search_document(*(getattr(self, field) for field in self.__search_fields__))
+    
+    def refresh_search_text(self) -> None:
+        self.search_text = self.build_search_text()
+
+@event.listens_for(SearchableMixin, "before_insert", propagate=True)
+@event.listens_for(SearchableMixin, "before_update", propagate=True)
+def _refresh_search_text(mapper, connection, target):
+    target.refresh_search_text()
+
+def trigram_index(name: str, column) -> Index:
+    """GIN trigram index on Postgres (needs pg_trgm); not created on other databases"""
+    return Index(
+        name,
+        column,
+        postgresql_using="gin",
+        postgresql_ops={column.key: "gin_trgm_ops"},
+    ).ddl_if(dialect="postgresql")
+
+# Trigram operators and indexes (word_similarity, <%, gin_trgm_ops)
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
@@ -1,9 +1,10 @@
 from sqlalchemy import Column, Integer, String, Text
 from app.db.database import Base
-from app.models.base import TimestampMixin, UserOwnedMixin
+from app.models.base import TimestampMixin, UserOwnedMixin, SearchableMixin, trigram_index
 
-class Cliente(Base, TimestampMixin, UserOwnedMixin):
+class Cliente(Base, TimestampMixin, UserOwnedMixin, SearchableMixin):
     __tablename__ = "clientes"
+    __search_fields__ = ("nombre", "nif", "email")
     
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String(200), nullable=False)
@@ -13,4 +14,6 @@ class Cliente(Base, TimestampMixin, UserOwnedMixin):
     codigo_postal = Column(String(10))
     pais = Column(String(100), default="España")
     email = Column(String(200))
-    telefono = Column(String(20))
\ No newline at end of file
+    telefono = Column(String(20))
+
+trigram_index("ix_clientes_search_text", Cliente.search_text)
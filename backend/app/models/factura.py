@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, Numeric, Date, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Numeric, Date, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from app.db.database import Base
 from app.models.base import TimestampMixin, UserOwnedMixin
 import enum
@@ -25,15 +26,41 @@ class Factura(Base, TimestampMixin, UserOwnedMixin):
     estado = Column(Enum(EstadoFactura), default=EstadoFactura.BORRADOR)
     notas = Column(Text)
     
+    # Documento de búsqueda: número y cliente (A), líneas (B), notas (C).
+    # tsvector en Postgres, texto normalizado en otras bases de datos.
+    # Lo mantiene FacturaSearchService al escribir la factura o renombrar el cliente.
+    search_vector = Column(Text().with_variant(TSVECTOR(), "postgresql"))
+    
     # Relaciones
     cliente = relationship("Cliente", backref="facturas")
     lineas = relationship("LineaFactura", back_populates="factura", cascade="all, delete-orphan")
 
+# Índice parcial para facturas pendientes de cobro (informe de antigüedad de saldos)
+Index(
+    "ix_facturas_pendientes",
+    Factura.user_id,
+    Factura.cliente_id,
+    Factura.fecha,
+    postgresql_where=Factura.estado == EstadoFactura.ENVIADA,
+    postgresql_include=["total"],
+    sqlite_where=Factura.estado == EstadoFactura.ENVIADA,
+)
+
+# Último número de factura del usuario (generate_invoice_number): recorre el índice hacia atrás
+Index("ix_facturas_user_numero", Factura.user_id, Factura.numero)
+
+# Índice GIN para la búsqueda de texto completo (solo Postgres)
+Index(
+    "ix_facturas_search_vector",
+    Factura.search_vector,
+    postgresql_using="gin",
+).ddl_if(dialect="postgresql")
+
 class LineaFactura(Base):
     __tablename__ = "lineas_factura"
     
     id = Column(Integer, primary_key=True, index=True)
-    factura_id = Column(Integer, ForeignKey("facturas.id"), nullable=False)
+    factura_id = Column(Integer, ForeignKey("facturas.id"), nullable=False, index=True)
     producto_id = Column(Integer, ForeignKey("productos.id"), nullable=False)
     
     descripcion = Column(Text)
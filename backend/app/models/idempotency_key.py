@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, UniqueConstraint
+from app.db.database import Base
+from app.models.base import TimestampMixin, UserOwnedMixin
+
+class IdempotencyKey(Base, TimestampMixin, UserOwnedMixin):
+    """Clave Idempotency-Key de una petición de creación y la respuesta que produjo.
+    
+    Mientras ``status_code`` es nulo la petición original está en curso;
+    los reintentos esperan a que termine y reciben la misma respuesta.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(255), nullable=False)
+    endpoint = Column(String(100), nullable=False)  # "POST /api/facturas/"
+    fingerprint = Column(String(64), nullable=False)  # sha256 del endpoint y el cuerpo
+    status_code = Column(Integer)
+    response_body = Column(Text)
+    # Si quien la procesa no termina antes, otro reintento puede tomar el relevo
+    locked_until = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+# Limpieza de claves caducadas
+Index("ix_idempotency_keys_expires_at", IdempotencyKey.expires_at)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, UniqueConstraint
+from app.db.database import Base
+from app.models.base import UserOwnedMixin
+
+class ProductCatalogVersion(Base, UserOwnedMixin):
+    """Versión del catálogo de productos de un tenant.
+    
+    El router de productos la incrementa en la misma transacción que cada
+    alta, cambio o borrado; ``ProductCatalog`` la compara con la de su copia
+    en memoria, así todos los procesos ven las escrituras de los demás.
+    """
+    __tablename__ = "product_catalog_versions"
+    __table_args__ = (UniqueConstraint("user_id", name="uq_product_catalog_versions_user"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -1,9 +1,10 @@
 from sqlalchemy import Column, Integer, String, Text, Numeric, Boolean
 from app.db.database import Base
-from app.models.base import TimestampMixin, UserOwnedMixin
+from app.models.base import TimestampMixin, UserOwnedMixin, SearchableMixin, trigram_index
 
-class Producto(Base, TimestampMixin, UserOwnedMixin):
+class Producto(Base, TimestampMixin, UserOwnedMixin, SearchableMixin):
     __tablename__ = "productos"
+    __search_fields__ = ("nombre", "codigo", "descripcion")
     
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String(200), nullable=False)
@@ -12,4 +13,6 @@ class Producto(Base, TimestampMixin, UserOwnedMixin):
     tipo_iva = Column(Numeric(5, 2), default=21.00)
     es_servicio = Column(Boolean, default=False)
     codigo = Column(String(50))
-    activo = Column(Boolean, default=True)
\ No newline at end of file
+    activo = Column(Boolean, default=True)
+
+trigram_index("ix_productos_search_text", Producto.search_text)
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum
+from app.db.database import Base
+from app.models.base import TimestampMixin, UserOwnedMixin
+import enum
+
+class EstadoPurga(str, enum.Enum):
+    PENDIENTE = "pendiente"
+    EN_CURSO = "en_curso"
+    COMPLETADA = "completada"
+    FALLIDA = "fallida"
+
+class TenantPurge(Base, TimestampMixin, UserOwnedMixin):
+    """Borrado (o archivado y borrado) por tramos de los datos de un tenant.
+    
+    El progreso se guarda en la misma transacción que borra cada tramo, así
+    que una purga interrumpida continúa exactamente donde se quedó. Solo
+    una ejecución a la vez: la que la reclama (``owner``) renueva
+    ``locked_until`` en cada tramo y otra solo puede retomarla cuando vence.
+    """
+    __tablename__ = "tenant_purges"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    mode = Column(String(20), nullable=False, default="delete")  # delete | archive
+    estado = Column(Enum(EstadoPurga), nullable=False, default=EstadoPurga.PENDIENTE)
+    step = Column(String(50))  # tabla en curso
+    chunks = Column(Integer, nullable=False, default=0)
+    totals = Column(Text)  # JSON: filas por tabla al empezar
+    deleted = Column(Text)  # JSON: filas borradas por tabla
+    archive_path = Column(String(500))
+    error = Column(Text)
+    owner = Column(String(64))  # ejecución que tiene la purga (token aleatorio)
+    locked_until = Column(DateTime(timezone=True))  # se renueva en cada tramo
+    finished_at = Column(DateTime(timezone=True))
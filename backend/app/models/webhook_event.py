@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+import enum
+
+class EstadoWebhook(str, enum.Enum):
+    PENDIENTE = "pendiente"
+    PROCESANDO = "procesando"
+    PROCESADO = "procesado"
+    IGNORADO = "ignorado"
+    FALLIDO = "fallido"
+
+class WebhookEvent(Base):
+    """Bandeja de entrada de webhooks: se guardan al recibirlos y se procesan en segundo plano"""
+    __tablename__ = "webhook_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String(50), nullable=False)  # "clerk"
+    # Id de entrega (svix-id): los reintentos del emisor repiten el mismo id
+    delivery_id = Column(String(100), nullable=False, unique=True)
+    event_type = Column(String(100), nullable=False)
+    user_id = Column(String, index=True)  # tenant afectado, si el evento lo indica
+    payload = Column(Text, nullable=False)
+    
+    estado = Column(Enum(EstadoWebhook), nullable=False, default=EstadoWebhook.PENDIENTE)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    # Siguiente intento (reintentos con espera) o fin del bloqueo de quien lo procesa
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True))
+
+# Cola de trabajo: eventos pendientes por orden de llegada
+Index("ix_webhook_events_cola", WebhookEvent.estado, WebhookEvent.available_at, WebhookEvent.id)
@@ -1,8 +1,10 @@
-from .cliente import ClienteBase, ClienteCreate, ClienteUpdate, ClienteResponse
-from .producto import ProductoBase, ProductoCreate, ProductoUpdate, ProductoResponse
+from .cliente import ClienteBase, ClienteCreate, ClienteUpdate, ClienteResponse, ClienteAutocomplete
+from .producto import ProductoBase, ProductoCreate, ProductoUpdate, ProductoResponse, ProductoAutocomplete
 from .factura import (
     FacturaBase, FacturaCreate, FacturaUpdate, FacturaResponse, FacturaListResponse,
-    LineaFacturaBase, LineaFacturaCreate, LineaFacturaUpdate, LineaFacturaResponse
+    LineaFacturaBase, LineaFacturaCreate, LineaFacturaEdit, LineaFacturaUpdate, LineaFacturaResponse,
+    FacturaEstadoFiltro, FacturaEstadoBulk, FacturaEstadoResultado, FacturaEstadoBulkResponse,
+    AgingBuckets, AgingClienteResponse, AgingReportResponse
 )
 
 __all__ = [
@@ -10,10 +12,12 @@ __all__ = [
     "ClienteCreate", 
     "ClienteUpdate",
     "ClienteResponse",
+    "ClienteAutocomplete",
     "ProductoBase",
     "ProductoCreate",
     "ProductoUpdate",
     "ProductoResponse",
+    "ProductoAutocomplete",
     "FacturaBase",
     "FacturaCreate",
     "FacturaUpdate",
@@ -21,6 +25,14 @@ __all__ = [
     "FacturaListResponse",
     "LineaFacturaBase",
     "LineaFacturaCreate",
+    "LineaFacturaEdit",
     "LineaFacturaUpdate",
-    "LineaFacturaResponse"
+    "LineaFacturaResponse",
+    "FacturaEstadoFiltro",
+    "FacturaEstadoBulk",
+    "FacturaEstadoResultado",
+    "FacturaEstadoBulkResponse",
+    "AgingBuckets",
+    "AgingClienteResponse",
+    "AgingReportResponse"
 ]
\ No newline at end of file
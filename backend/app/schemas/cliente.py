@@ -31,4 +31,10 @@ class ClienteResponse(ClienteBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class ClienteAutocomplete(BaseModel):
+    id: int
+    nombre: str
+    nif: Optional[str] = None
+    email: Optional[str] = None
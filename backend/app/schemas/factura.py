@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional
 from datetime import date, datetime
 from decimal import Decimal
@@ -14,6 +14,10 @@ class LineaFacturaBase(BaseModel):
 class LineaFacturaCreate(LineaFacturaBase):
     pass
 
+class LineaFacturaEdit(LineaFacturaCreate):
+    """Línea enviada al editar una factura: con ``id`` actualiza esa línea, sin ``id`` es nueva"""
+    id: Optional[int] = None
+
 class LineaFacturaUpdate(LineaFacturaBase):
     producto_id: Optional[int] = None
     cantidad: Optional[Decimal] = Field(None, gt=0, decimal_places=2)
@@ -42,7 +46,35 @@ class FacturaUpdate(BaseModel):
     fecha: Optional[date] = None
     estado: Optional[EstadoFactura] = None
     notas: Optional[str] = None
-    lineas: Optional[List[LineaFacturaCreate]] = None
+    lineas: Optional[List[LineaFacturaEdit]] = None
+
+class FacturaEstadoFiltro(BaseModel):
+    estado: Optional[EstadoFactura] = None
+    cliente_id: Optional[int] = None
+    fecha_desde: Optional[date] = None
+    fecha_hasta: Optional[date] = None
+
+class FacturaEstadoBulk(BaseModel):
+    """Cambio de estado en lote: lista de ids o filtro (uno de los dos)"""
+    estado: EstadoFactura
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=1000)
+    filtro: Optional[FacturaEstadoFiltro] = None
+    
+    @model_validator(mode="after")
+    def ids_o_filtro(self):
+        if (self.ids is None) == (self.filtro is None):
+            raise ValueError("Indica 'ids' o 'filtro'")
+        return self
+
+class FacturaEstadoResultado(BaseModel):
+    id: int
+    resultado: str  # actualizada | sin_cambios | no_permitida | no_encontrada
+    estado: Optional[EstadoFactura]
+
+class FacturaEstadoBulkResponse(BaseModel):
+    estado: EstadoFactura
+    actualizadas: int
+    resultados: List[FacturaEstadoResultado]
 
 class FacturaResponse(FacturaBase):
     id: int
@@ -69,4 +101,24 @@ class FacturaListResponse(BaseModel):
     created_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class AgingBuckets(BaseModel):
+    d0_30: Decimal
+    d31_60: Decimal
+    d61_90: Decimal
+    d90_mas: Decimal
+
+class AgingClienteResponse(AgingBuckets):
+    cliente_id: int
+    cliente_nombre: str
+    num_facturas: int
+    dias_max: int
+    ranking: int
+    total_pendiente: Decimal
+
+class AgingReportResponse(BaseModel):
+    fecha_corte: date
+    clientes: List[AgingClienteResponse]
+    totales: AgingBuckets
+    total_pendiente: Decimal
@@ -30,4 +30,12 @@ class ProductoResponse(ProductoBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class ProductoAutocomplete(BaseModel):
+    id: int
+    nombre: str
+    codigo: Optional[str] = None
+    precio: Decimal
+    tipo_iva: Decimal
+    es_servicio: bool
@@ -0,0 +1,112 @@
+from typing import Dict, List
+from datetime import date
+from decimal import Decimal
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case, literal, select, and_
+from app.models.cliente import Cliente
+from app.models.factura import Factura, EstadoFactura
+from app.core.money import from_cents, to_cents
+
+# Age buckets (upper bound in days, inclusive). The last one is open-ended.
+AGING_BUCKETS = [
+    ("d0_30", 30),
+    ("d31_60", 60),
+    ("d61_90", 90),
+    ("d90_mas", None),
+]
+
+
+def _money(value) -> Decimal:
+    # SQLite returns the sums as floats: read them back as exact cents
+    return from_cents(to_cents(value))
+
+
+class AgingReportService:
+    """Accounts-receivable aging computed in a single set-based query"""
+
+    @staticmethod
+    def _age_days(dialect: str, as_of: date):
+        """Days elapsed between the invoice date and the cut-off date"""
+        if dialect == "sqlite":
+            return func.julianday(literal(as_of.isoformat())) - func.julianday(Factura.fecha)
+        # PostgreSQL: date - date yields an integer number of days
+        return literal(as_of) - Factura.fecha
+
+    @staticmethod
+    def get_aging_report(db: Session, user_id: str, as_of: date) -> Dict:
+        """Outstanding ENVIADA invoices grouped by client and age bucket.
+
+        Bucketing, per-client totals, grand totals and ranking are all done
+        by the database; only one row per client comes back. Backed by the
+        partial index ``ix_facturas_pendientes``.
+        """
+        age = AgingReportService._age_days(db.get_bind().dialect.name, as_of)
+
+        pendientes = select(
+            Factura.cliente_id,
+            Factura.total,
+            age.label("dias"),
+        ).where(
+            Factura.user_id == user_id,
+            Factura.estado == EstadoFactura.ENVIADA,
+        ).subquery()
+
+        bucket_columns = []
+        lower = None
+        for name, upper in AGING_BUCKETS:
+            conditions = []
+            if lower is not None:
+                conditions.append(pendientes.c.dias > lower)
+            if upper is not None:
+                conditions.append(pendientes.c.dias <= upper)
+            bucket = func.coalesce(
+                func.sum(case((and_(*conditions), pendientes.c.total), else_=0)), 0
+            )
+            bucket_columns.append((name, bucket))
+            lower = upper
+
+        total_pendiente = func.coalesce(func.sum(pendientes.c.total), 0)
+
+        query = select(
+            pendientes.c.cliente_id,
+            Cliente.nombre.label("cliente_nombre"),
+            func.count().label("num_facturas"),
+            func.max(pendientes.c.dias).label("dias_max"),
+            *[bucket.label(name) for name, bucket in bucket_columns],
+            total_pendiente.label("total_pendiente"),
+            # Grand totals travel along each row as window aggregates
+            *[func.sum(bucket).over().label(f"global_{name}") for name, bucket in bucket_columns],
+            func.sum(total_pendiente).over().label("global_total"),
+            func.rank().over(order_by=total_pendiente.desc()).label("ranking"),
+        ).join(
+            Cliente, Cliente.id == pendientes.c.cliente_id
+        ).group_by(
+            pendientes.c.cliente_id, Cliente.nombre
+        ).order_by(
+            total_pendiente.desc(), pendientes.c.cliente_id
+        )
+
+        rows = db.execute(query).mappings().all()
+
+        clientes: List[Dict] = []
+        for row in rows:
+            clientes.append({
+                "cliente_id": row["cliente_id"],
+                "cliente_nombre": row["cliente_nombre"],
+                "num_facturas": row["num_facturas"],
+                "dias_max": int(row["dias_max"] or 0),
+                "ranking": row["ranking"],
+                **{name: _money(row[name]) for name, _ in AGING_BUCKETS},
+                "total_pendiente": _money(row["total_pendiente"]),
+            })
+
+        first = rows[0] if rows else {}
+        totales = {name: _money(first.get(f"global_{name}")) for name, _ in AGING_BUCKETS}
+        total = _money(first.get("global_total"))
+
+        return {
+            "fecha_corte": as_of,
+            "clientes": clientes,
+            "totales": totales,
+            "total_pendiente": total,
+        }
@@ -0,0 +1,166 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple, Type
+from collections import OrderedDict
+import bisect
+import threading
+import time
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.text import normalize
+from app.models import Cliente, Producto
+
+# Match tiers, best first: whole name, any word of the name, code / NIF
+_TIERS = 3
+
+
+class PrefixIndex:
+    """Sorted ``(key, id)`` lists of one tenant's rows for prefix lookups.
+
+    A lookup bisects to the prefix in each tier and walks forward while keys
+    still match, so it costs O(log n + k) regardless of the catalog size.
+    """
+
+    def __init__(self):
+        self._keys: List[List[Tuple[str, int]]] = [[] for _ in range(_TIERS)]
+        self._entries: Dict[int, Tuple[Dict[str, Any], List[Tuple[int, str]]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, row_id: int, name: str, codes: Sequence[Optional[str]], payload: Dict[str, Any]) -> None:
+        self.remove(row_id)
+        name = normalize(name)
+        keys = [(0, name)] + [(1, word) for word in name.split()[1:]]
+        keys += [(2, normalize(code)) for code in codes if code]
+        keys = [(tier, key) for tier, key in keys if key]
+        for tier, key in keys:
+            bisect.insort(self._keys[tier], (key, row_id))
+        self._entries[row_id] = (payload, keys)
+
+    def remove(self, row_id: int) -> None:
+        entry = self._entries.pop(row_id, None)
+        if entry is None:
+            return
+        for tier, key in entry[1]:
+            keys = self._keys[tier]
+            index = bisect.bisect_left(keys, (key, row_id))
+            if index < len(keys) and keys[index] == (key, row_id):
+                del keys[index]
+
+    def search(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results: List[Dict[str, Any]] = []
+        seen: Set[int] = set()
+        for keys in self._keys:
+            index = bisect.bisect_left(keys, (prefix, -1))
+            while index < len(keys) and len(results) < limit:
+                key, row_id = keys[index]
+                if not key.startswith(prefix):
+                    break
+                if row_id not in seen:
+                    seen.add(row_id)
+                    results.append(self._entries[row_id][0])
+                index += 1
+            if len(results) >= limit:
+                break
+        return results
+
+
+class AutocompleteIndex:
+    """Per-tenant prefix indexes for one model, loaded on first use.
+
+    The routers that write the model keep loaded indexes in sync after each
+    commit. Writes made by other processes (other workers, scripts) are
+    picked up when a tenant's index is older than ``ttl`` seconds and gets
+    reloaded. At most ``max_tenants`` indexes are kept (least recently used
+    are dropped).
+    """
+
+    def __init__(
+        self,
+        model: Type,
+        fields: Sequence[str],
+        codes: Sequence[str],
+        include: Optional[Callable[[Any], bool]] = None,
+        where: Sequence[Any] = (),
+        ttl: float = 30,
+        max_tenants: int = 1000,
+    ):
+        self.model = model
+        self.fields = tuple(fields)
+        self.codes = tuple(codes)
+        self.include = include
+        self.where = tuple(where)
+        self.ttl = ttl
+        self.max_tenants = max_tenants
+        self._tenants: "OrderedDict[str, Tuple[float, PrefixIndex]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _add(self, index: PrefixIndex, row: Any) -> None:
+        payload = {field: getattr(row, field) for field in self.fields}
+        index.add(payload["id"], payload["nombre"], [getattr(row, code) for code in self.codes], payload)
+
+    def _load(self, db: Session, user_id: str) -> PrefixIndex:
+        columns = {name: getattr(self.model, name) for name in dict.fromkeys(self.fields + self.codes)}
+        rows = db.query(*columns.values()).filter(self.model.user_id == user_id, *self.where).all()
+        index = PrefixIndex()
+        for row in rows:
+            self._add(index, row)
+        return index
+
+    def search(self, db: Session, user_id: str, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            cached = self._tenants.get(user_id)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl:
+                self._tenants.move_to_end(user_id)
+                return cached[1].search(prefix, limit)
+        index = self._load(db, user_id)
+        with self._lock:
+            self._tenants[user_id] = (time.monotonic(), index)
+            self._tenants.move_to_end(user_id)
+            while len(self._tenants) > self.max_tenants:
+                self._tenants.popitem(last=False)
+            return index.search(prefix, limit)
+
+    def upsert(self, user_id: str, obj: Any) -> None:
+        """Reflect a created or updated row (call after commit)"""
+        with self._lock:
+            cached = self._tenants.get(user_id)
+            if cached is None:
+                return
+            if self.include is not None and not self.include(obj):
+                cached[1].remove(obj.id)
+            else:
+                self._add(cached[1], obj)
+
+    def remove(self, user_id: str, row_id: int) -> None:
+        """Reflect a deleted row (call after commit)"""
+        with self._lock:
+            cached = self._tenants.get(user_id)
+            if cached is not None:
+                cached[1].remove(row_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tenants.clear()
+
+
+producto_autocomplete = AutocompleteIndex(
+    Producto,
+    fields=("id", "nombre", "codigo", "precio", "tipo_iva", "es_servicio"),
+    codes=("codigo",),
+    include=lambda producto: producto.activo,
+    where=(Producto.activo == True,),
+    ttl=settings.AUTOCOMPLETE_TTL,
+    max_tenants=settings.AUTOCOMPLETE_MAX_TENANTS,
+)
+
+cliente_autocomplete = AutocompleteIndex(
+    Cliente,
+    fields=("id", "nombre", "nif", "email"),
+    codes=("nif",),
+    ttl=settings.AUTOCOMPLETE_TTL,
+    max_tenants=settings.AUTOCOMPLETE_MAX_TENANTS,
+)
@@ -0,0 +1,107 @@
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+from collections import OrderedDict
+import threading
+import time
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import Producto, ProductCatalogVersion
+
+# INSERT ... ON CONFLICT DO UPDATE per dialect
+_UPSERT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class CatalogProduct(NamedTuple):
+    id: int
+    nombre: str
+
+
+class ProductCatalog:
+    """Per-tenant ``{id: product}`` maps used to validate invoice lines.
+
+    The productos router bumps the tenant's ``ProductCatalogVersion`` row in
+    the same transaction as each write (``bump``). A cached catalog is used
+    only while that version is unchanged (one lookup by the unique
+    ``user_id``, so writes made by other workers are seen at once) and it is
+    younger than ``ttl`` seconds. Ids missing from a cached catalog trigger
+    one reload before they are reported as not found. At most
+    ``max_tenants`` catalogs are kept (least recently used are dropped).
+    """
+
+    def __init__(self, ttl: float = 60, max_tenants: int = 1000):
+        self.ttl = ttl
+        self.max_tenants = max_tenants
+        self._tenants: "OrderedDict[str, Tuple[int, float, Dict[int, CatalogProduct]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(db: Session, user_id: str) -> int:
+        version = db.query(ProductCatalogVersion.version).filter(ProductCatalogVersion.user_id == user_id).scalar()
+        return version or 0
+
+    @staticmethod
+    def bump(db: Session, user_id: str) -> None:
+        """Increment the tenant's version in the current transaction (before committing a product write).
+
+        One upsert statement on PostgreSQL and SQLite (``ON CONFLICT``).
+        """
+        dialect = db.get_bind().dialect.name
+        if dialect in _UPSERT:
+            statement = _UPSERT[dialect](ProductCatalogVersion).values(user_id=user_id, version=1)
+            db.execute(statement.on_conflict_do_update(
+                index_elements=[ProductCatalogVersion.user_id],
+                set_={"version": ProductCatalogVersion.version + 1},
+            ))
+            return
+        query = db.query(ProductCatalogVersion).filter(ProductCatalogVersion.user_id == user_id)
+        if not query.update({ProductCatalogVersion.version: ProductCatalogVersion.version + 1}, synchronize_session=False):
+            db.add(ProductCatalogVersion(user_id=user_id, version=1))
+
+    def _cached(self, user_id: str, version: int) -> Optional[Dict[int, CatalogProduct]]:
+        with self._lock:
+            cached = self._tenants.get(user_id)
+            if cached is None:
+                return None
+            cached_version, loaded_at, products = cached
+            if cached_version != version or time.monotonic() - loaded_at >= self.ttl:
+                del self._tenants[user_id]
+                return None
+            self._tenants.move_to_end(user_id)
+            return products
+
+    def _load(self, db: Session, user_id: str, version: int) -> Dict[int, CatalogProduct]:
+        rows = db.query(Producto.id, Producto.nombre).filter(Producto.user_id == user_id).all()
+        products = {row.id: CatalogProduct(row.id, row.nombre) for row in rows}
+        # Stored under the version read before loading: a write that lands in
+        # between changes the version, so the next call reloads
+        with self._lock:
+            self._tenants[user_id] = (version, time.monotonic(), products)
+            self._tenants.move_to_end(user_id)
+            while len(self._tenants) > self.max_tenants:
+                self._tenants.popitem(last=False)
+        return products
+
+    def get(self, db: Session, user_id: str, ids: Iterable[int]) -> Dict[int, CatalogProduct]:
+        """Products among ``ids`` that belong to the tenant (unknown ids are left out)"""
+        ids = set(ids)
+        version = self._version(db, user_id)
+        products = self._cached(user_id, version)
+        if products is None or not ids <= products.keys():
+            products = self._load(db, user_id, version)
+        return {product_id: products[product_id] for product_id in ids if product_id in products}
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop the tenant's catalog (call after committing a product write)"""
+        with self._lock:
+            self._tenants.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tenants.clear()
+
+
+product_catalog = ProductCatalog(
+    ttl=settings.PRODUCT_CATALOG_TTL,
+    max_tenants=settings.PRODUCT_CATALOG_MAX_TENANTS,
+)
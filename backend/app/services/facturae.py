@@ -0,0 +1,163 @@
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from datetime import date
+from types import SimpleNamespace
+import re
+import zipfile
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.models import Cliente, Factura, LineaFactura, PerfilEmpresa
+from app.utils.facturae import FacturaeWriter
+from app.utils.pdf import InvoiceGenerator
+
+# Rows fetched per round trip by the streaming queries
+FETCH_SIZE = 500
+
+_CLIENTE_COLUMNS = ("id", "nombre", "nif", "direccion", "codigo_postal", "ciudad", "pais", "email", "telefono")
+_FACTURA_COLUMNS = ("id", "numero", "fecha", "estado", "notas", "subtotal", "total_iva", "total")
+_LINEA_COLUMNS = ("id", "factura_id", "descripcion", "cantidad", "precio_unitario", "tipo_iva", "subtotal")
+
+
+class MissingTaxId(ValueError):
+    """Facturae requires the NIF of both parties"""
+
+
+class _ZipStream:
+    """Unseekable write target for ``zipfile``: collects the bytes to send next"""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def filename(numero: str) -> str:
+    return "factura_" + re.sub(r"[^\w.-]", "_", numero) + ".xml"
+
+
+class FacturaeExportService:
+    """Facturae export of one invoice or a streamed ZIP of many.
+
+    Invoices and their lines are read with two ordered, server-side
+    streamed queries that are merged as they are consumed, so a batch costs
+    three statements (with the company profile) and holds one invoice in
+    memory at a time, whatever its size.
+    """
+
+    @staticmethod
+    def _criteria(
+        user_id: str,
+        ids: Optional[Sequence[int]] = None,
+        estado: Optional[str] = None,
+        cliente_id: Optional[int] = None,
+        fecha_desde: Optional[date] = None,
+        fecha_hasta: Optional[date] = None,
+    ) -> List[Any]:
+        criteria = [Factura.user_id == user_id]
+        if ids is not None:
+            criteria.append(Factura.id.in_(set(ids)))
+        if estado:
+            criteria.append(Factura.estado == estado)
+        if cliente_id:
+            criteria.append(Factura.cliente_id == cliente_id)
+        if fecha_desde:
+            criteria.append(Factura.fecha >= fecha_desde)
+        if fecha_hasta:
+            criteria.append(Factura.fecha <= fecha_hasta)
+        return criteria
+
+    @staticmethod
+    def iter_facturas(db: Session, user_id: str, **filters) -> Iterator[SimpleNamespace]:
+        """Invoices (ordered by id) shaped like ``Factura`` with ``cliente`` and ``lineas``"""
+        criteria = FacturaeExportService._criteria(user_id, **filters)
+        facturas = db.execute(
+            select(
+                *(getattr(Factura, c) for c in _FACTURA_COLUMNS),
+                *(getattr(Cliente, c).label(f"cliente_{c}") for c in _CLIENTE_COLUMNS),
+            )
+            .join(Cliente, Factura.cliente_id == Cliente.id)
+            .where(*criteria)
+            .order_by(Factura.id)
+            .execution_options(yield_per=FETCH_SIZE)
+        )
+        lineas = db.execute(
+            select(*(getattr(LineaFactura, c) for c in _LINEA_COLUMNS))
+            .join(Factura, LineaFactura.factura_id == Factura.id)
+            .where(*criteria)
+            .order_by(LineaFactura.factura_id, LineaFactura.id)
+            .execution_options(yield_per=FETCH_SIZE)
+        )
+        pending = next(lineas, None)
+        try:
+            for row in facturas:
+                factura_lineas = []
+                while pending is not None and pending.factura_id <= row.id:
+                    if pending.factura_id == row.id:
+                        factura_lineas.append(pending)
+                    pending = next(lineas, None)
+                yield SimpleNamespace(
+                    **{c: getattr(row, c) for c in _FACTURA_COLUMNS},
+                    cliente=SimpleNamespace(**{c: getattr(row, f"cliente_{c}") for c in _CLIENTE_COLUMNS}),
+                    lineas=factura_lineas,
+                )
+        finally:
+            facturas.close()
+            lineas.close()
+
+    @staticmethod
+    def invoice_data(factura: Any, perfil_empresa: PerfilEmpresa) -> Dict[str, Any]:
+        data = InvoiceGenerator._prepare_invoice_data(factura, perfil_empresa)
+        if not (data["cliente"]["nif"] or "").strip():
+            raise MissingTaxId(f"El cliente {data['cliente']['nombre']} no tiene NIF")
+        return data
+
+    @staticmethod
+    def stream_xml(data: Dict[str, Any]) -> Iterator[bytes]:
+        return FacturaeWriter(data).stream()
+
+    @staticmethod
+    def stream_zip(facturas: Iterator[Any], perfil_empresa: PerfilEmpresa) -> Iterator[bytes]:
+        """ZIP with one Facturae XML per invoice, yielded as it is compressed.
+
+        Invoices that cannot be exported (client without NIF) are listed in
+        ``errores.txt`` inside the archive instead of failing the download.
+        """
+        output = _ZipStream()
+        errores = []
+        with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for factura in facturas:
+                try:
+                    data = FacturaeExportService.invoice_data(factura, perfil_empresa)
+                except MissingTaxId as e:
+                    errores.append(f"{factura.numero}: {e}")
+                    continue
+                with archive.open(filename(factura.numero), "w") as entry:
+                    for chunk in FacturaeExportService.stream_xml(data):
+                        entry.write(chunk)
+                        compressed = output.drain()
+                        if compressed:
+                            yield compressed
+            if errores:
+                archive.writestr("errores.txt", "\n".join(errores) + "\n")
+        yield output.drain()
+
+    @staticmethod
+    def stream_batch(user_id: str, perfil_empresa: PerfilEmpresa, **filters) -> Iterator[bytes]:
+        """``stream_zip`` of the selected invoices with its own session (for streamed responses)"""
+        db = SessionLocal()
+        try:
+            facturas = FacturaeExportService.iter_facturas(db, user_id, **filters)
+            yield from FacturaeExportService.stream_zip(facturas, perfil_empresa)
+        finally:
+            db.close()
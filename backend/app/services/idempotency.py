@@ -0,0 +1,228 @@
+from typing import Callable, Generator, Optional, Tuple, Union
+from datetime import datetime, timedelta, timezone
+import asyncio
+import hashlib
+import time
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy import and_, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import idempotency_requests_total
+from app.core.query_budget import count_queries
+from app.core.serialization import dumps, json_response
+from app.models import IdempotencyKey
+
+# Seconds between two sweeps of expired keys in a process
+PURGE_INTERVAL = 600
+
+# Polling of a request that is still being processed elsewhere
+POLL_INITIAL = 0.05
+POLL_MAX = 0.5
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyService:
+    """``Idempotency-Key`` handling for create endpoints.
+
+    The first request with a key claims it (one INSERT, committed at once so
+    concurrent duplicates see it), runs the endpoint and stores the response
+    in the same transaction as the endpoint's own writes. Retries with the
+    same key and body get the stored response back without running the
+    endpoint; a retry that arrives while the first request is still running
+    waits for it instead of doing the work twice. A claim whose request died
+    is taken over once its lease expires. Keys are scoped to the user and
+    kept for ``IDEMPOTENCY_KEY_TTL`` seconds.
+    """
+
+    _last_purge = 0.0
+
+    @staticmethod
+    def fingerprint(endpoint: str, payload: BaseModel) -> str:
+        body = dumps(payload.model_dump(mode="json"))
+        return hashlib.sha256(endpoint.encode() + b"\n" + body).hexdigest()
+
+    @staticmethod
+    def purge_expired(db: Session) -> int:
+        """Delete expired keys (at most once every ``PURGE_INTERVAL`` seconds per process)"""
+        if time.monotonic() - IdempotencyService._last_purge < PURGE_INTERVAL:
+            return 0
+        IdempotencyService._last_purge = time.monotonic()
+        deleted = db.query(IdempotencyKey).filter(
+            IdempotencyKey.expires_at < datetime.now(timezone.utc)
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+    @staticmethod
+    def _claim(db: Session, user_id: str, key: str, endpoint: str, fingerprint: str) -> Tuple[str, Union[int, IdempotencyKey, None]]:
+        """One attempt at owning ``key``: ("run", record id), ("replay", record) or ("wait", None)"""
+        now = datetime.now(timezone.utc)
+        values = dict(
+            endpoint=endpoint,
+            fingerprint=fingerprint,
+            status_code=None,
+            response_body=None,
+            locked_until=now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS),
+            expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+        )
+        record = IdempotencyKey(user_id=user_id, key=key, **values)
+        db.add(record)
+        try:
+            db.flush()
+            record_id = record.id
+            db.commit()
+            return "run", record_id
+        except IntegrityError:
+            db.rollback()
+
+        record = db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id, IdempotencyKey.key == key
+        ).populate_existing().first()
+        if record is None:
+            # Released or purged in between: claim again
+            return "wait", None
+        expired = record.expires_at.replace(tzinfo=record.expires_at.tzinfo or timezone.utc) < now
+        if not expired and (record.endpoint != endpoint or record.fingerprint != fingerprint):
+            idempotency_requests_total.inc(endpoint=endpoint, result="mismatch")
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key ya usada con otra petición",
+            )
+        if not expired and record.status_code is not None:
+            return "replay", record
+
+        # Expired key or abandoned claim: take it over unless someone else just did
+        taken = db.execute(
+            update(IdempotencyKey)
+            .where(
+                IdempotencyKey.id == record.id,
+                or_(
+                    IdempotencyKey.expires_at < now,
+                    and_(IdempotencyKey.status_code.is_(None), IdempotencyKey.locked_until < now),
+                ),
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        record_id = record.id
+        db.commit()
+        return ("run", record_id) if taken else ("wait", None)
+
+    @staticmethod
+    def _poll(db: Session, user_id: str, key: str, endpoint: str, fingerprint: str) -> Tuple[str, Union[int, IdempotencyKey, None]]:
+        # Statements spent waiting for another request are kept out of this route's budget
+        with count_queries("idempotency wait"):
+            return IdempotencyService._claim(db, user_id, key, endpoint, fingerprint)
+
+    @staticmethod
+    def _execute(db: Session, record_id: int, endpoint: str, handler: Callable[[], Response]) -> Response:
+        """Run the endpoint and store its response in the same transaction as its writes"""
+        try:
+            response = handler()
+            db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.id == record_id)
+                .values(status_code=response.status_code, response_body=response.body.decode())
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Errors are not stored: release the key so the client can retry
+            db.query(IdempotencyKey).filter(IdempotencyKey.id == record_id).delete(synchronize_session=False)
+            db.commit()
+            raise
+        idempotency_requests_total.inc(endpoint=endpoint, result="stored")
+        return response
+
+    @staticmethod
+    def _replay(record: IdempotencyKey) -> Response:
+        idempotency_requests_total.inc(endpoint=record.endpoint, result="replayed")
+        return json_response(
+            record.response_body.encode(), status_code=record.status_code, headers={REPLAYED_HEADER: "true"}
+        )
+
+    @staticmethod
+    def _timeout(endpoint: str) -> HTTPException:
+        idempotency_requests_total.inc(endpoint=endpoint, result="in_progress")
+        return HTTPException(
+            status_code=409,
+            detail="Ya se está procesando una petición con esta Idempotency-Key",
+        )
+
+    @staticmethod
+    def _attempts(
+        db: Session,
+        user_id: str,
+        key: Optional[str],
+        endpoint: str,
+        payload: BaseModel,
+        handler: Callable[[], Response],
+    ) -> Generator[float, None, Response]:
+        """Claim / wait / replay loop shared by ``run`` and ``run_async``.
+
+        Yields the seconds to wait before polling again (the caller sleeps
+        the way its endpoint can) and returns the final response.
+        """
+        if not key:
+            response = handler()
+            db.commit()
+            return response
+        IdempotencyService.purge_expired(db)
+        fingerprint = IdempotencyService.fingerprint(endpoint, payload)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        delay = POLL_INITIAL
+        outcome, record = IdempotencyService._claim(db, user_id, key, endpoint, fingerprint)
+        while True:
+            if outcome == "run":
+                return IdempotencyService._execute(db, record, endpoint, handler)
+            if outcome == "replay":
+                return IdempotencyService._replay(record)
+            if time.monotonic() >= deadline:
+                raise IdempotencyService._timeout(endpoint)
+            yield delay
+            delay = min(delay * 2, POLL_MAX)
+            outcome, record = IdempotencyService._poll(db, user_id, key, endpoint, fingerprint)
+
+    @staticmethod
+    def run(
+        db: Session,
+        user_id: str,
+        key: Optional[str],
+        endpoint: str,
+        payload: BaseModel,
+        handler: Callable[[], Response],
+    ) -> Response:
+        """Run ``handler`` at most once per ``key``.
+
+        ``handler`` does the endpoint's work without committing and returns
+        the final response; it is committed here together with the stored
+        copy. Without a key the handler simply runs and is committed.
+        """
+        attempts = IdempotencyService._attempts(db, user_id, key, endpoint, payload, handler)
+        try:
+            while True:
+                time.sleep(next(attempts))
+        except StopIteration as done:
+            return done.value
+
+    @staticmethod
+    async def run_async(
+        db: Session,
+        user_id: str,
+        key: Optional[str],
+        endpoint: str,
+        payload: BaseModel,
+        handler: Callable[[], Response],
+    ) -> Response:
+        """``run`` for async endpoints: waits without blocking the event loop"""
+        attempts = IdempotencyService._attempts(db, user_id, key, endpoint, payload, handler)
+        try:
+            while True:
+                await asyncio.sleep(next(attempts))
+        except StopIteration as done:
+            return done.value
@@ -0,0 +1,174 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+from collections import defaultdict
+import base64
+from sqlalchemy import Integer, Text, and_, bindparam, case, cast, false, func, literal, literal_column, or_, update
+from sqlalchemy.orm import Query, Session
+
+from app.core.text import DOCUMENT_SEPARATOR, normalize, search_document
+from app.models import Cliente, Factura, LineaFactura
+
+# Scores are compared as integers so cursors round-trip exactly
+_SCALE = 10000
+
+
+class InvalidCursor(ValueError):
+    """The cursor was not produced by a previous page of the same search"""
+
+
+def encode_cursor(rank: int, last_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{rank}:{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, last_id = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        return int(rank), int(last_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+class SearchService:
+    """Ranked, typo-tolerant search over ``SearchableMixin.search_text``"""
+
+    # pg_trgm's default word_similarity_threshold
+    SIMILARITY_THRESHOLD = 0.6
+
+    @staticmethod
+    def search(
+        query: Query,
+        model: Type,
+        q: str,
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List, Optional[str]]:
+        """Apply search, ranking and keyset pagination to ``query``.
+
+        Matches rows that contain the normalized text, or whose words are
+        close to it (trigram word similarity, which tolerates typos). On
+        Postgres the ``<%`` operator uses the GIN trigram index; on SQLite
+        ``word_similarity`` is a Python function (see app.core.text).
+
+        Returns the page and the cursor of the next one (None on the last page).
+        """
+        term = normalize(q)
+        if not term:
+            return [], None
+
+        dialect = query.session.get_bind().dialect.name
+        search_text = model.search_text
+        contains = search_text.like(f"%{term}%")
+        similarity = func.word_similarity(term, search_text)
+        if dialect == "postgresql":
+            similar = literal(term).op("<%")(search_text)
+        else:
+            similar = similarity >= SearchService.SIMILARITY_THRESHOLD
+
+        # Substring hits first, then by closeness
+        rank = cast(
+            (similarity + case((contains, 1.0), else_=0.0)) * _SCALE, Integer
+        ).label("search_rank")
+
+        query = query.filter(or_(contains, similar)).add_columns(rank)
+        if cursor:
+            last_rank, last_id = decode_cursor(cursor)
+            query = query.filter(or_(rank < last_rank, and_(rank == last_rank, model.id > last_id)))
+        rows = query.order_by(rank.desc(), model.id).limit(limit + 1).all()
+
+        page = [row[0] for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last_row = rows[limit - 1]
+            next_cursor = encode_cursor(last_row[1], last_row[0].id)
+        return page, next_cursor
+
+
+# Text search configuration: no stemming or stop words, the text is already normalized
+_TS_CONFIG = literal_column("'simple'")
+_WEIGHTS = ("A", "B", "C")
+
+
+class FacturaSearchService:
+    """Full-text search over invoice number, client name, line descriptions and notes.
+
+    ``Factura.search_vector`` is a tsvector on Postgres (GIN indexed) and a
+    normalized ``a|b|c`` string elsewhere, ranked by ``prefix_rank`` (see
+    app.core.text). Text is normalized in Python before it is indexed, so
+    search is accent-insensitive on both.
+    """
+
+    @staticmethod
+    def document_parts(numero: str, cliente_nombre: str, notas: Optional[str], descripciones: Iterable[Optional[str]]) -> List[str]:
+        return [search_document(numero, cliente_nombre), search_document(*descripciones), search_document(notas)]
+
+    @staticmethod
+    def document(dialect: str, parts: List[Any]) -> Any:
+        """SQL value of ``search_vector`` for the parts (strings or bind parameters)"""
+        if dialect == "postgresql":
+            vector = None
+            for weight, part in zip(_WEIGHTS, parts):
+                weighted = func.setweight(func.to_tsvector(_TS_CONFIG, part), literal_column(f"'{weight}'"))
+                vector = weighted if vector is None else vector.op("||")(weighted)
+            return vector
+        if all(isinstance(part, str) for part in parts):
+            return DOCUMENT_SEPARATOR.join(parts)
+        document = parts[0]
+        for part in parts[1:]:
+            document = document + DOCUMENT_SEPARATOR + part
+        return document
+
+    @staticmethod
+    def build(db: Session, numero: str, cliente_nombre: str, notas: Optional[str], descripciones: Iterable[Optional[str]]) -> Any:
+        """Value to assign to ``Factura.search_vector`` when the data is already in memory"""
+        parts = FacturaSearchService.document_parts(numero, cliente_nombre, notas, descripciones)
+        return FacturaSearchService.document(db.get_bind().dialect.name, parts)
+
+    @staticmethod
+    def refresh(db: Session, *criteria) -> int:
+        """Rebuild ``search_vector`` of the invoices matching ``criteria``.
+
+        Three statements whatever the number of invoices: invoices with their
+        client, their lines, and one executemany UPDATE. ``updated_at`` is
+        left alone. Pending changes must be flushed first.
+        """
+        facturas = db.query(Factura.id, Factura.numero, Factura.notas, Cliente.nombre).join(Cliente).filter(*criteria).all()
+        if not facturas:
+            return 0
+        descripciones: Dict[int, List[Optional[str]]] = defaultdict(list)
+        lineas = db.query(LineaFactura.factura_id, LineaFactura.descripcion).join(Factura).filter(*criteria)
+        for factura_id, descripcion in lineas.order_by(LineaFactura.id):
+            descripciones[factura_id].append(descripcion)
+
+        table = Factura.__table__
+        parts = [bindparam(f"part_{weight}", type_=Text) for weight in _WEIGHTS]
+        statement = update(table).where(table.c.id == bindparam("factura_id")).values(
+            search_vector=FacturaSearchService.document(db.get_bind().dialect.name, parts),
+            updated_at=table.c.updated_at,
+        )
+        db.execute(statement, [
+            {
+                "factura_id": factura.id,
+                **dict(zip(
+                    (f"part_{weight}" for weight in _WEIGHTS),
+                    FacturaSearchService.document_parts(factura.numero, factura.nombre, factura.notas, descripciones[factura.id]),
+                )),
+            }
+            for factura in facturas
+        ])
+        return len(facturas)
+
+    @staticmethod
+    def search(query: Query, q: str) -> Tuple[Query, Any]:
+        """Filter ``query`` to invoices matching every word of ``q`` (as a prefix).
+
+        Returns the filtered query and the rank expression to order by.
+        """
+        terms = normalize(q).split()
+        if not terms:
+            return query.filter(false()), literal(0)
+        if query.session.get_bind().dialect.name == "postgresql":
+            tsquery = func.to_tsquery(_TS_CONFIG, " & ".join(f"{term}:*" for term in terms))
+            rank = func.ts_rank(Factura.search_vector, tsquery)
+            return query.filter(Factura.search_vector.op("@@")(tsquery)), rank
+        rank = func.prefix_rank(Factura.search_vector, " ".join(terms))
+        return query.filter(rank > 0), rank
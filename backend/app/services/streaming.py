@@ -0,0 +1,43 @@
+from typing import Iterator, Optional
+from fastapi.responses import StreamingResponse
+from sqlalchemy.sql import Select
+
+from app.core.etag import etag_headers
+from app.core.serialization import NDJSON_MEDIA_TYPE, NDJSONEncoder
+from app.db.database import SessionLocal
+
+# Rows fetched per round trip, and encoded and sent per chunk
+FETCH_SIZE = 500
+
+
+class NDJSONStreamService:
+    """Newline-delimited JSON mode of the list endpoints.
+
+    The list query runs with ``yield_per`` (a server-side cursor on
+    PostgreSQL) and each batch of rows is encoded and sent as soon as it is
+    fetched, so neither the rows nor the response body are held in memory
+    whatever the size of the list. The rows are read in a session of their
+    own: the request's session is closed before a streamed body is sent.
+    """
+
+    @staticmethod
+    def stream(statement: Select, encoder: NDJSONEncoder) -> Iterator[bytes]:
+        db = SessionLocal()
+        try:
+            result = db.execute(statement.execution_options(yield_per=FETCH_SIZE))
+            try:
+                for rows in result.partitions():
+                    yield encoder.encode(rows)
+            finally:
+                result.close()
+        finally:
+            db.close()
+
+    @staticmethod
+    def response(statement: Select, encoder: NDJSONEncoder, etag: Optional[str] = None) -> StreamingResponse:
+        headers = {"Vary": "Accept"}
+        if etag:
+            headers.update(etag_headers(etag))
+        return StreamingResponse(
+            NDJSONStreamService.stream(statement, encoder), media_type=NDJSON_MEDIA_TYPE, headers=headers
+        )
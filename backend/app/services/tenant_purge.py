@@ -0,0 +1,330 @@
+from typing import Callable, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import gzip
+import json
+import logging
+import os
+import time
+import uuid
+from sqlalchemy import or_, select, text, update
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.core.serialization import dumps
+from app.models import (
+    Cliente, EstadoPurga, Factura, IdempotencyKey, LineaFactura, PerfilEmpresa, Producto, ProductCatalogVersion, TenantPurge,
+)
+from app.services.catalog import product_catalog
+
+logger = logging.getLogger(__name__)
+
+
+def _lineas(db: Session, user_id: str) -> Query:
+    return db.query(LineaFactura.id).join(Factura, LineaFactura.factura_id == Factura.id).filter(Factura.user_id == user_id)
+
+
+def _owned(model) -> Callable[[Session, str], Query]:
+    return lambda db, user_id: db.query(model.id).filter(model.user_id == user_id)
+
+
+# Children before parents: every chunk leaves the database consistent
+STEPS = (
+    (LineaFactura, _lineas),
+    (Factura, _owned(Factura)),
+    (Cliente, _owned(Cliente)),
+    (Producto, _owned(Producto)),
+    (PerfilEmpresa, _owned(PerfilEmpresa)),
+    (IdempotencyKey, _owned(IdempotencyKey)),
+    (ProductCatalogVersion, _owned(ProductCatalogVersion)),
+)
+
+
+class PurgeInProgress(Exception):
+    """The tenant's purge is being run elsewhere (its lease has not expired)"""
+
+
+class PurgeLeaseLost(PurgeInProgress):
+    """Another run took the purge over (this run's lease expired)"""
+
+
+def _lease_expired(job: TenantPurge, now: datetime) -> bool:
+    if job.locked_until is None:
+        return True
+    return job.locked_until.replace(tzinfo=job.locked_until.tzinfo or timezone.utc) < now
+
+
+class PurgeThrottle:
+    """Spaces out purge chunks so other tenants' queries and replicas keep up.
+
+    After each chunk it sleeps long enough to keep the purge busy only
+    ``duty_cycle`` of the time (at least ``pause`` seconds). On Postgres it
+    also waits while a streaming replica is more than ``max_replication_lag``
+    seconds behind.
+    """
+
+    def __init__(self, pause: float = 0.05, duty_cycle: float = 0.5, max_replication_lag: float = 5):
+        self.pause = pause
+        self.duty_cycle = duty_cycle
+        self.max_replication_lag = max_replication_lag
+
+    def replication_lag(self, db: Session) -> float:
+        if db.get_bind().dialect.name != "postgresql":
+            return 0.0
+        try:
+            lag = db.execute(text("SELECT EXTRACT(EPOCH FROM max(replay_lag)) FROM pg_stat_replication")).scalar()
+        except SQLAlchemyError:
+            db.rollback()
+            return 0.0
+        return float(lag or 0)
+
+    def wait(self, db: Session, chunk_seconds: float) -> None:
+        idle = chunk_seconds * (1 - self.duty_cycle) / self.duty_cycle if self.duty_cycle < 1 else 0
+        time.sleep(max(self.pause, idle))
+        while self.max_replication_lag and self.replication_lag(db) > self.max_replication_lag:
+            time.sleep(1)
+
+
+class TenantPurgeService:
+    """Deletes (or archives, then deletes) all of a tenant's data in bounded chunks.
+
+    Each chunk deletes at most ``chunk_size`` rows of one table and records
+    the progress on the ``TenantPurge`` row in the same transaction, so locks
+    are held briefly and an interrupted purge resumes where it stopped.
+    Rows are deleted by primary key, children first, so bulk deletes never
+    leave orphan invoice lines. A run claims the job with a random ``owner``
+    token and renews ``locked_until`` in every chunk's transaction; another
+    run can only take the job over once that lease has expired, and a run
+    whose lease was taken stops at its next chunk.
+    """
+
+    @staticmethod
+    def start(db: Session, user_id: str, mode: str = "delete") -> TenantPurge:
+        """The tenant's unfinished purge, or a new one with the row counts to delete"""
+        if mode not in ("delete", "archive"):
+            raise ValueError(f"Unknown purge mode: {mode}")
+        job = db.query(TenantPurge).filter(
+            TenantPurge.user_id == user_id,
+            TenantPurge.estado.in_([EstadoPurga.PENDIENTE, EstadoPurga.EN_CURSO, EstadoPurga.FALLIDA]),
+        ).order_by(TenantPurge.id.desc()).first()
+        if job is not None:
+            if not _lease_expired(job, datetime.now(timezone.utc)):
+                raise PurgeInProgress(f"Purge #{job.id} of {user_id} is running elsewhere")
+            TenantPurgeService._backfill(db, job)
+            return job
+        totals = {model.__tablename__: ids(db, user_id).count() for model, ids in STEPS}
+        job = TenantPurge(
+            user_id=user_id,
+            mode=mode,
+            totals=json.dumps(totals),
+            deleted=json.dumps({table: 0 for table in totals}),
+        )
+        db.add(job)
+        db.commit()
+        return job
+
+    @staticmethod
+    def _backfill(db: Session, job: TenantPurge) -> None:
+        """Add the tables a job started before they were in ``STEPS`` (resumed after a deploy)"""
+        totals = json.loads(job.totals or "{}")
+        deleted = json.loads(job.deleted or "{}")
+        missing = [(model, ids) for model, ids in STEPS if model.__tablename__ not in totals]
+        if not missing:
+            return
+        for model, ids in missing:
+            totals[model.__tablename__] = ids(db, job.user_id).count()
+            deleted.setdefault(model.__tablename__, 0)
+        job.totals = json.dumps(totals)
+        job.deleted = json.dumps(deleted)
+        db.commit()
+
+    @staticmethod
+    def _claim(db: Session, job: TenantPurge, owner: str) -> None:
+        """Take the job for this run, unless another run holds an unexpired lease"""
+        now = datetime.now(timezone.utc)
+        taken = db.execute(
+            update(TenantPurge)
+            .where(
+                TenantPurge.id == job.id,
+                TenantPurge.estado != EstadoPurga.COMPLETADA,
+                or_(TenantPurge.locked_until.is_(None), TenantPurge.locked_until < now),
+            )
+            .values(
+                owner=owner,
+                locked_until=now + timedelta(seconds=settings.TENANT_PURGE_LEASE_SECONDS),
+                estado=EstadoPurga.EN_CURSO,
+                error=None,
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if not taken:
+            raise PurgeInProgress(f"Purge #{job.id} is running elsewhere or already finished")
+
+    @staticmethod
+    def _renew(db: Session, job: TenantPurge, owner: str) -> None:
+        """Extend the lease in the current transaction (which then commits with it)"""
+        renewed = db.execute(
+            update(TenantPurge)
+            .where(TenantPurge.id == job.id, TenantPurge.owner == owner)
+            .values(locked_until=datetime.now(timezone.utc) + timedelta(seconds=settings.TENANT_PURGE_LEASE_SECONDS))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not renewed:
+            raise PurgeLeaseLost(f"Purge #{job.id} was taken over by another run")
+
+    @staticmethod
+    def _archive(db: Session, job: TenantPurge, model, ids: List[int]) -> None:
+        # One file per chunk, named after its first id: re-running a chunk after
+        # a crash overwrites the same file instead of archiving rows twice
+        directory = Path(job.archive_path)
+        directory.mkdir(parents=True, exist_ok=True)
+        table = model.__table__
+        rows = db.execute(select(table).where(table.c.id.in_(ids)).order_by(table.c.id)).mappings()
+        path = directory / f"{table.name}-{ids[0]:012d}.ndjson.gz"
+        tmp = path.with_suffix(".tmp")
+        with gzip.open(tmp, "wb") as f:
+            for row in rows:
+                f.write(dumps(dict(row)) + b"\n")
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _chunk(db: Session, job: TenantPurge, owner: str, model, ids_query: Query, chunk_size: int, lock_timeout_ms: int) -> int:
+        if lock_timeout_ms and db.get_bind().dialect.name == "postgresql":
+            # Give up quickly (and retry later) rather than queue other tenants behind us
+            db.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+        # First statement of the chunk: on Postgres it also locks the job row until the commit
+        TenantPurgeService._renew(db, job, owner)
+        ids = [row.id for row in ids_query.order_by(model.id).limit(chunk_size)]
+        if not ids:
+            return 0
+        if job.mode == "archive":
+            TenantPurgeService._archive(db, job, model, ids)
+        count = db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+        deleted = json.loads(job.deleted)
+        deleted[model.__tablename__] = deleted.get(model.__tablename__, 0) + count
+        job.deleted = json.dumps(deleted)
+        job.step = model.__tablename__
+        job.chunks += 1
+        db.commit()
+        return count
+
+    @staticmethod
+    def run(
+        db: Session,
+        job: TenantPurge,
+        chunk_size: int = 500,
+        throttle: Optional[PurgeThrottle] = None,
+        lock_timeout_ms: int = 2000,
+        max_lock_retries: int = 10,
+        on_progress: Optional[Callable[[TenantPurge], None]] = None,
+    ) -> TenantPurge:
+        """Run (or resume) a purge to completion"""
+        throttle = throttle or PurgeThrottle(pause=0)
+        if job.mode == "archive" and not job.archive_path and not settings.TENANT_PURGE_ARCHIVE_DIR:
+            raise ValueError("Archive purges need TENANT_PURGE_ARCHIVE_DIR")
+        owner = uuid.uuid4().hex
+        TenantPurgeService._claim(db, job, owner)
+        if job.mode == "archive" and not job.archive_path:
+            job.archive_path = str(Path(settings.TENANT_PURGE_ARCHIVE_DIR) / f"{job.user_id}-{job.id}")
+            db.commit()
+        try:
+            for model, ids in STEPS:
+                retries = 0
+                while True:
+                    started = time.perf_counter()
+                    try:
+                        count = TenantPurgeService._chunk(
+                            db, job, owner, model, ids(db, job.user_id), chunk_size, lock_timeout_ms
+                        )
+                    except OperationalError:
+                        # Lock timeout (or a transient error): back off and retry the same chunk
+                        db.rollback()
+                        retries += 1
+                        if retries > max_lock_retries:
+                            raise
+                        time.sleep(min(2 ** retries * 0.1, 10))
+                        continue
+                    retries = 0
+                    if not count:
+                        break
+                    if on_progress is not None:
+                        on_progress(job)
+                    throttle.wait(db, time.perf_counter() - started)
+        except PurgeLeaseLost:
+            # The job belongs to the other run now: leave its state alone
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            # Released at once (locked_until) so a retry does not wait for the lease to expire
+            db.execute(
+                update(TenantPurge)
+                .where(TenantPurge.id == job.id, TenantPurge.owner == owner)
+                .values(estado=EstadoPurga.FALLIDA, error=f"{type(e).__name__}: {e}", locked_until=None)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            raise
+        except BaseException:
+            # Interrupted (Ctrl-C, shutdown): release the claim so a new run resumes at once
+            db.rollback()
+            db.execute(
+                update(TenantPurge)
+                .where(TenantPurge.id == job.id, TenantPurge.owner == owner)
+                .values(locked_until=None)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            raise
+        TenantPurgeService._renew(db, job, owner)
+        job.estado = EstadoPurga.COMPLETADA
+        job.step = None
+        job.locked_until = None
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        logger.info(f"Tenant {job.user_id} purged ({job.mode}): {job.deleted}")
+        return job
+
+    @staticmethod
+    def purge(db: Session, user_id: str, mode: Optional[str] = None, on_progress=None) -> TenantPurge:
+        """Start or resume the tenant's purge with the configured chunk size and throttle"""
+        job = TenantPurgeService.start(db, user_id, mode or settings.TENANT_PURGE_MODE)
+        job = TenantPurgeService.run(
+            db,
+            job,
+            chunk_size=settings.TENANT_PURGE_CHUNK_SIZE,
+            throttle=PurgeThrottle(
+                pause=settings.TENANT_PURGE_PAUSE,
+                duty_cycle=settings.TENANT_PURGE_DUTY_CYCLE,
+                max_replication_lag=settings.TENANT_PURGE_MAX_REPLICATION_LAG,
+            ),
+            lock_timeout_ms=settings.TENANT_PURGE_LOCK_TIMEOUT_MS,
+            on_progress=on_progress,
+        )
+        product_catalog.invalidate(user_id)
+        return job
+
+    @staticmethod
+    def progress(job: TenantPurge) -> Dict:
+        totals = json.loads(job.totals or "{}")
+        deleted = json.loads(job.deleted or "{}")
+        total = sum(totals.values())
+        return {
+            "id": job.id,
+            "user_id": job.user_id,
+            "mode": job.mode,
+            "estado": job.estado.value,
+            "step": job.step,
+            "chunks": job.chunks,
+            "totals": totals,
+            "deleted": deleted,
+            "percent": round(100 * min(sum(deleted.values()), total) / total, 1) if total else 100.0,
+            "archive_path": job.archive_path,
+            "locked_until": job.locked_until,
+            "error": job.error,
+            "created_at": job.created_at,
+            "updated_at": job.updated_at,
+            "finished_at": job.finished_at,
+        }
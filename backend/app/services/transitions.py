@@ -0,0 +1,122 @@
+from typing import Callable, Dict, List, Optional, Sequence
+from datetime import date, datetime
+import logging
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.metrics import factura_transitions_total
+from app.models.factura import Factura, EstadoFactura
+
+logger = logging.getLogger(__name__)
+
+# Allowed state changes. PAGADA -> ENVIADA undoes a payment marked by mistake.
+TRANSICIONES: Dict[EstadoFactura, frozenset] = {
+    EstadoFactura.BORRADOR: frozenset({EstadoFactura.ENVIADA, EstadoFactura.CANCELADA}),
+    EstadoFactura.ENVIADA: frozenset({EstadoFactura.PAGADA, EstadoFactura.CANCELADA}),
+    EstadoFactura.PAGADA: frozenset({EstadoFactura.ENVIADA}),
+    EstadoFactura.CANCELADA: frozenset(),
+}
+
+# Invoices a single bulk transition may touch
+MAX_FACTURAS = 1000
+
+# Called once per batch, after commit, with (db, user_id, estado, changed invoice ids)
+TransitionHook = Callable[[Session, str, EstadoFactura, List[int]], None]
+TRANSITION_HOOKS: List[TransitionHook] = []
+
+
+def transition_hook(hook: TransitionHook) -> TransitionHook:
+    """Register a hook run after each bulk state transition"""
+    TRANSITION_HOOKS.append(hook)
+    return hook
+
+
+@transition_hook
+def _count_transitions(db: Session, user_id: str, estado: EstadoFactura, ids: List[int]) -> None:
+    factura_transitions_total.inc(len(ids), estado=estado.value)
+
+
+class TooManyFacturas(ValueError):
+    pass
+
+
+class FacturaTransitionService:
+    """Set-based invoice state transitions"""
+
+    @staticmethod
+    def origins(estado: EstadoFactura) -> List[EstadoFactura]:
+        """States an invoice may move to ``estado`` from"""
+        return [origen for origen, destinos in TRANSICIONES.items() if estado in destinos]
+
+    @staticmethod
+    def transition(
+        db: Session,
+        user_id: str,
+        estado: EstadoFactura,
+        ids: Optional[Sequence[int]] = None,
+        estado_actual: Optional[EstadoFactura] = None,
+        cliente_id: Optional[int] = None,
+        fecha_desde: Optional[date] = None,
+        fecha_hasta: Optional[date] = None,
+    ) -> List[Dict]:
+        """Move the selected invoices to ``estado``: explicit ``ids`` or a filter.
+
+        One SELECT reads the current states and one UPDATE (scoped to the
+        user and guarded by the allowed origin states, so a concurrent change
+        is not overwritten) applies the transition. Returns one result per
+        invoice: actualizada, sin_cambios, no_permitida or no_encontrada.
+        """
+        query = db.query(Factura.id, Factura.estado).filter(Factura.user_id == user_id)
+        if ids is not None:
+            query = query.filter(Factura.id.in_(set(ids)))
+        if estado_actual:
+            query = query.filter(Factura.estado == estado_actual)
+        if cliente_id:
+            query = query.filter(Factura.cliente_id == cliente_id)
+        if fecha_desde:
+            query = query.filter(Factura.fecha >= fecha_desde)
+        if fecha_hasta:
+            query = query.filter(Factura.fecha <= fecha_hasta)
+        actuales = {row.id: row.estado for row in query.order_by(Factura.id).limit(MAX_FACTURAS + 1)}
+        if len(actuales) > MAX_FACTURAS:
+            raise TooManyFacturas(f"More than {MAX_FACTURAS} invoices selected")
+
+        origins = FacturaTransitionService.origins(estado)
+        candidatos = [factura_id for factura_id, actual in actuales.items() if actual in origins]
+        cambiadas = set()
+        if candidatos:
+            result = db.execute(
+                update(Factura)
+                .where(
+                    Factura.user_id == user_id,
+                    Factura.id.in_(candidatos),
+                    Factura.estado.in_(origins),
+                )
+                .values(estado=estado, updated_at=datetime.utcnow())
+                .returning(Factura.id)
+                .execution_options(synchronize_session=False)
+            )
+            cambiadas = {row.id for row in result}
+        db.commit()
+
+        if cambiadas:
+            changed = sorted(cambiadas)
+            for hook in TRANSITION_HOOKS:
+                try:
+                    hook(db, user_id, estado, changed)
+                except Exception:
+                    logger.exception(f"Transition hook {getattr(hook, '__name__', hook)} failed")
+
+        resultados = []
+        for factura_id in (list(dict.fromkeys(ids)) if ids is not None else list(actuales)):
+            actual = actuales.get(factura_id)
+            if actual is None:
+                resultado = "no_encontrada"
+            elif factura_id in cambiadas:
+                resultado, actual = "actualizada", estado
+            elif actual == estado:
+                resultado = "sin_cambios"
+            else:
+                resultado = "no_permitida"
+            resultados.append({"id": factura_id, "resultado": resultado, "estado": actual})
+        return resultados
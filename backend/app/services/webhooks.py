@@ -0,0 +1,224 @@
+from typing import Any, Callable, Dict, Optional
+from datetime import datetime, timedelta, timezone
+import asyncio
+import json
+import logging
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import webhook_events_total
+from app.db.database import SessionLocal
+from app.models import EstadoWebhook, WebhookEvent
+from app.services.tenant_purge import TenantPurgeService
+
+logger = logging.getLogger(__name__)
+
+
+def _event_user_id(event: Dict[str, Any]) -> Optional[str]:
+    """Tenant (Clerk user id) an event refers to, if any"""
+    data = event.get("data") or {}
+    if event.get("type", "").startswith("user."):
+        return data.get("id")
+    payer = data.get("payer") or {}
+    return payer.get("user_id") or data.get("user_id")
+
+
+class WebhookInbox:
+    """Stores verified webhook deliveries for later processing"""
+
+    @staticmethod
+    def receive(db: Session, source: str, delivery_id: str, event: Dict[str, Any]) -> bool:
+        """Persist an event; False when this delivery was already stored (sender retry)"""
+        db.add(WebhookEvent(
+            source=source,
+            delivery_id=delivery_id,
+            event_type=event.get("type", ""),
+            user_id=_event_user_id(event),
+            payload=json.dumps(event),
+        ))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return False
+        return True
+
+
+# -- Handlers: must be idempotent, an event can be processed more than once ------------------
+
+def handle_user_deleted(db: Session, event: WebhookEvent, payload: Dict[str, Any]) -> EstadoWebhook:
+    if not event.user_id:
+        raise ValueError("user.deleted event without a user id")
+
+    def extend_lease(job) -> None:
+        # A large purge can outlast the event's lease: keep other processors from reclaiming it
+        event.available_at = datetime.now(timezone.utc) + timedelta(seconds=settings.WEBHOOK_LEASE_SECONDS)
+        db.commit()
+
+    TenantPurgeService.purge(db, event.user_id, on_progress=extend_lease)
+    return EstadoWebhook.PROCESADO
+
+
+def handle_plan_changed(db: Session, event: WebhookEvent, payload: Dict[str, Any]) -> EstadoWebhook:
+    # The plan is read from the session token ('pla' claim) on every request;
+    # nothing stored locally depends on it yet, the event is kept for auditing.
+    logger.info(f"Plan change for {event.user_id}: {event.event_type}")
+    return EstadoWebhook.PROCESADO
+
+
+HANDLERS: Dict[str, Callable[[Session, WebhookEvent, Dict[str, Any]], EstadoWebhook]] = {
+    "user.deleted": handle_user_deleted,
+    "subscription.created": handle_plan_changed,
+    "subscription.updated": handle_plan_changed,
+    "subscription.active": handle_plan_changed,
+    "subscription.pastDue": handle_plan_changed,
+    "subscriptionItem.active": handle_plan_changed,
+    "subscriptionItem.canceled": handle_plan_changed,
+    "subscriptionItem.ended": handle_plan_changed,
+}
+
+
+class WebhookProcessor:
+    """Claims pending inbox events one at a time and runs their handlers.
+
+    Claiming uses ``FOR UPDATE SKIP LOCKED`` on Postgres, so several
+    processes can drain the inbox at once. An event is claimed right before
+    its handler runs and leased for ``lease`` seconds from then (long
+    handlers extend it); if its processor dies it becomes available again.
+    Failures, and processors that die on the event, are retried with
+    exponential backoff up to ``max_attempts``.
+    """
+
+    def __init__(self, batch_size: int = 20, lease: float = 600, max_attempts: int = 8):
+        self.batch_size = batch_size
+        self.lease = lease
+        self.max_attempts = max_attempts
+
+    def _claim(self, db: Session) -> Optional[WebhookEvent]:
+        # One event per claim: events queued behind a long handler are not
+        # leased (and left to expire) while they wait
+        event = db.query(WebhookEvent).filter(
+            WebhookEvent.available_at <= func.now(),
+            or_(
+                WebhookEvent.estado == EstadoWebhook.PENDIENTE,
+                and_(
+                    WebhookEvent.estado.in_([EstadoWebhook.PROCESANDO, EstadoWebhook.FALLIDO]),
+                    WebhookEvent.attempts < self.max_attempts,
+                ),
+            ),
+        ).order_by(WebhookEvent.id).limit(1).with_for_update(skip_locked=True).first()
+        if event is not None:
+            event.estado = EstadoWebhook.PROCESANDO
+            event.attempts += 1
+            event.available_at = datetime.now(timezone.utc) + timedelta(seconds=self.lease)
+        db.commit()
+        return event
+
+    def _abandon(self, db: Session) -> int:
+        """Give up on events whose lease expired on their last attempt (the processor died each time)"""
+        abandoned = db.query(WebhookEvent).filter(
+            WebhookEvent.estado == EstadoWebhook.PROCESANDO,
+            WebhookEvent.available_at <= func.now(),
+            WebhookEvent.attempts >= self.max_attempts,
+        ).update(
+            {
+                WebhookEvent.estado: EstadoWebhook.FALLIDO,
+                WebhookEvent.last_error: "Lease expired: the processor stopped while handling the event",
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+        if abandoned:
+            logger.error(f"{abandoned} webhook event(s) abandoned after {self.max_attempts} attempts")
+        return abandoned
+
+    def _process(self, db: Session, event: WebhookEvent) -> None:
+        handler = HANDLERS.get(event.event_type)
+        try:
+            if handler is None:
+                estado = EstadoWebhook.IGNORADO
+            else:
+                estado = handler(db, event, json.loads(event.payload))
+            event.estado = estado
+            event.last_error = None
+            event.processed_at = datetime.now(timezone.utc)
+        except Exception as e:
+            db.rollback()
+            logger.exception(f"Webhook event {event.id} ({event.event_type}) failed")
+            estado = EstadoWebhook.FALLIDO
+            event.estado = estado
+            event.last_error = f"{type(e).__name__}: {e}"
+            event.available_at = datetime.now(timezone.utc) + timedelta(seconds=min(2 ** event.attempts * 10, 3600))
+        db.commit()
+        webhook_events_total.inc(type=event.event_type, result=estado.value)
+
+    def process_batch(self) -> int:
+        """Process up to ``batch_size`` events; returns how many were claimed"""
+        db = SessionLocal()
+        try:
+            self._abandon(db)
+            claimed = 0
+            while claimed < self.batch_size:
+                event = self._claim(db)
+                if event is None:
+                    break
+                self._process(db, event)
+                claimed += 1
+            return claimed
+        finally:
+            db.close()
+
+
+class WebhookWorker:
+    """Drains the inbox in a thread off the event loop of an API process"""
+
+    def __init__(self, processor: WebhookProcessor, poll_interval: float = 5):
+        self.processor = processor
+        self.poll_interval = poll_interval
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self) -> None:
+        """A new event was stored: process it without waiting for the next poll"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                claimed = await asyncio.to_thread(self.processor.process_batch)
+            except Exception:
+                logger.exception("Webhook worker batch failed")
+                claimed = 0
+            if claimed:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+webhook_processor = WebhookProcessor(
+    batch_size=settings.WEBHOOK_BATCH_SIZE,
+    lease=settings.WEBHOOK_LEASE_SECONDS,
+    max_attempts=settings.WEBHOOK_MAX_ATTEMPTS,
+)
+webhook_worker = WebhookWorker(webhook_processor, poll_interval=settings.WEBHOOK_POLL_INTERVAL)
@@ -0,0 +1,3 @@
+from .writer import FacturaeWriter, FACTURAE_VERSION
+
+__all__ = ["FacturaeWriter", "FACTURAE_VERSION"]
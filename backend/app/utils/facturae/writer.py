@@ -0,0 +1,218 @@
+from typing import Any, Dict, Iterator, Optional
+from decimal import Decimal, ROUND_HALF_UP
+from xml.sax.saxutils import XMLGenerator, escape
+import io
+
+from app.core.money import from_cents, rate_bp, tax_cents, to_cents
+
+FACTURAE_VERSION = "3.2.2"
+FACTURAE_NAMESPACE = "http://www.facturae.gob.es/formato/Versiones/Facturaev3_2_2.xml"
+
+# Lines written between two flushes of the output buffer
+LINES_PER_CHUNK = 200
+
+# NIF first letters of legal entities (companies, associations, public bodies...)
+_LEGAL_ENTITY_LETTERS = set("ABCDEFGHJNPQRSUVW")
+
+
+def _amount(value: Any, places: str = "0.01") -> str:
+    return str(Decimal(str(value)).quantize(Decimal(places), ROUND_HALF_UP))
+
+
+class _Buffer(io.StringIO):
+    """Write target of the XML generator, drained after each chunk.
+
+    A text stream is used as is by ``XMLGenerator`` (other targets get
+    wrapped in a ``TextIOWrapper`` that is flushed on every write).
+    """
+
+    def drain(self) -> bytes:
+        data = self.getvalue().encode("utf-8")
+        self.seek(0)
+        self.truncate()
+        return data
+
+
+class FacturaeWriter:
+    """Facturae 3.2.2 XML (one invoice per file) written as a stream of chunks.
+
+    Works on the invoice data of ``InvoiceGenerator._prepare_invoice_data``:
+    elements are written with a SAX generator as they are produced, so a
+    document never exists as a tree and memory does not grow with the
+    number of lines. Documents are not signed (XAdES); FACe and most
+    registries sign on submission or accept a signed copy made by the user.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self._buffer = _Buffer()
+        self._xml = XMLGenerator(self._buffer, encoding="UTF-8")
+
+    # -- low level ---------------------------------------------------------------------------
+
+    def _start(self, name: str, attrs: Optional[Dict[str, str]] = None) -> None:
+        self._xml.startElement(name, attrs or {})
+
+    def _end(self, name: str) -> None:
+        self._xml.endElement(name)
+
+    def _leaf(self, name: str, value: Any) -> None:
+        if value is None or value == "":
+            return
+        # Written directly: the generator holds no pending state without short_empty_elements
+        self._buffer.write(f"<{name}>{escape(str(value))}</{name}>")
+
+    # -- sections ----------------------------------------------------------------------------
+
+    def _party(self, element: str, party: Dict[str, Any]) -> None:
+        nif = (party.get("nif") or "").strip().upper()
+        legal_entity = nif[:1] in _LEGAL_ENTITY_LETTERS
+        self._start(element)
+        self._start("TaxIdentification")
+        self._leaf("PersonTypeCode", "J" if legal_entity else "F")
+        self._leaf("ResidenceTypeCode", "R")
+        self._leaf("TaxIdentificationNumber", nif)
+        self._end("TaxIdentification")
+        if legal_entity:
+            self._start("LegalEntity")
+            self._leaf("CorporateName", party["nombre"])
+        else:
+            name, _, surnames = party["nombre"].partition(" ")
+            self._start("Individual")
+            self._leaf("Name", name)
+            self._leaf("FirstSurname", surnames or name)
+        self._start("AddressInSpain")
+        self._leaf("Address", party.get("direccion") or "-")
+        self._leaf("PostCode", party.get("codigo_postal") or "00000")
+        self._leaf("Town", party.get("ciudad") or "-")
+        self._leaf("Province", party.get("provincia") or party.get("ciudad") or "-")
+        self._leaf("CountryCode", "ESP")
+        self._end("AddressInSpain")
+        if party.get("telefono") or party.get("web") or party.get("email"):
+            self._start("ContactDetails")
+            self._leaf("Telephone", party.get("telefono"))
+            self._leaf("WebAddress", party.get("web"))
+            self._leaf("ElectronicMail", party.get("email"))
+            self._end("ContactDetails")
+        self._end("LegalEntity" if legal_entity else "Individual")
+        self._end(element)
+
+    def _tax(self, tipo_iva: Any, base: Any, cuota: Any) -> None:
+        self._start("Tax")
+        self._leaf("TaxTypeCode", "01")  # IVA
+        self._leaf("TaxRate", _amount(tipo_iva))
+        self._start("TaxableBase")
+        self._leaf("TotalAmount", _amount(base))
+        self._end("TaxableBase")
+        self._start("TaxAmount")
+        self._leaf("TotalAmount", _amount(cuota))
+        self._end("TaxAmount")
+        self._end("Tax")
+
+    def _totals(self) -> Dict[str, Decimal]:
+        # From the per-rate breakdown, so the totals always add up to the taxes declared
+        base = sum((tax["base"] for tax in self.data["desglose_iva"]), Decimal("0"))
+        cuota = sum((tax["cuota"] for tax in self.data["desglose_iva"]), Decimal("0"))
+        return {"base": base, "cuota": cuota, "total": base + cuota}
+
+    def _line(self, linea: Dict[str, Any]) -> None:
+        subtotal = Decimal(str(linea["subtotal"]))
+        self._start("InvoiceLine")
+        self._leaf("ItemDescription", (linea["descripcion"] or "-")[:2500])
+        self._leaf("Quantity", _amount(linea["cantidad"]))
+        self._leaf("UnitOfMeasure", "01")  # unidades
+        self._leaf("UnitPriceWithoutTax", _amount(linea["precio_unitario"], "0.000001"))
+        self._leaf("TotalCost", _amount(subtotal, "0.000001"))
+        self._leaf("GrossAmount", _amount(subtotal, "0.000001"))
+        self._start("TaxesOutputs")
+        tipo = linea["tipo_iva"]
+        self._tax(tipo, subtotal, from_cents(tax_cents(to_cents(subtotal), rate_bp(tipo))))
+        self._end("TaxesOutputs")
+        self._end("InvoiceLine")
+
+    # -- document ----------------------------------------------------------------------------
+
+    def stream(self) -> Iterator[bytes]:
+        data, empresa = self.data, self.data["empresa"]
+        totals = self._totals()
+        total = _amount(totals["total"])
+
+        self._xml.startDocument()
+        self._start("fe:Facturae", {"xmlns:fe": FACTURAE_NAMESPACE, "xmlns:ds": "http://www.w3.org/2000/09/xmldsig#"})
+        self._start("FileHeader")
+        self._leaf("SchemaVersion", FACTURAE_VERSION)
+        self._leaf("Modality", "I")
+        self._leaf("InvoiceIssuerType", "EM")
+        self._start("Batch")
+        self._leaf("BatchIdentifier", f"{empresa['nif']}{data['numero']}"[:70])
+        self._leaf("InvoicesCount", 1)
+        for element in ("TotalInvoicesAmount", "TotalOutstandingAmount", "TotalExecutableAmount"):
+            self._start(element)
+            self._leaf("TotalAmount", total)
+            self._end(element)
+        self._leaf("InvoiceCurrencyCode", "EUR")
+        self._end("Batch")
+        self._end("FileHeader")
+
+        self._start("Parties")
+        self._party("SellerParty", empresa)
+        self._party("BuyerParty", data["cliente"])
+        self._end("Parties")
+
+        self._start("Invoices")
+        self._start("Invoice")
+        self._start("InvoiceHeader")
+        self._leaf("InvoiceNumber", data["numero"])
+        self._leaf("InvoiceDocumentType", "FC")  # factura completa
+        self._leaf("InvoiceClass", "OO")  # original
+        self._end("InvoiceHeader")
+        self._start("InvoiceIssueData")
+        self._leaf("IssueDate", data["fecha"])
+        self._leaf("InvoiceCurrencyCode", "EUR")
+        self._leaf("TaxCurrencyCode", "EUR")
+        self._leaf("LanguageName", "es")
+        self._end("InvoiceIssueData")
+
+        self._start("TaxesOutputs")
+        for tax in data["desglose_iva"]:
+            self._tax(tax["tipo_iva"], tax["base"], tax["cuota"])
+        self._end("TaxesOutputs")
+
+        self._start("InvoiceTotals")
+        self._leaf("TotalGrossAmount", _amount(totals["base"]))
+        self._leaf("TotalGrossAmountBeforeTaxes", _amount(totals["base"]))
+        self._leaf("TotalTaxOutputs", _amount(totals["cuota"]))
+        self._leaf("TotalTaxesWithheld", "0.00")
+        self._leaf("InvoiceTotal", total)
+        self._leaf("TotalOutstandingAmount", total)
+        self._leaf("TotalExecutableAmount", total)
+        self._end("InvoiceTotals")
+        yield self._buffer.drain()
+
+        self._start("Items")
+        for index, linea in enumerate(data["lineas"], 1):
+            self._line(linea)
+            if index % LINES_PER_CHUNK == 0:
+                yield self._buffer.drain()
+        self._end("Items")
+
+        if empresa.get("iban"):
+            self._start("PaymentDetails")
+            self._start("Installment")
+            self._leaf("InstallmentDueDate", data["fecha"])
+            self._leaf("InstallmentAmount", total)
+            self._leaf("PaymentMeans", "04")  # transferencia
+            self._start("AccountToBeCredited")
+            self._leaf("IBAN", empresa["iban"].replace(" ", ""))
+            self._end("AccountToBeCredited")
+            self._end("Installment")
+            self._end("PaymentDetails")
+        if data.get("notas"):
+            self._start("AdditionalData")
+            self._leaf("InvoiceAdditionalInformation", data["notas"])
+            self._end("AdditionalData")
+        self._end("Invoice")
+        self._end("Invoices")
+        self._end("fe:Facturae")
+        self._xml.endDocument()
+        yield self._buffer.drain()
@@ -1,18 +1,45 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional, Type, TYPE_CHECKING
+from decimal import Decimal
 from io import BytesIO
 import base64
+import importlib
+import time
 from sqlalchemy.orm import Session
 from app.models import Factura, PerfilEmpresa
-from .templates.modern_template import ModernInvoiceTemplate
-from .templates.base_template import BaseInvoiceTemplate
+from app.core.metrics import pdf_render_duration_seconds
+from app.core.money import MoneyBatch, from_cents, to_cents, rate_bp
+
+if TYPE_CHECKING:
+    from .templates.base_template import BaseInvoiceTemplate
 
 
 class InvoiceGenerator:
     """Invoice PDF generator with template support"""
     
+    # Templates (and reportlab) are imported on first use, see load_template()
     TEMPLATES = {
-        "modern": ModernInvoiceTemplate,
+        "modern": "app.utils.pdf.templates.modern_template:ModernInvoiceTemplate",
     }
+    _loaded: Dict[str, Type["BaseInvoiceTemplate"]] = {}
+    
+    @classmethod
+    def load_template(cls, template_name: str) -> Optional[Type["BaseInvoiceTemplate"]]:
+        """Import a template class by name (cached)"""
+        template_class = cls._loaded.get(template_name)
+        if template_class is None:
+            target = cls.TEMPLATES.get(template_name)
+            if target is None:
+                return None
+            module_name, _, class_name = target.partition(":")
+            template_class = getattr(importlib.import_module(module_name), class_name)
+            cls._loaded[template_name] = template_class
+        return template_class
+    
+    @classmethod
+    def warm_up(cls) -> None:
+        """Import every template up front so the first PDF request does not pay for it"""
+        for template_name in cls.TEMPLATES:
+            cls.load_template(template_name)
     
     @classmethod
     def generate_pdf(cls, factura: Factura, template_name: str = "modern", perfil_empresa: Optional[PerfilEmpresa] = None) -> BytesIO:
@@ -26,7 +53,7 @@ class InvoiceGenerator:
             BytesIO buffer containing the PDF
         """
         # Get template
-        template_class = cls.TEMPLATES.get(template_name)
+        template_class = cls.load_template(template_name)
         if not template_class:
             raise ValueError(f"Template '{template_name}' not found")
         
@@ -37,7 +64,9 @@ class InvoiceGenerator:
         
         # Generate PDF
         output = BytesIO()
+        start = time.perf_counter()
         template.generate(invoice_data, output)
+        pdf_render_duration_seconds.observe(time.perf_counter() - start, template=template_name)
         output.seek(0)
         
         return output
@@ -72,14 +101,18 @@ class InvoiceGenerator:
             "fecha": factura.fecha.isoformat(),
             "estado": factura.estado.value,
             "notas": factura.notas,
-            "subtotal": float(factura.subtotal),
-            "total_iva": float(factura.total_iva),
-            "total": float(factura.total),
+            # Exact amounts (Decimal with two places), never floats
+            "subtotal": from_cents(to_cents(factura.subtotal)),
+            "total_iva": from_cents(to_cents(factura.total_iva)),
+            "total": from_cents(to_cents(factura.total)),
             "cliente": {
                 "id": factura.cliente.id,
                 "nombre": factura.cliente.nombre,
                 "nif": factura.cliente.nif,
                 "direccion": factura.cliente.direccion,
+                "codigo_postal": factura.cliente.codigo_postal,
+                "ciudad": factura.cliente.ciudad,
+                "pais": factura.cliente.pais,
                 "email": factura.cliente.email,
                 "telefono": factura.cliente.telefono,
             },
@@ -88,12 +121,13 @@ class InvoiceGenerator:
                     "id": linea.id,
                     "descripcion": linea.descripcion,
                     "cantidad": linea.cantidad,
-                    "precio_unitario": float(linea.precio_unitario),
-                    "tipo_iva": float(linea.tipo_iva),
-                    "subtotal": float(linea.subtotal),
+                    "precio_unitario": from_cents(to_cents(linea.precio_unitario)),
+                    "tipo_iva": from_cents(rate_bp(linea.tipo_iva)),
+                    "subtotal": from_cents(to_cents(linea.subtotal)),
                 }
                 for linea in factura.lineas
-            ]
+            ],
+            "desglose_iva": cls._tax_breakdown(factura.lineas),
         }
         
         # Add business profile data if available
@@ -135,6 +169,18 @@ class InvoiceGenerator:
         
         return data
     
+    @staticmethod
+    def _tax_breakdown(lineas: Iterable[Any]) -> List[Dict[str, Decimal]]:
+        """Taxable base and tax amount per VAT rate (tax rounded once per rate)"""
+        batch = MoneyBatch()
+        for linea in lineas:
+            batch.append(to_cents(linea.subtotal), rate_bp(linea.tipo_iva))
+        taxes = batch.taxes()
+        return [
+            {"tipo_iva": from_cents(rate), "base": from_cents(base), "cuota": from_cents(taxes[rate])}
+            for rate, base in batch.bases().items()
+        ]
+    
     @classmethod
     def get_available_templates(cls) -> list[str]:
         """Get list of available template names"""
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any
+from decimal import Decimal
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate
 from io import BytesIO
@@ -22,10 +23,10 @@ class BaseInvoiceTemplate(ABC):
         """
         pass
     
-    def format_currency(self, amount: float) -> str:
+    def format_currency(self, amount: Decimal) -> str:
         """Format amount as currency"""
         return f"{amount:,.2f} €"
     
-    def format_percentage(self, percentage: float) -> str:
-        """Format percentage"""
-        return f"{percentage}%"
\ No newline at end of file
+    def format_percentage(self, percentage: Decimal) -> str:
+        """Format percentage (21.00 -> "21%", 5.50 -> "5.5%")"""
+        return f"{percentage:.2f}".rstrip("0").rstrip(".") + "%"
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""Gunicorn settings for production (see scripts/start_prod.sh).
+
+    gunicorn app.main:app -c gunicorn.conf.py
+
+Values come from app.core.config, so they can be set through the
+environment or .env like the rest of the settings.
+"""
+from app.core.config import settings
+from app.core.server import default_workers
+
+bind = settings.BIND
+workers = settings.WEB_CONCURRENCY or default_workers()
+worker_class = "app.core.server.AppWorker"
+
+# Import the app (and its read-only state, see when_ready) once in the
+# arbiter; workers share those pages copy-on-write
+preload_app = True
+
+# Recycle workers to bound memory growth; jitter avoids restarting them all at once
+max_requests = settings.WORKER_MAX_REQUESTS
+max_requests_jitter = settings.WORKER_MAX_REQUESTS_JITTER
+
+# Seconds a worker may spend draining in-flight requests on shutdown or recycle
+graceful_timeout = settings.WORKER_GRACEFUL_TIMEOUT
+timeout = settings.WORKER_TIMEOUT
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    if settings.METRICS_MULTIPROC_DIR:
+        from app.core.metrics import multiprocess_metrics
+        multiprocess_metrics.configure(settings.METRICS_MULTIPROC_DIR)
+
+
+def when_ready(server):
+    # Runs in the arbiter after the app is loaded and before the first fork
+    from app.core.startup import preload
+    preload()
+    server.log.info("Preloaded shared state, starting %s workers", workers)
+
+
+def post_fork(server, worker):
+    from app.core.startup import mark_worker_started
+    from app.core.metrics import multiprocess_metrics
+    from app.db.database import engine
+    mark_worker_started()
+    multiprocess_metrics.start(settings.METRICS_FLUSH_INTERVAL)
+    # Never share pooled DB connections across processes
+    engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    from app.core.metrics import multiprocess_metrics
+    multiprocess_metrics.stop()
+
+
+def child_exit(server, worker):
+    # Runs in the arbiter: keep the exited worker's counters in /metrics
+    from app.core.metrics import multiprocess_metrics
+    multiprocess_metrics.mark_process_dead(worker.pid)
@@ -0,0 +1,75 @@
+"""Benchmark: bytes on the wire and CPU cost of response compression.
+
+Fetches GET /api/facturas/?limit=1000 uncompressed (before) and with each
+supported Accept-Encoding (after), then reports body size, ratio and the
+CPU time spent compressing, both one-shot and chunked (streaming mode).
+
+Usage (from backend/):
+    python scripts/bench_compression.py [--rows 1000] [--repeat 20] [--chunk 16384]
+"""
+import argparse
+import time
+
+from bench_serialization import BENCH_USER_ID, seed  # also sets up sys.path / DATABASE_URL
+
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from app.main import app
+from app.core.config import settings
+from app.db.database import Base, engine
+from app.middleware.compression import _Compressor, supported_encodings
+
+
+def cpu_time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def compress_chunked(encoding: str, level: int, payload: bytes, chunk: int) -> bytes:
+    compressor = _Compressor(encoding, level)
+    parts = [compressor.compress(payload[i:i + chunk]) for i in range(0, len(payload), chunk)]
+    parts.append(compressor.finish())
+    return b"".join(parts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--chunk", type=int, default=16384)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    seed(args.rows)
+
+    token = jwt.encode({"sub": BENCH_USER_ID, "pla": "u:pro"}, "bench", algorithm="HS256")
+    client = TestClient(app)
+    url = f"/api/facturas/?limit={min(args.rows, 1000)}"
+    headers = {"Authorization": f"Bearer {token}"}
+
+    before = client.get(url, headers={**headers, "Accept-Encoding": "identity"})
+    payload = before.content
+    print(f"payload: {len(payload):,} bytes uncompressed (identity)")
+    print(f"{'encoding':<10}{'wire bytes':>12}{'ratio':>8}{'one-shot cpu':>15}{'chunked cpu':>14}{'chunked bytes':>15}")
+
+    level = settings.COMPRESSION_LEVEL
+    for encoding in supported_encodings():
+        response = client.get(url, headers={**headers, "Accept-Encoding": encoding})
+        assert response.headers.get("content-encoding") == encoding
+        wire = int(response.headers["content-length"])
+        one_shot = cpu_time(lambda: _Compressor(encoding, level).finish(payload), args.repeat)
+        chunked = cpu_time(lambda: compress_chunked(encoding, level, payload, args.chunk), args.repeat)
+        chunked_size = len(compress_chunked(encoding, level, payload, args.chunk))
+        print(
+            f"{encoding:<10}{wire:>12,}{len(payload) / wire:>7.1f}x"
+            f"{one_shot * 1000:>12.2f} ms{chunked * 1000:>11.2f} ms{chunked_size:>15,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
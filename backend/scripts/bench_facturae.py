@@ -0,0 +1,67 @@
+"""Benchmark: Facturae batch export throughput and memory.
+
+Seeds one synthetic tenant (app.db.synthetic) and streams its invoices as a
+Facturae ZIP, the same generator GET /api/facturas/export/facturae sends.
+Reports invoices per second and the peak Python memory (tracemalloc) for
+growing batch sizes. Invoices are streamed one at a time; what still grows
+with the batch is the selected id list and the ZIP central directory,
+which ``zipfile`` keeps until the end (a few hundred bytes per entry).
+
+Usage (from backend/):
+    python scripts/bench_facturae.py [--invoices 5000] [--steps 4]
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite file.
+"""
+import argparse
+import time
+import tracemalloc
+
+from bench_serialization import seed  # noqa: F401  (sets up sys.path / DATABASE_URL)
+
+from app.db.database import Base, SessionLocal, engine
+from app.db.synthetic import SyntheticDataGenerator, generate_synthetic_data
+from app.models import Factura, PerfilEmpresa
+from app.services.facturae import FacturaeExportService
+
+BENCH_SEED = 4747
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=5000, help="invoices in the largest batch")
+    parser.add_argument("--steps", type=int, default=4, help="batch sizes measured, up to --invoices")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    user_id = SyntheticDataGenerator.tenant_id(BENCH_SEED, 0)
+    db = SessionLocal()
+    try:
+        if db.query(Factura.id).filter(Factura.user_id == user_id).count() < args.invoices:
+            generate_synthetic_data(1, args.invoices, BENCH_SEED)
+        perfil = db.query(PerfilEmpresa).filter(PerfilEmpresa.user_id == user_id).first()
+        if perfil is None:
+            perfil = PerfilEmpresa(
+                user_id=user_id, nombre="Benchmark S.L.", nif="B00000000", direccion="Calle Mayor, 1",
+                codigo_postal="28001", ciudad="Madrid", provincia="Madrid", iban="ES0000000000000000000000",
+            )
+            db.add(perfil)
+            db.commit()
+            db.refresh(perfil)
+        ids = [row.id for row in db.query(Factura.id).filter(Factura.user_id == user_id).order_by(Factura.id)]
+    finally:
+        db.close()
+
+    print(f"{'invoices':>9}{'inv/s':>10}{'MB out':>9}{'peak MB':>9}")
+    for step in range(1, args.steps + 1):
+        batch = ids[: len(ids) * step // args.steps]
+        tracemalloc.start()
+        start = time.perf_counter()
+        size = sum(len(chunk) for chunk in FacturaeExportService.stream_batch(user_id, perfil, ids=batch))
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{len(batch):>9}{len(batch) / elapsed:>10.0f}{size / 2 ** 20:>9.1f}{peak / 2 ** 20:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Benchmark: product validation of a 500-line invoice.
+
+Compares the previous path (one ``Producto`` query per write plus a linear
+``next(...)`` scan per line) with the per-tenant catalog used by the
+facturas router, then times POST /api/facturas/ end to end.
+
+Usage (from backend/):
+    python scripts/bench_invoice_validation.py [--lines 500] [--products 2000] [--repeat 50]
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite file.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date
+from decimal import Decimal
+
+from bench_serialization import seed  # noqa: F401  (sets up sys.path / DATABASE_URL)
+
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from app.main import app
+from app.db.database import Base, SessionLocal, engine
+from app.models import Cliente, Factura, LineaFactura, Producto
+from app.services.catalog import product_catalog
+
+BENCH_USER_ID = "user_bench_invoice_validation"
+
+
+def seed_catalog(products: int) -> int:
+    db = SessionLocal()
+    try:
+        facturas = db.query(Factura.id).filter(Factura.user_id == BENCH_USER_ID)
+        db.query(LineaFactura).filter(LineaFactura.factura_id.in_(facturas.scalar_subquery())).delete(synchronize_session=False)
+        db.query(Factura).filter(Factura.user_id == BENCH_USER_ID).delete()
+        db.query(Producto).filter(Producto.user_id == BENCH_USER_ID).delete()
+        db.query(Cliente).filter(Cliente.user_id == BENCH_USER_ID).delete()
+        cliente = Cliente(nombre="Cliente Benchmark S.L.", user_id=BENCH_USER_ID)
+        db.add(cliente)
+        db.bulk_insert_mappings(Producto, [
+            {"nombre": f"Producto {i}", "codigo": f"P{i:05d}", "precio": Decimal("10.00"), "user_id": BENCH_USER_ID}
+            for i in range(products)
+        ])
+        db.commit()
+        return cliente.id
+    finally:
+        db.close()
+
+
+def legacy_validate(producto_ids):
+    # What the router did before: query every write, then scan per line
+    db = SessionLocal()
+    try:
+        productos = db.query(Producto).filter(
+            Producto.id.in_(producto_ids),
+            Producto.user_id == BENCH_USER_ID
+        ).all()
+        return [next(p for p in productos if p.id == producto_id).nombre for producto_id in producto_ids]
+    finally:
+        db.close()
+
+
+def catalog_validate(producto_ids):
+    db = SessionLocal()
+    try:
+        productos = product_catalog.get(db, BENCH_USER_ID, producto_ids)
+        return [productos[producto_id].nombre for producto_id in producto_ids]
+    finally:
+        db.close()
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=500)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    cliente_id = seed_catalog(args.products)
+    db = SessionLocal()
+    ids = [row.id for row in db.query(Producto.id).filter(Producto.user_id == BENCH_USER_ID)]
+    db.close()
+    producto_ids = random.Random(0).sample(ids, min(args.lines, len(ids)))
+    assert legacy_validate(producto_ids) == catalog_validate(producto_ids)
+
+    legacy = timed(lambda: legacy_validate(producto_ids), args.repeat)
+    catalog = timed(lambda: catalog_validate(producto_ids), args.repeat)
+    product_catalog.clear()
+    cold = timed(lambda: (product_catalog.clear(), catalog_validate(producto_ids)), max(1, args.repeat // 5))
+
+    print(f"{len(producto_ids)} lines, {args.products} products in the tenant catalog (median ms)")
+    print(f"  legacy query + scan   {legacy:9.2f}")
+    print(f"  catalog (cold load)   {cold:9.2f}")
+    print(f"  catalog (warm)        {catalog:9.2f}   x{legacy / catalog:.0f}")
+
+    token = jwt.encode({"sub": BENCH_USER_ID, "pla": "u:pro"}, "bench", algorithm="HS256")
+    client = TestClient(app)
+    payload = {
+        "cliente_id": cliente_id,
+        "fecha": date.today().isoformat(),
+        "lineas": [
+            {"producto_id": producto_id, "cantidad": "1", "precio_unitario": "10.00", "tipo_iva": "21"}
+            for producto_id in producto_ids
+        ],
+    }
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def post():
+        response = client.post("/api/facturas/", json=payload, headers=headers)
+        assert response.status_code == 200, response.text
+
+    print(f"  POST /api/facturas/   {timed(post, max(1, args.repeat // 5)):9.2f}   (end to end)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Benchmark: editing one line of a large invoice.
+
+Compares the previous update path (delete every line of the invoice and
+re-insert all of them) with the diff-based one used by
+PUT /api/facturas/{id}, which only writes the lines that changed. Reports
+the median time, statements and rows written per edit, then times the
+PUT end to end.
+
+Usage (from backend/):
+    python scripts/bench_line_updates.py [--lines 300] [--repeat 50]
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite file.
+"""
+import argparse
+import statistics
+import time
+from datetime import date
+from decimal import Decimal
+
+from bench_serialization import seed  # noqa: F401  (sets up sys.path / DATABASE_URL)
+
+from fastapi.testclient import TestClient
+from jose import jwt
+from sqlalchemy import event
+
+from app.main import app
+from app.api.routers.facturas import apply_lineas_diff, calculate_invoice_totals, insert_lineas
+from app.db.database import Base, SessionLocal, engine
+from app.models import Cliente, Factura, LineaFactura, Producto
+from app.schemas.factura import LineaFacturaEdit
+from app.services.catalog import product_catalog
+
+BENCH_USER_ID = "user_bench_line_updates"
+
+
+class WriteCounter:
+    """Counts write statements and the rows they affect"""
+
+    def __init__(self):
+        self.statements = 0
+        self.rows = 0
+        event.listen(engine, "after_cursor_execute", self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+            self.statements += 1
+            self.rows += max(cursor.rowcount, 0) if not executemany else len(parameters)
+
+    def reset(self):
+        self.statements = self.rows = 0
+
+
+def seed_invoice(client: TestClient, headers: dict, lines: int) -> dict:
+    db = SessionLocal()
+    try:
+        facturas = db.query(Factura.id).filter(Factura.user_id == BENCH_USER_ID)
+        db.query(LineaFactura).filter(LineaFactura.factura_id.in_(facturas.scalar_subquery())).delete(synchronize_session=False)
+        db.query(Factura).filter(Factura.user_id == BENCH_USER_ID).delete()
+        db.query(Producto).filter(Producto.user_id == BENCH_USER_ID).delete()
+        db.query(Cliente).filter(Cliente.user_id == BENCH_USER_ID).delete()
+        cliente = Cliente(nombre="Cliente Benchmark S.L.", user_id=BENCH_USER_ID)
+        db.add(cliente)
+        db.bulk_insert_mappings(Producto, [
+            {"nombre": f"Producto {i}", "codigo": f"P{i:05d}", "precio": Decimal("10.00"), "user_id": BENCH_USER_ID}
+            for i in range(50)
+        ])
+        db.commit()
+        producto_ids = [row.id for row in db.query(Producto.id).filter(Producto.user_id == BENCH_USER_ID)]
+        cliente_id = cliente.id
+    finally:
+        db.close()
+    product_catalog.clear()
+    payload = {
+        "cliente_id": cliente_id,
+        "fecha": date.today().isoformat(),
+        "lineas": [
+            {"producto_id": producto_ids[i % len(producto_ids)], "cantidad": "1", "precio_unitario": "10.00", "tipo_iva": "21"}
+            for i in range(lines)
+        ],
+    }
+    response = client.post("/api/facturas/", json=payload, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def legacy_update(factura_id: int, lineas, productos) -> None:
+    # What the router did before: delete every line and insert them all again
+    db = SessionLocal()
+    try:
+        factura = db.query(Factura).filter(Factura.id == factura_id).one()
+        db.query(LineaFactura).filter(LineaFactura.factura_id == factura_id).delete()
+        nuevas = [
+            LineaFactura(
+                factura_id=factura_id,
+                producto_id=linea.producto_id,
+                descripcion=linea.descripcion or productos[linea.producto_id].nombre,
+                cantidad=linea.cantidad,
+                precio_unitario=linea.precio_unitario,
+                tipo_iva=linea.tipo_iva,
+                subtotal=linea.cantidad * linea.precio_unitario,
+            )
+            for linea in lineas
+        ]
+        insert_lineas(db, factura_id, nuevas)
+        totales = calculate_invoice_totals(nuevas)
+        factura.subtotal, factura.total_iva, factura.total = totales["subtotal"], totales["total_iva"], totales["total"]
+        db.commit()
+    finally:
+        db.close()
+
+
+def diff_update(factura_id: int, lineas, productos) -> None:
+    db = SessionLocal()
+    try:
+        factura = db.query(Factura).filter(Factura.id == factura_id).one()
+        diff = apply_lineas_diff(db, factura_id, lineas, productos)
+        if diff["cambios"]:
+            totales = diff["totales"]
+            factura.subtotal, factura.total_iva, factura.total = totales["subtotal"], totales["total_iva"], totales["total"]
+        db.commit()
+    finally:
+        db.close()
+
+
+def current_lines(factura_id: int):
+    db = SessionLocal()
+    try:
+        rows = db.query(LineaFactura).filter(LineaFactura.factura_id == factura_id).order_by(LineaFactura.id).all()
+        return [
+            {"id": l.id, "producto_id": l.producto_id, "descripcion": l.descripcion, "cantidad": str(l.cantidad),
+             "precio_unitario": str(l.precio_unitario), "tipo_iva": str(l.tipo_iva)}
+            for l in rows
+        ]
+    finally:
+        db.close()
+
+
+def measure(update, factura_id: int, productos, repeat: int, counter: WriteCounter, keep_ids: bool):
+    samples, statements, rows = [], 0, 0
+    for i in range(repeat):
+        lineas = current_lines(factura_id)
+        lineas[len(lineas) // 2]["cantidad"] = str(2 + i % 5)
+        if not keep_ids:
+            for linea in lineas:
+                linea.pop("id")
+        edits = [LineaFacturaEdit(**linea) for linea in lineas]
+        counter.reset()
+        start = time.perf_counter()
+        update(factura_id, edits, productos)
+        samples.append(time.perf_counter() - start)
+        statements += counter.statements
+        rows += counter.rows
+    return statistics.median(samples) * 1000, statements / repeat, rows / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    token = jwt.encode({"sub": BENCH_USER_ID, "pla": "u:pro"}, "bench", algorithm="HS256")
+    headers = {"Authorization": f"Bearer {token}"}
+    client = TestClient(app)
+    factura = seed_invoice(client, headers, args.lines)
+    factura_id = factura["id"]
+    db = SessionLocal()
+    producto_ids = {linea["producto_id"] for linea in factura["lineas"]}
+    productos = product_catalog.get(db, BENCH_USER_ID, producto_ids)
+    db.close()
+
+    counter = WriteCounter()
+    print(f"one line edited on a {args.lines}-line invoice (median ms, per edit)")
+    print(f"  {'':<22}{'ms':>9}{'writes':>9}{'rows':>9}")
+    legacy = measure(legacy_update, factura_id, productos, args.repeat, counter, keep_ids=False)
+    print(f"  {'delete + re-insert':<22}{legacy[0]:9.2f}{legacy[1]:9.0f}{legacy[2]:9.0f}")
+    diff = measure(diff_update, factura_id, productos, args.repeat, counter, keep_ids=True)
+    print(f"  {'diff':<22}{diff[0]:9.2f}{diff[1]:9.0f}{diff[2]:9.0f}   x{legacy[0] / diff[0]:.1f}")
+
+    samples = []
+    for i in range(max(1, args.repeat // 5)):
+        lineas = current_lines(factura_id)
+        lineas[0]["cantidad"] = str(2 + i % 5)
+        start = time.perf_counter()
+        response = client.put(f"/api/facturas/{factura_id}", json={"lineas": lineas}, headers=headers)
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    print(f"  PUT /api/facturas/{{id}} {statistics.median(samples) * 1000:9.2f}   (end to end, diff)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark: invoice totals with Decimal loops vs integer cents (app.core.money).
+
+Compares the previous ``calculate_invoice_totals`` (one Decimal multiply,
+divide and add per line) with ``MoneyBatch`` for invoices of several sizes,
+then the sum of many invoice totals: ``sum()`` over Decimals, ``sum_cents``
+(converting each amount) and a sum over amounts already held as cents.
+Also reports how many invoices get a different total (the old loop kept
+the unrounded VAT of each line).
+
+Usage (from backend/):
+    python scripts/bench_money.py [--invoices 20000] [--repeat 5]
+
+Needs no database.
+"""
+import argparse
+import random
+import sys
+import time
+from array import array
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.money import from_cents, invoice_totals, line_cents, sum_cents, to_cents  # noqa: E402
+
+BENCH_SEED = 4949
+IVA_RATES = (Decimal("21.00"), Decimal("10.00"), Decimal("4.00"), Decimal("0.00"))
+
+
+def decimal_totals(lineas) -> dict:
+    # What calculate_invoice_totals did before
+    subtotal = Decimal('0.00')
+    total_iva = Decimal('0.00')
+    for linea in lineas:
+        linea_subtotal = linea.cantidad * linea.precio_unitario
+        linea_iva = linea_subtotal * (linea.tipo_iva / 100)
+        subtotal += linea_subtotal
+        total_iva += linea_iva
+    return {'subtotal': subtotal, 'total_iva': total_iva, 'total': subtotal + total_iva}
+
+
+def cents_totals(lineas) -> dict:
+    return invoice_totals(lineas).as_decimals()
+
+
+def make_invoice(rng: random.Random, size: int) -> list:
+    return [
+        SimpleNamespace(
+            cantidad=Decimal(rng.randint(1, 2000)).scaleb(-2),
+            precio_unitario=Decimal(rng.randint(1, 500000)).scaleb(-2),
+            tipo_iva=rng.choices(IVA_RATES, (78, 14, 6, 2))[0],
+        )
+        for _ in range(size)
+    ]
+
+
+def best(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=20000, help="invoices in the aggregation test")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    rng = random.Random(BENCH_SEED)
+
+    print("invoice totals (lines per second)")
+    print(f"  {'lines':>7}{'Decimal':>12}{'cents':>12}{'speedup':>9}")
+    for size in (3, 30, 300, 3000):
+        facturas = [make_invoice(rng, size) for _ in range(max(1, 30000 // size))]
+        lines = size * len(facturas)
+        old = best(lambda: [decimal_totals(f) for f in facturas], args.repeat)
+        new = best(lambda: [cents_totals(f) for f in facturas], args.repeat)
+        print(f"  {size:>7}{lines / old:>12.0f}{lines / new:>12.0f}{old / new:>8.1f}x")
+
+    facturas = [make_invoice(rng, rng.randint(1, 8)) for _ in range(args.invoices)]
+    differ = 0
+    for factura in facturas:
+        old = decimal_totals(factura)["total"].quantize(Decimal("0.01"))
+        differ += old != cents_totals(factura)["total"]
+    print(f"  {differ} of {len(facturas)} random invoices get another total (lines rounded to cents, VAT per rate)")
+
+    totals = [from_cents(sum(line_cents(l.cantidad, l.precio_unitario) for l in f)) for f in facturas]
+    held = array("q", map(to_cents, totals))
+    assert sum(totals) == from_cents(sum_cents(totals)) == from_cents(sum(held))
+    print(f"\nsum of {len(totals)} invoice totals (ms)")
+    print(f"  {'sum(Decimal)':<22}{best(lambda: sum(totals, Decimal(0)), args.repeat) * 1000:9.2f}")
+    print(f"  {'sum_cents(Decimal)':<22}{best(lambda: sum_cents(totals), args.repeat) * 1000:9.2f}")
+    print(f"  {'sum(array of cents)':<22}{best(lambda: sum(held), args.repeat) * 1000:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
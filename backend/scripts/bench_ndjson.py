@@ -0,0 +1,92 @@
+"""Benchmark: invoice list as one JSON document vs streamed NDJSON.
+
+Encodes every invoice of a seeded user both ways: fetching all rows and
+serializing them at once (``serialize_factura_rows``, what a JSON page does
+at any size) and the ``NDJSONStreamService`` stream sent with
+``Accept: application/x-ndjson``. Reports the time to the first byte, the
+total time and the peak Python memory (tracemalloc) of each. The stream's
+peak stays at about one fetch batch whatever the number of rows.
+
+Usage (from backend/):
+    python scripts/bench_ndjson.py [--rows 50000] [--steps 3]
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite file.
+"""
+import argparse
+import time
+import tracemalloc
+
+from bench_serialization import BENCH_USER_ID, seed
+
+from sqlalchemy import select
+
+from app.db.database import Base, SessionLocal, engine
+from app.models import Cliente, Factura
+from app.core.serialization import factura_list_ndjson, serialize_factura_rows
+from app.services.streaming import NDJSONStreamService
+
+
+def statement(limit: int):
+    return (
+        select(
+            Factura.id, Factura.numero, Factura.fecha, Factura.cliente_id,
+            Cliente.nombre.label("cliente_nombre"), Factura.total, Factura.estado,
+            Factura.created_at,
+        )
+        .join(Cliente)
+        .where(Factura.user_id == BENCH_USER_ID)
+        .order_by(Factura.id)
+        .limit(limit)
+    )
+
+
+def whole(limit: int):
+    db = SessionLocal()
+    try:
+        body = serialize_factura_rows(db.execute(statement(limit)).all())
+    finally:
+        db.close()
+    yield body
+
+
+def streamed(limit: int):
+    return NDJSONStreamService.stream(statement(limit), factura_list_ndjson)
+
+
+def measure(chunks) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    size = 0
+    for chunk in chunks:
+        if first is None:
+            first = time.perf_counter() - start
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first or elapsed, elapsed, peak, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000, help="invoices seeded, and listed in the largest step")
+    parser.add_argument("--steps", type=int, default=3)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    seed(args.rows)
+
+    print(f"{'rows':>8}  {'mode':<7}{'first ms':>10}{'total ms':>10}{'MB out':>8}{'peak MB':>9}")
+    for step in range(1, args.steps + 1):
+        limit = args.rows * step // args.steps
+        for mode, chunks in (("json", whole(limit)), ("ndjson", streamed(limit))):
+            first, elapsed, peak, size = measure(chunks)
+            print(
+                f"{limit:>8}  {mode:<7}{first * 1000:>10.1f}{elapsed * 1000:>10.1f}"
+                f"{size / 2 ** 20:>8.1f}{peak / 2 ** 20:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Benchmark: serialized rows per second for GET /api/facturas/?limit=1000.
+
+Compares the previous path (pydantic from_attributes validation per row +
+FastAPI/Starlette ``json.dumps``) with the TypeAdapter + orjson path used by
+the router, and measures the full request end to end.
+
+Usage (from backend/):
+    python scripts/bench_serialization.py [--rows 1000] [--repeat 20]
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite file.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from jose import jwt  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.db.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import Cliente, Factura, EstadoFactura  # noqa: E402
+from app.core.serialization import factura_list_adapter, serialize_factura_rows  # noqa: E402
+
+BENCH_USER_ID = "user_bench_serialization"
+
+
+def seed(rows: int) -> None:
+    db = SessionLocal()
+    try:
+        db.query(Factura).filter(Factura.user_id == BENCH_USER_ID).delete()
+        db.query(Cliente).filter(Cliente.user_id == BENCH_USER_ID).delete()
+        cliente = Cliente(nombre="Cliente Benchmark S.L.", user_id=BENCH_USER_ID)
+        db.add(cliente)
+        db.flush()
+        estados = list(EstadoFactura)
+        today = date.today()
+        db.bulk_insert_mappings(Factura, [
+            {
+                "numero": f"{today.year}-{i:06d}",
+                "fecha": today - timedelta(days=i % 365),
+                "cliente_id": cliente.id,
+                "subtotal": Decimal("100.00") + i,
+                "total_iva": Decimal("21.00"),
+                "total": Decimal("121.00") + i,
+                "estado": estados[i % len(estados)],
+                "user_id": BENCH_USER_ID,
+            }
+            for i in range(rows)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def fetch_rows(limit: int):
+    db = SessionLocal()
+    try:
+        return db.query(
+            Factura.id, Factura.numero, Factura.fecha, Factura.cliente_id,
+            Cliente.nombre.label("cliente_nombre"), Factura.total, Factura.estado,
+            Factura.created_at
+        ).join(Cliente).filter(Factura.user_id == BENCH_USER_ID).limit(limit).all()
+    finally:
+        db.close()
+
+
+def legacy_serialize(rows) -> bytes:
+    # What FastAPI did before: validate from attributes, dump to python, json.dumps
+    value = factura_list_adapter.validate_python(rows, from_attributes=True)
+    content = factura_list_adapter.dump_python(value, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    seed(args.rows)
+    rows = fetch_rows(args.rows)
+
+    token = jwt.encode({"sub": BENCH_USER_ID, "pla": "u:pro"}, "bench", algorithm="HS256")
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {token}"}
+    url = f"/api/facturas/?limit={min(args.rows, 1000)}"
+
+    results = {
+        "legacy (from_attributes + json.dumps)": timed(lambda: legacy_serialize(rows), args.repeat),
+        "fast (TypeAdapter + dump_json)": timed(lambda: serialize_factura_rows(rows), args.repeat),
+        "end-to-end GET /api/facturas/": timed(lambda: client.get(url, headers=headers), args.repeat),
+    }
+
+    print(f"rows={len(rows)} repeat={args.repeat} (best run)")
+    for name, seconds in results.items():
+        print(f"  {name:<42} {seconds * 1000:8.2f} ms  {len(rows) / seconds:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
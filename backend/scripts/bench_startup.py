@@ -0,0 +1,113 @@
+"""Benchmark: cold-start import time of the API process and warm-up cost.
+
+Spawns fresh interpreters (as a worker respawn does) that run
+``import app.main`` under ``-X importtime``, then reports wall time, the
+import time of app.main, the slowest top-level packages and whether any
+module meant to be lazy (see app.core.startup.LAZY_MODULES) was imported
+eagerly. A separate run times ``warm_up()``.
+
+Exits non-zero when a lazy module leaks into the import graph or the median
+import time exceeds ``--budget-ms``, so it can run in CI.
+
+Usage (from backend/):
+    python scripts/bench_startup.py [--runs 5] [--top 15] [--budget-ms 0]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench_startup.db")
+
+IMPORT_SNIPPET = """
+import json, sys
+import app.main
+from app.core.startup import LAZY_MODULES
+print(json.dumps([m for m in LAZY_MODULES if m in sys.modules]))
+"""
+
+WARMUP_SNIPPET = """
+import json
+import app.main
+from app.core.startup import warm_up
+print(json.dumps(warm_up()))
+"""
+
+# import time: self [us] | cumulative | imported package
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def run(snippet: str, importtime: bool = False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", snippet]
+    start = time.perf_counter()
+    result = subprocess.run(cmd, cwd=BACKEND_DIR, capture_output=True, text=True, env=os.environ.copy())
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        sys.exit(f"child process failed:\n{result.stderr[-2000:]}")
+    return wall, result.stdout.strip().splitlines()[-1], result.stderr
+
+
+def parse_importtime(stderr: str):
+    """Cumulative microseconds of app.main and self time summed per top-level package"""
+    app_main = 0
+    packages = {}
+    for line in stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if not match:
+            continue
+        self_time, cumulative, _, name = match.groups()
+        if name == "app.main":
+            app_main = int(cumulative)
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + int(self_time)
+    return app_main, packages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=0, help="fail if median import time exceeds this")
+    args = parser.parse_args()
+
+    walls, imports, leaked = [], [], set()
+    packages = {}
+    for _ in range(args.runs):
+        wall, stdout, stderr = run(IMPORT_SNIPPET, importtime=True)
+        app_main, per_package = parse_importtime(stderr)
+        walls.append(wall)
+        imports.append(app_main / 1e6)
+        leaked.update(json.loads(stdout))
+        packages = per_package
+
+    print(f"runs: {args.runs}")
+    print(f"process wall time  median {statistics.median(walls) * 1000:7.0f} ms   min {min(walls) * 1000:7.0f} ms")
+    print(f"import app.main    median {statistics.median(imports) * 1000:7.0f} ms   min {min(imports) * 1000:7.0f} ms")
+
+    print("\nslowest packages (self time of all their modules, last run):")
+    for name, micros in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:<28}{micros / 1000:8.1f} ms")
+
+    _, stdout, _ = run(WARMUP_SNIPPET)
+    timings = json.loads(stdout)
+    print(f"\nwarm-up: {sum(timings.values()) * 1000:.0f} ms ("
+          + ", ".join(f"{k} {v * 1000:.0f} ms" for k, v in timings.items()) + ")")
+
+    failed = False
+    if leaked:
+        print(f"\nFAIL: lazy modules imported by app.main: {', '.join(sorted(leaked))}")
+        failed = True
+    if args.budget_ms and statistics.median(imports) * 1000 > args.budget_ms:
+        print(f"\nFAIL: median import time above budget of {args.budget_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
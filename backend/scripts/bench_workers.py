@@ -0,0 +1,130 @@
+"""Load test: throughput of the production server with 1 worker vs N workers.
+
+Starts gunicorn with gunicorn.conf.py for each worker count, drives
+GET /api/facturas/?limit=100 with concurrent keep-alive clients for a fixed
+duration and reports requests/s, latency percentiles, errors and how many
+distinct worker processes answered /health/worker.
+
+Usage (from backend/):
+    python scripts/bench_workers.py [--workers 1,4] [--concurrency 32] [--duration 10] [--rows 1000]
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite file. With SQLite
+the numbers are only indicative; point it at PostgreSQL for real figures.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+from bench_serialization import BENCH_USER_ID, seed  # also sets up sys.path / DATABASE_URL
+
+import httpx
+from jose import jwt
+
+from app.db.database import Base, engine
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": str(workers),
+        "BIND": f"127.0.0.1:{port}",
+        "STARTUP_WARMUP": "blocking",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app.main:app", "-c", "gunicorn.conf.py", "--access-logfile", os.devnull],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(base_url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not become ready")
+
+
+async def load(base_url: str, path: str, headers: dict, concurrency: int, duration: float):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.get(path, headers=headers)
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def distinct_workers(base_url: str, probes: int = 50) -> int:
+    # New connection per probe so requests spread over the workers
+    return len({httpx.get(f"{base_url}/health/worker").json()["pid"] for _ in range(probes)})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    seed(args.rows)
+    token = jwt.encode({"sub": BENCH_USER_ID, "pla": "u:pro"}, "bench", algorithm="HS256")
+    headers = {"Authorization": f"Bearer {token}"}
+    path = "/api/facturas/?limit=100"
+
+    print(f"cpus: {os.cpu_count()}  concurrency: {args.concurrency}  duration: {args.duration:.0f}s  {path}")
+    print(f"{'workers':>8}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'pids':>6}")
+    baseline = None
+    for workers in (int(w) for w in args.workers.split(",")):
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = start_server(workers, args.port)
+        try:
+            wait_ready(base_url)
+            latencies, errors, elapsed = asyncio.run(
+                load(base_url, path, headers, args.concurrency, args.duration)
+            )
+            pids = distinct_workers(base_url)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+
+        rps = len(latencies) / elapsed
+        baseline = baseline or rps
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0] * 99
+        print(
+            f"{workers:>8}{rps:>10.0f}{quantiles[49] * 1000:>9.1f}{quantiles[94] * 1000:>9.1f}"
+            f"{quantiles[98] * 1000:>9.1f}{errors:>8}{pids:>6}   x{rps / baseline:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Query-budget check: every route with ``@query_budget(n)`` stays within ``n``.
+
+Seeds one synthetic tenant (app.db.synthetic) and calls every budgeted
+route through ``TestClient`` with ``QUERY_BUDGET_MODE=raise``, so a route
+that runs more SQL statements than it declares raises
+``QueryBudgetExceeded`` (see app.core.query_budget). The check fails when
+a request exceeds its budget, when it does not succeed, and when a budgeted
+route has no request in REQUESTS (a new route must be added here).
+
+Exits with status 1 when any check fails, so it can run in CI next to
+scripts/check_query_plans.py.
+
+Usage (from backend/):
+    python scripts/check_query_budgets.py [--invoices 300]
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite file.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/budgets.db"
+os.environ["QUERY_BUDGET_MODE"] = "raise"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from jose import jwt  # noqa: E402
+from starlette.routing import Match  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.core.query_budget import QueryBudgetExceeded, budget_for  # noqa: E402
+from app.db.database import Base, SessionLocal, engine  # noqa: E402
+from app.db.synthetic import SyntheticDataGenerator, generate_synthetic_data  # noqa: E402
+from app.models import Cliente, Factura, Producto  # noqa: E402
+
+BENCH_SEED = 3232
+
+PERFIL = {
+    "nombre": "Presupuestos S.L.", "nif": "B00000000", "direccion": "Calle Mayor, 1",
+    "codigo_postal": "28001", "ciudad": "Madrid", "provincia": "Madrid", "iban": "ES0000000000000000000000",
+}
+
+# (method, url, body, extra headers); {factura}, {cliente}, {producto}, {cliente_nuevo}... are
+# filled in from the seeded tenant and from the responses of earlier requests
+REQUESTS: List[Tuple[str, str, Optional[dict], Optional[dict]]] = [
+    ("POST", "/api/perfil-empresa", PERFIL, None),
+    ("GET", "/api/perfil-empresa", None, None),
+    ("PUT", "/api/perfil-empresa", {"telefono": "910000000"}, None),
+
+    ("GET", "/api/clientes/", None, None),
+    ("GET", "/api/clientes/?q=garcia&limit=20", None, None),
+    ("GET", "/api/clientes/", None, {"Accept": "application/x-ndjson"}),
+    ("GET", "/api/clientes/autocomplete?q=ga", None, None),
+    ("GET", "/api/clientes/{cliente}", None, None),
+    ("POST", "/api/clientes/", {"nombre": "Cliente Presupuesto", "nif": "B11111111", "email": "p@example.com"}, None),
+    ("PUT", "/api/clientes/{cliente_nuevo}", {"telefono": "600000000"}, None),
+    ("DELETE", "/api/clientes/{cliente_nuevo}", None, None),
+
+    ("GET", "/api/productos/", None, None),
+    ("GET", "/api/productos/?q=caldera&limit=20", None, None),
+    ("GET", "/api/productos/", None, {"Accept": "application/x-ndjson"}),
+    ("GET", "/api/productos/autocomplete?q=re", None, None),
+    ("GET", "/api/productos/{producto}", None, None),
+    ("POST", "/api/productos/", {"nombre": "Producto Presupuesto", "precio": "10.00"}, None),
+    ("PUT", "/api/productos/{producto_nuevo}", {"precio": "12.00"}, None),
+    ("DELETE", "/api/productos/{producto_nuevo}", None, None),
+
+    ("GET", "/api/facturas/?limit=100", None, None),
+    ("GET", "/api/facturas/?limit=100&estado=enviada&fecha_desde=2000-01-01", None, None),
+    ("GET", "/api/facturas/?limit=20&q=caldera", None, None),
+    ("GET", "/api/facturas/", None, {"Accept": "application/x-ndjson"}),
+    ("GET", "/api/facturas/aging", None, None),
+    ("GET", "/api/facturas/{factura}", None, None),
+    ("POST", "/api/facturas/", "{nueva}", None),
+    ("POST", "/api/facturas/", "{nueva}", {"Idempotency-Key": "budget-check"}),
+    ("POST", "/api/facturas/", "{nueva}", {"Idempotency-Key": "budget-check"}),
+    ("PUT", "/api/facturas/{factura_nueva}", "{lineas}", None),
+    ("POST", "/api/facturas/estado", "{estado}", None),
+    ("GET", "/api/facturas/{factura}/pdf", None, None),
+    ("GET", "/api/facturas/{factura}/pdf/preview", None, None),
+    ("GET", "/api/facturas/{factura}/facturae", None, None),
+    ("GET", "/api/facturas/export/facturae?fecha_desde=2000-01-01", None, None),
+    ("DELETE", "/api/facturas/{factura_nueva}", None, None),
+
+    ("GET", "/dashboard/stats", None, None),
+    ("GET", "/api/billing/usage", None, None),
+    ("DELETE", "/api/perfil-empresa", None, None),
+]
+
+# Create routes whose new id is kept for later requests
+CREATED = {
+    ("POST", "/api/clientes/"): "cliente_nuevo",
+    ("POST", "/api/productos/"): "producto_nuevo",
+    ("POST", "/api/facturas/"): "factura_nueva",
+}
+
+
+def budgeted_routes() -> Dict[Tuple[str, str], object]:
+    return {
+        (method, route.path): route
+        for route in app.routes
+        if budget_for(getattr(route, "endpoint", None)) is not None
+        for method in route.methods
+    }
+
+
+def route_of(method: str, url: str) -> Optional[Tuple[str, str]]:
+    scope = {"type": "http", "method": method, "path": url.split("?")[0]}
+    for route in app.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return method, route.path
+    return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=300, help="invoices of the seeded tenant")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    user_id = SyntheticDataGenerator.tenant_id(BENCH_SEED, 0)
+    db = SessionLocal()
+    try:
+        if db.query(Factura.id).filter(Factura.user_id == user_id).count() < args.invoices:
+            generate_synthetic_data(1, args.invoices, BENCH_SEED)
+        ids = {
+            "factura": db.query(Factura.id).filter(Factura.user_id == user_id).order_by(Factura.id.desc()).first()[0],
+            "cliente": db.query(Cliente.id).filter(Cliente.user_id == user_id).first()[0],
+            "producto": db.query(Producto.id).filter(Producto.user_id == user_id).first()[0],
+        }
+        producto_ids = [p.id for p in db.query(Producto.id).filter(Producto.user_id == user_id).limit(3)]
+    finally:
+        db.close()
+    lineas = [{"producto_id": p, "cantidad": "1", "precio_unitario": "10.00", "tipo_iva": "21"} for p in producto_ids]
+    bodies = {
+        "{nueva}": {"cliente_id": ids["cliente"], "fecha": date.today().isoformat(), "lineas": lineas},
+        "{lineas}": {"lineas": lineas[:2] + [{**lineas[-1], "cantidad": "2"}]},
+        "{estado}": {"estado": "pagada", "ids": [ids["factura"]]},
+    }
+    token = jwt.encode({"sub": user_id, "pla": "u:pro"}, "budgets", algorithm="HS256")
+    client = TestClient(app)
+
+    routes = budgeted_routes()
+    covered = set()
+    failures = []
+    for method, url, body, extra_headers in REQUESTS:
+        url = url.format(**ids)
+        label = f"{method} {url}"
+        route = route_of(method, url)
+        try:
+            response = client.request(
+                method, url, json=bodies[body] if isinstance(body, str) else body,
+                headers={"Authorization": f"Bearer {token}", **(extra_headers or {})},
+            )
+        except QueryBudgetExceeded as e:
+            failures.append(f"{label}: {e}")
+            print(f"FAIL {label}")
+            continue
+        if response.status_code >= 400:
+            failures.append(f"{label}: status {response.status_code}: {response.text[:300]}")
+            print(f"FAIL {label} ({response.status_code})")
+            continue
+        queries = response.headers.get("X-Query-Count", "?")
+        budget = budget_for(routes[route].endpoint) if route in routes else None
+        print(f"ok   {label:<70} {queries:>3} / {budget if budget is not None else '-'}")
+        covered.add(route)
+        # Ids created along the way are used by the requests that follow
+        if route in CREATED:
+            ids[CREATED[route]] = response.json()["id"]
+
+    for route in sorted(routes.keys() - covered):
+        failures.append(f"{route[0]} {route[1]}: budgeted route without a successful request in REQUESTS")
+
+    if failures:
+        print(f"\n{len(failures)} failure(s):")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"\nAll {len(routes)} budgeted routes within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""Query-plan regression check for the hot queries the routers issue.
+
+Seeds synthetic tenants (scripts/generate_data.py) and replays the hot
+requests as the largest tenant, capturing every statement they send to the
+database. Each captured statement is explained and checked:
+
+- no sequential scan of ``facturas`` or ``lineas_factura``
+- on PostgreSQL, the estimated rows of every plan node stay within
+  ``--max-misestimate`` times the actual rows (EXPLAIN ANALYZE, rolled back)
+- each request uses the indexes listed in EXPECTED_INDEXES
+
+Exits with status 1 when any check fails, so it can run in CI after schema
+or ORM changes.
+
+Usage (from backend/):
+    python scripts/check_query_plans.py [--invoices 100000] [--tenants 50] [--show-plans]
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite file. SQLite has no
+row estimates in EXPLAIN QUERY PLAN, so only the scan and index checks run
+there; point it at PostgreSQL for the full check.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+from collections import defaultdict
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/plans.db"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from jose import jwt  # noqa: E402
+from sqlalchemy import event, func  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.db.database import Base, SessionLocal, engine  # noqa: E402
+from app.db.synthetic import generate_synthetic_data  # noqa: E402
+from app.models import Cliente, Factura, Producto  # noqa: E402
+
+# Tables that must never be read with a full scan
+GUARDED_TABLES = ("facturas", "lineas_factura")
+
+# Estimated vs actual rows may differ by this factor (nodes under MIN_ROWS_FOR_ESTIMATE rows are ignored)
+MAX_MISESTIMATE = 10
+MIN_ROWS_FOR_ESTIMATE = 1000
+
+# Indexes each request must use (any of the names, per table)
+EXPECTED_INDEXES = {
+    "list facturas": {"facturas": ("ix_facturas_user_id",)},
+    "list facturas estado": {"facturas": ("ix_facturas_user_id", "ix_facturas_pendientes")},
+    "list facturas cliente": {"facturas": ("ix_facturas_user_id", "ix_facturas_cliente_id")},
+    "list facturas fechas": {"facturas": ("ix_facturas_user_id",)},
+    "open factura": {"lineas_factura": ("ix_lineas_factura_factura_id",)},
+    "create factura (limit check)": {"facturas": ("ix_facturas_user_id",)},
+    "create factura": {"facturas": ("ix_facturas_user_numero",), "lineas_factura": ("ix_lineas_factura_factura_id",)},
+    "update factura lines": {"lineas_factura": ("ix_lineas_factura_factura_id",)},
+    "aging report": {"facturas": ("ix_facturas_pendientes",)},
+}
+
+
+class StatementRecorder:
+    """Collects the statements executed while ``label`` is set"""
+
+    def __init__(self):
+        self.label = None
+        self.statements: Dict[str, List[Tuple[str, object]]] = defaultdict(list)
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self.label is None or executemany:
+            return
+        if re.match(r"\s*(SELECT|UPDATE|DELETE)\b", statement, re.IGNORECASE):
+            self.statements[self.label].append((statement, parameters))
+
+
+def largest_tenant() -> str:
+    db = SessionLocal()
+    try:
+        return db.query(Factura.user_id).group_by(Factura.user_id).order_by(func.count(Factura.id).desc()).first()[0]
+    finally:
+        db.close()
+
+
+def replay(client: TestClient, recorder: StatementRecorder, user_id: str) -> None:
+    def headers(plan: str) -> dict:
+        return {"Authorization": f"Bearer {jwt.encode({'sub': user_id, 'pla': f'u:{plan}'}, 'plans', algorithm='HS256')}"}
+
+    db = SessionLocal()
+    try:
+        factura = db.query(Factura).filter(Factura.user_id == user_id).order_by(Factura.id.desc()).first()
+        cliente_id = db.query(Cliente.id).filter(Cliente.user_id == user_id).first()[0]
+        producto_ids = [p.id for p in db.query(Producto.id).filter(Producto.user_id == user_id).limit(3)]
+    finally:
+        db.close()
+    lineas = [{"producto_id": p, "cantidad": "1", "precio_unitario": "10.00", "tipo_iva": "21"} for p in producto_ids]
+    nueva = {"cliente_id": cliente_id, "fecha": date.today().isoformat(), "lineas": lineas}
+    pro = headers("pro")
+
+    requests = [
+        ("list facturas", "GET", "/api/facturas/?limit=100", pro, None),
+        ("list facturas estado", "GET", "/api/facturas/?limit=100&estado=ENVIADA", pro, None),
+        ("list facturas cliente", "GET", f"/api/facturas/?limit=100&cliente_id={factura.cliente_id}", pro, None),
+        ("list facturas fechas", "GET", f"/api/facturas/?limit=100&fecha_desde={factura.fecha}&fecha_hasta={factura.fecha}", pro, None),
+        ("search facturas", "GET", "/api/facturas/?limit=20&q=caldera", pro, None),
+        ("open factura", "GET", f"/api/facturas/{factura.id}", pro, None),
+        ("create factura (limit check)", "POST", "/api/facturas/", headers("free_user"), nueva),
+        ("create factura", "POST", "/api/facturas/", pro, nueva),
+        ("update factura lines", "PUT", f"/api/facturas/{factura.id}", pro, {"lineas": lineas}),
+        ("aging report", "GET", "/api/facturas/aging", pro, None),
+        ("dashboard stats", "GET", "/dashboard/stats", pro, None),
+        ("billing usage", "GET", "/api/billing/usage", pro, None),
+        ("search clientes", "GET", "/api/clientes/?q=garcia&limit=20", pro, None),
+        ("list productos", "GET", "/api/productos/?limit=100", pro, None),
+    ]
+    for label, method, url, request_headers, body in requests:
+        recorder.label = label
+        try:
+            response = client.request(method, url, headers=request_headers, json=body)
+        finally:
+            recorder.label = None
+        if response.status_code >= 500:
+            raise SystemExit(f"{label}: {method} {url} failed with {response.status_code}: {response.text}")
+
+
+def _pg_nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _pg_nodes(child)
+
+
+def explain(statement: str, parameters) -> Tuple[List[str], List[str], set, str]:
+    """(scanned guarded tables, misestimates, indexes used, plan text) for one statement"""
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            if connection.dialect.name == "postgresql":
+                analyze = "ANALYZE, " if statement.lstrip().upper().startswith("SELECT") else ""
+                result = connection.exec_driver_sql(f"EXPLAIN ({analyze}FORMAT JSON) {statement}", parameters)
+                plan = result.scalar()
+                plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+                return _check_pg(plan, analyze) + (json.dumps(plan, indent=1),)
+            rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            return _check_sqlite([row[-1] for row in rows])
+        finally:
+            transaction.rollback()
+
+
+def _check_pg(plan: dict, analyzed: str):
+    scans, misestimates, indexes = [], [], set()
+    for node in _pg_nodes(plan):
+        relation = node.get("Relation Name")
+        if node["Node Type"] == "Seq Scan" and relation in GUARDED_TABLES:
+            scans.append(relation)
+        if "Index Name" in node:
+            indexes.add(node["Index Name"])
+        if analyzed and node.get("Actual Loops"):
+            estimated, actual = node["Plan Rows"], node["Actual Rows"]
+            larger, smaller = max(estimated, actual), max(min(estimated, actual), 1)
+            if larger >= MIN_ROWS_FOR_ESTIMATE and larger / smaller > MAX_MISESTIMATE:
+                misestimates.append(f"{node['Node Type']} {relation or ''}: estimated {estimated}, actual {actual}".strip())
+    return scans, misestimates, indexes
+
+
+def _check_sqlite(details: List[str]):
+    scans, indexes = [], set()
+    for detail in details:
+        # 'SCAN facturas' / 'SCAN facturas USING INDEX x' read the whole table or index;
+        # 'SEARCH facturas USING INDEX x (user_id=?)' is an index lookup
+        match = re.match(r"SCAN (\w+)", detail)
+        if match and match.group(1) in GUARDED_TABLES:
+            scans.append(match.group(1))
+        index = re.search(r"USING (?:COVERING )?INDEX (\w+)", detail)
+        if index:
+            indexes.add(index.group(1))
+    return scans, [], indexes, "\n".join(details)
+
+
+def main() -> None:
+    global MAX_MISESTIMATE
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=100000)
+    parser.add_argument("--tenants", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-misestimate", type=float, default=MAX_MISESTIMATE)
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the data already in DATABASE_URL")
+    parser.add_argument("--show-plans", action="store_true")
+    args = parser.parse_args()
+    MAX_MISESTIMATE = args.max_misestimate
+
+    Base.metadata.create_all(bind=engine)
+    if not args.skip_seed:
+        generate_synthetic_data(args.tenants, args.invoices, args.seed)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+    user_id = largest_tenant()
+
+    recorder = StatementRecorder()
+    replay(TestClient(app), recorder, user_id)
+
+    failures = 0
+    print(f"{engine.dialect.name}: explaining hot queries as {user_id}")
+    for label, statements in recorder.statements.items():
+        used, problems = set(), []
+        for statement, parameters in statements:
+            scans, misestimates, indexes, plan = explain(statement, parameters)
+            used |= indexes
+            first_line = " ".join(statement.split())[:90]
+            problems += [f"full scan of {table}: {first_line}" for table in scans]
+            problems += [f"row estimate off: {m}: {first_line}" for m in misestimates]
+            if args.show_plans:
+                print(f"--- {label}: {first_line}\n{plan}")
+        for table, names in EXPECTED_INDEXES.get(label, {}).items():
+            if not used & set(names):
+                problems.append(f"no index of {', '.join(names)} used on {table}")
+        failures += bool(problems)
+        print(f"{'FAIL' if problems else 'ok':<5}{label} ({len(statements)} statements)")
+        for problem in problems:
+            print(f"       {problem}")
+    if failures:
+        print(f"{failures} request(s) with degraded plans")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
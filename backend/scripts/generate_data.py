@@ -0,0 +1,46 @@
+"""Generate synthetic tenants, clients, products and invoices for load testing.
+
+Usage (from backend/):
+    python scripts/generate_data.py [--tenants 1000] [--invoices 1000000] [--seed 0]
+    python scripts/generate_data.py --cleanup
+
+Writes to DATABASE_URL. Tenant ids are user_synth_<seed>_<n>; the same seed
+and --end-date always produce the same data. See app/db/synthetic.py.
+"""
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.db.database import Base, engine  # noqa: E402
+from app.db.synthetic import cleanup_synthetic_data, generate_synthetic_data  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenants", type=int, default=1000)
+    parser.add_argument("--invoices", type=int, default=1000000, help="approximate total across all tenants")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--days", type=int, default=730, help="span of invoice dates")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=None, help="latest invoice date (default: today)")
+    parser.add_argument("--batch", type=int, default=20000, help="rows buffered per COPY / executemany round")
+    parser.add_argument("--cleanup", action="store_true", help="delete every synthetic tenant instead")
+    args = parser.parse_args()
+
+    if args.cleanup:
+        print(cleanup_synthetic_data())
+        return
+    Base.metadata.create_all(bind=engine)
+    result = generate_synthetic_data(args.tenants, args.invoices, args.seed, args.days, args.end_date, args.batch)
+    rows = result["clients"] + result["products"] + result["invoices"] + result["invoice_lines"]
+    print(
+        f"{result['tenants']} tenants, {result['clients']} clients, {result['products']} products, "
+        f"{result['invoices']} invoices, {result['invoice_lines']} lines"
+    )
+    print(f"{rows} rows in {result['seconds']:.1f}s ({result['rows_per_second']} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
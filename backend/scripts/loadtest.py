@@ -0,0 +1,238 @@
+"""Load test: drive a realistic request mix against a running instance.
+
+Mints local dev JWTs (accepted unverified when CLERK_SECRET_KEY is not set on
+the server) for a set of tenants, discovers each tenant's invoices, clients
+and products, then runs closed-loop clients for a fixed duration over a
+weighted mix of routes: list invoices, open invoice, create invoice,
+download PDF, dashboard stats and billing usage. Reports throughput, p50,
+p95 and p99 latency and error rate per route. Results can be saved as JSON
+and compared with a previous run.
+
+Usage (from backend/):
+    python scripts/loadtest.py [--base-url http://localhost:8000] [--synthetic-seed 0 --tenants 50]
+    python scripts/loadtest.py --users user_a,user_b --concurrency 64 --duration 60
+    python scripts/loadtest.py --output run2.json --compare run1.json
+
+Tenants default to the ones created by scripts/generate_data.py. Created
+invoices are real writes: point it at a disposable database.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+from jose import jwt
+
+DEFAULT_MIX = "list=35,open=25,dashboard=15,usage=10,create=10,pdf=5"
+ROUTES = {
+    "list": "GET /api/facturas/",
+    "open": "GET /api/facturas/{id}",
+    "create": "POST /api/facturas/",
+    "pdf": "GET /api/facturas/{id}/pdf",
+    "dashboard": "GET /dashboard/stats",
+    "usage": "GET /api/billing/usage",
+}
+
+
+def synthetic_user_ids(seed: int, tenants: int) -> List[str]:
+    # Same naming as app.db.synthetic (kept importable without app settings)
+    return [f"user_synth_{seed}_{index:06d}" for index in range(tenants)]
+
+
+def mint_token(user_id: str, plan: str) -> str:
+    """Dev JWT: the server reads 'sub' and 'pla' without verifying the signature"""
+    return jwt.encode({"sub": user_id, "pla": f"u:{plan}"}, "loadtest", algorithm="HS256")
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for item in value.split(","):
+        name, weight = item.split("=")
+        if name not in ROUTES:
+            raise argparse.ArgumentTypeError(f"unknown route '{name}' (choose from {', '.join(ROUTES)})")
+        mix[name] = int(weight)
+    return mix
+
+
+class Tenant:
+    def __init__(self, user_id: str, plan: str):
+        self.user_id = user_id
+        self.headers = {"Authorization": f"Bearer {mint_token(user_id, plan)}"}
+        self.factura_ids: List[int] = []
+        self.cliente_ids: List[int] = []
+        self.producto_ids: List[int] = []
+
+    async def discover(self, client: httpx.AsyncClient) -> None:
+        facturas = await client.get("/api/facturas/", params={"limit": 200}, headers=self.headers)
+        clientes = await client.get("/api/clientes/", params={"limit": 50}, headers=self.headers)
+        productos = await client.get("/api/productos/", params={"limit": 100}, headers=self.headers)
+        for response in (facturas, clientes, productos):
+            response.raise_for_status()
+        self.factura_ids = [f["id"] for f in facturas.json()]
+        self.cliente_ids = [c["id"] for c in clientes.json()]
+        self.producto_ids = [p["id"] for p in productos.json()]
+
+    @property
+    def usable(self) -> bool:
+        return bool(self.factura_ids and self.cliente_ids and self.producto_ids)
+
+
+def build_request(route: str, tenant: Tenant, rng: random.Random) -> Dict:
+    if route == "list":
+        return {"method": "GET", "url": "/api/facturas/", "params": {"limit": 50}}
+    if route == "open":
+        return {"method": "GET", "url": f"/api/facturas/{rng.choice(tenant.factura_ids)}"}
+    if route == "pdf":
+        return {"method": "GET", "url": f"/api/facturas/{rng.choice(tenant.factura_ids)}/pdf"}
+    if route == "dashboard":
+        return {"method": "GET", "url": "/dashboard/stats"}
+    if route == "usage":
+        return {"method": "GET", "url": "/api/billing/usage"}
+    lineas = [
+        {"producto_id": producto_id, "cantidad": str(rng.randint(1, 5)), "precio_unitario": "25.00", "tipo_iva": "21"}
+        for producto_id in rng.sample(tenant.producto_ids, min(len(tenant.producto_ids), rng.randint(1, 5)))
+    ]
+    return {
+        "method": "POST",
+        "url": "/api/facturas/",
+        "json": {"cliente_id": rng.choice(tenant.cliente_ids), "fecha": date.today().isoformat(), "lineas": lineas},
+    }
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    tenants: List[Tenant],
+    mix: Dict[str, int],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    seed: int,
+):
+    latencies: Dict[str, List[float]] = {route: [] for route in mix}
+    errors: Dict[str, int] = {route: 0 for route in mix}
+    statuses: Dict[str, Dict[int, int]] = {route: {} for route in mix}
+    names, weights = list(mix), list(mix.values())
+    started = time.perf_counter()
+    measure_from = started + warmup
+    deadline = measure_from + duration
+
+    async def worker(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                return
+            route = rng.choices(names, weights)[0]
+            tenant = rng.choice(tenants)
+            request = build_request(route, tenant, rng)
+            start = time.perf_counter()
+            try:
+                response = await client.request(headers=tenant.headers, **request)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0
+            elapsed = time.perf_counter() - start
+            if start < measure_from:
+                continue
+            statuses[route][status] = statuses[route].get(status, 0) + 1
+            if 200 <= status < 300:
+                latencies[route].append(elapsed)
+                if route == "create":
+                    tenant.factura_ids.append(response.json()["id"])
+            else:
+                errors[route] += 1
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors, statuses, time.perf_counter() - measure_from
+
+
+def summarize(latencies, errors, statuses, elapsed: float) -> Dict:
+    def stats(samples: List[float], failed: int) -> Dict:
+        total = len(samples) + failed
+        quantiles = statistics.quantiles(samples, n=100) if len(samples) > 1 else [samples[0] if samples else 0] * 99
+        return {
+            "requests": total,
+            "rps": round(total / elapsed, 1),
+            "p50_ms": round(quantiles[49] * 1000, 1),
+            "p95_ms": round(quantiles[94] * 1000, 1),
+            "p99_ms": round(quantiles[98] * 1000, 1),
+            "error_rate": round(failed / total, 4) if total else 0.0,
+        }
+
+    routes = {route: {**stats(samples, errors[route]), "statuses": statuses[route]} for route, samples in latencies.items()}
+    all_samples = [sample for samples in latencies.values() for sample in samples]
+    return {"routes": routes, "total": stats(all_samples, sum(errors.values())), "seconds": round(elapsed, 1)}
+
+
+def print_report(summary: Dict, previous: Optional[Dict] = None) -> None:
+    header = f"{'route':<28}{'req':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'err %':>7}"
+    print(header + ("   p95 vs previous" if previous else ""))
+    rows = [(ROUTES[route], route, data) for route, data in summary["routes"].items()] + [("TOTAL", "total", summary["total"])]
+    for label, key, data in rows:
+        line = (
+            f"{label:<28}{data['requests']:>8}{data['rps']:>9.1f}{data['p50_ms']:>9.1f}"
+            f"{data['p95_ms']:>9.1f}{data['p99_ms']:>9.1f}{data['error_rate'] * 100:>7.2f}"
+        )
+        before = previous and (previous["total"] if key == "total" else previous["routes"].get(key))
+        if before and before["p95_ms"]:
+            line += f"   {(data['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100:+.0f}%"
+        print(line)
+    for route, data in summary["routes"].items():
+        failures = {status: count for status, count in data["statuses"].items() if not 200 <= int(status) < 300}
+        if failures:
+            print(f"  {route}: non-2xx statuses {failures} (0 = connection error/timeout)")
+
+
+async def main_async(args) -> Dict:
+    user_ids = args.users.split(",") if args.users else synthetic_user_ids(args.synthetic_seed, args.tenants)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        tenants = [Tenant(user_id, args.plan) for user_id in user_ids]
+        await asyncio.gather(*(tenant.discover(client) for tenant in tenants))
+        tenants = [tenant for tenant in tenants if tenant.usable]
+        if not tenants:
+            raise SystemExit("no tenant has invoices, clients and products (run scripts/generate_data.py first)")
+        print(
+            f"{args.base_url}  tenants: {len(tenants)}  concurrency: {args.concurrency}  "
+            f"duration: {args.duration:.0f}s (+{args.warmup:.0f}s warm-up)  mix: {args.mix}"
+        )
+        results = await run_load(
+            client, tenants, parse_mix(args.mix), args.concurrency, args.duration, args.warmup, args.seed
+        )
+    return summarize(*results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", help="comma-separated tenant user ids (default: synthetic tenants)")
+    parser.add_argument("--synthetic-seed", type=int, default=0, help="seed passed to generate_data.py")
+    parser.add_argument("--tenants", type=int, default=50, help="synthetic tenants to use")
+    parser.add_argument("--plan", default="pro", choices=("free_user", "starter", "pro"))
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"route weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=5, help="seconds run but not measured")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the request sequence")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    args = parser.parse_args()
+    parse_mix(args.mix)
+
+    summary = asyncio.run(main_async(args))
+    previous = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_report(summary, previous)
+    if args.output:
+        summary["config"] = {k: v for k, v in vars(args).items() if k not in ("output", "compare")}
+        Path(args.output).write_text(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
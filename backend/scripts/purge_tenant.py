@@ -0,0 +1,80 @@
+"""Delete (or archive, then delete) all of a tenant's data.
+
+Runs the same chunked, throttled purge as the user.deleted webhook. Progress
+is stored in the tenant_purges table, so an interrupted run (Ctrl-C, crash,
+deploy) continues where it stopped when started again for the same tenant.
+A purge that another process is still running is left alone until its
+lease expires (TENANT_PURGE_LEASE_SECONDS).
+
+Usage (from backend/):
+    python scripts/purge_tenant.py --user user_123 [--archive /var/backups/purges] [--chunk-size 500]
+    python scripts/purge_tenant.py --status [--user user_123]
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings  # noqa: E402
+from app.db.database import SessionLocal  # noqa: E402
+from app.models import TenantPurge  # noqa: E402
+from app.services.tenant_purge import PurgeInProgress, PurgeThrottle, TenantPurgeService  # noqa: E402
+
+
+def print_progress(job: TenantPurge) -> None:
+    progress = TenantPurgeService.progress(job)
+    print(
+        f"#{progress['id']} {progress['user_id']} {progress['mode']} {progress['estado']:<10} "
+        f"{progress['percent']:>5.1f}%  {progress['step'] or '-':<16} chunks: {progress['chunks']}  "
+        f"deleted: {progress['deleted']}" + (f"  error: {progress['error']}" if progress["error"] else "")
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user", help="tenant user id")
+    parser.add_argument("--archive", metavar="DIR", help="write the rows as gzip NDJSON under DIR before deleting")
+    parser.add_argument("--chunk-size", type=int, default=settings.TENANT_PURGE_CHUNK_SIZE)
+    parser.add_argument("--pause", type=float, default=settings.TENANT_PURGE_PAUSE)
+    parser.add_argument("--duty-cycle", type=float, default=settings.TENANT_PURGE_DUTY_CYCLE)
+    parser.add_argument("--max-replication-lag", type=float, default=settings.TENANT_PURGE_MAX_REPLICATION_LAG)
+    parser.add_argument("--status", action="store_true", help="show purges and exit")
+    args = parser.parse_args()
+    if not args.status and not args.user:
+        parser.error("--user is required")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    db = SessionLocal()
+    try:
+        if args.status:
+            query = db.query(TenantPurge)
+            if args.user:
+                query = query.filter(TenantPurge.user_id == args.user)
+            for job in query.order_by(TenantPurge.id.desc()).limit(50):
+                print_progress(job)
+            return
+        if args.archive:
+            settings.TENANT_PURGE_ARCHIVE_DIR = args.archive
+        try:
+            job = TenantPurgeService.start(db, args.user, "archive" if args.archive else "delete")
+            if job.chunks:
+                print(f"Resuming purge #{job.id} ({job.mode})")
+            job = TenantPurgeService.run(
+                db,
+                job,
+                chunk_size=args.chunk_size,
+                throttle=PurgeThrottle(args.pause, args.duty_cycle, args.max_replication_lag),
+                lock_timeout_ms=settings.TENANT_PURGE_LOCK_TIMEOUT_MS,
+                on_progress=print_progress,
+            )
+        except PurgeInProgress as e:
+            sys.exit(str(e))
+        print_progress(job)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Fill ``search_text`` for clients and products and ``search_vector`` for
+invoices (after adding the columns, or when the normalization in
+app.core.text changes).
+
+Usage (from backend/):
+    python scripts/reindex_search.py [--all] [--batch 1000]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from sqlalchemy import bindparam, update
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.db.database import SessionLocal  # noqa: E402
+from app.models import Cliente, Factura, Producto  # noqa: E402
+from app.services.search import FacturaSearchService  # noqa: E402
+
+
+def reindex(model, only_missing: bool, batch: int) -> int:
+    db = SessionLocal()
+    updated = 0
+    last_id = 0
+    try:
+        while True:
+            query = db.query(model).filter(model.id > last_id)
+            if only_missing:
+                query = query.filter(model.search_text.is_(None))
+            rows = query.order_by(model.id).limit(batch).all()
+            if not rows:
+                return updated
+            # Core executemany, as FacturaSearchService.refresh: updated_at is set to
+            # itself so the column's onupdate does not fire and ETags stay valid
+            table = model.__table__
+            db.execute(
+                update(table)
+                .where(table.c.id == bindparam("row_id"))
+                .values(search_text=bindparam("text"), updated_at=table.c.updated_at),
+                [{"row_id": r.id, "text": r.build_search_text()} for r in rows],
+            )
+            db.commit()
+            updated += len(rows)
+            last_id = rows[-1].id
+            db.expunge_all()
+    finally:
+        db.close()
+
+
+def reindex_facturas(only_missing: bool, batch: int) -> int:
+    db = SessionLocal()
+    updated = 0
+    last_id = 0
+    try:
+        while True:
+            query = db.query(Factura.id).filter(Factura.id > last_id)
+            if only_missing:
+                query = query.filter(Factura.search_vector.is_(None))
+            ids = [row.id for row in query.order_by(Factura.id).limit(batch)]
+            if not ids:
+                return updated
+            FacturaSearchService.refresh(db, Factura.id.in_(ids))
+            db.commit()
+            updated += len(ids)
+            last_id = ids[-1]
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--all", action="store_true", help="rebuild every row, not only empty ones")
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+    for model in (Cliente, Producto):
+        print(f"{model.__tablename__}: {reindex(model, not args.all, args.batch)} rows reindexed")
+    print(f"facturas: {reindex_facturas(not args.all, args.batch)} rows reindexed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+#!/bin/bash
+set -e
+
+echo "Waiting for PostgreSQL to be ready..."
+while ! nc -z postgres 5432; do
+  sleep 1
+done
+echo "PostgreSQL is ready!"
+
+echo "Running database migrations..."
+alembic upgrade head
+
+echo "Starting FastAPI server (gunicorn, see gunicorn.conf.py)..."
+exec gunicorn app.main:app -c gunicorn.conf.py
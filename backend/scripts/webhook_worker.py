@@ -0,0 +1,39 @@
+"""Process the webhook inbox in a dedicated process.
+
+This is how the inbox is processed in production: API processes leave
+WEBHOOK_WORKER_ENABLED off (the default), so handlers (tenant purges) never
+share CPU, the GIL or DB connections with request handling. Run at least
+one instance next to the API; several can run at once.
+
+Usage (from backend/):
+    python scripts/webhook_worker.py [--once]
+"""
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings  # noqa: E402
+from app.services.webhooks import webhook_processor  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--once", action="store_true", help="drain the inbox and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    while True:
+        claimed = webhook_processor.process_batch()
+        if claimed:
+            continue
+        if args.once:
+            return
+        time.sleep(settings.WEBHOOK_POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    main()